@@ -0,0 +1,11 @@
+"""directory imports. make the challenge package importable from the
+benchmark tools, the same way the tests import it."""
+import os
+import sys
+
+# obtain the absolute path to the dags directory, sibling of this folder,
+# and add it to the PYTHONPATH so `import challenge` resolves.
+current_file_dir = os.path.abspath(os.path.dirname(__file__))
+dags_dir = os.path.join(os.path.dirname(current_file_dir), "dags")
+if dags_dir not in sys.path:
+    sys.path.append(dags_dir)
@@ -0,0 +1,184 @@
+"""Tempus challenge  - Benchmark Tools: Merge Scaling Curve
+
+Measures how TransformOperations.transform_jsons_to_dataframe_merger scales
+with the number of headline files, from 10 to 10,000 files by default, for
+each of its merge strategies, and compares them with the former merge loop
+that concatenated the merged DataFrame once per file (and forced a garbage
+collection each time), e.g.
+
+    python -m benchmarks.merge_scaling --files 10 100 1000 10000 \\
+        --strategies concat tree --workers 4 --output merge_scaling.json
+
+The former loop and the 'sequential' strategy grow quadratically, so they
+are only run up to --quadratic-limit files.
+"""
+
+import argparse
+import gc
+import json
+import logging
+import os
+import tempfile
+import time
+
+from unittest.mock import patch
+
+import pandas as pd
+
+import challenge as c
+
+from challenge.transform.transform_operations import MERGE_STRATEGIES
+
+from .payload_generator import PayloadGenerator
+from .run_benchmarks import HOME_SETTING
+from .run_benchmarks import PIPELINE
+from .run_benchmarks import environment_info
+
+# ensures that function outputs and any errors encountered
+# are logged to the console
+log = logging.getLogger(__name__)
+
+# number of headline files measured, and the most files the quadratic
+# reference loop is run on
+FILE_COUNTS = [10, 100, 1000, 10000]
+QUADRATIC_LIMIT = 1000
+
+# articles in each headline file
+ARTICLES_PER_FILE = 5
+
+
+def quadratic_merge(json_files, read_js_func):
+    """The former merge loop: one concat of everything merged so far, and a
+    forced garbage collection, per file. Kept as the reference point of the
+    scaling curve."""
+
+    extract_func = c.ExtractOperations.extract_news_data_from_dataframe
+    transform_func = c.TransformOperations.transform_data_to_dataframe
+
+    merged = pd.DataFrame()
+    for file in json_files:
+        json_data = pd.DataFrame([read_js_func(file)])
+        current_file_df = transform_func(extract_func(json_data))
+        merged = pd.concat([merged, current_file_df])
+        del current_file_df
+        gc.collect()
+
+    return merged
+
+
+def pipeline_merge(strategy, workers):
+    """Returns the merger as the pipeline runs it, with a merge strategy."""
+
+    def merge(json_files, read_js_func):
+        return c.TransformOperations.transform_jsons_to_dataframe_merger(
+            json_files, read_js_func, strategy=strategy, max_workers=workers)
+
+    return merge
+
+
+def measure_scaling(file_counts=None,
+                    quadratic_limit=None,
+                    seed=0,
+                    strategies=None,
+                    workers=None) -> dict:
+    """Times the merge strategies, and the former merge loop, over growing
+    numbers of headline files.
+
+    # Arguments:
+        :param file_counts: numbers of headline files to merge.
+        :type file_counts: list
+        :param quadratic_limit: most files the former loop, and the
+            'sequential' strategy, are run on.
+        :type quadratic_limit: int
+        :param seed: seed of the synthetic data.
+        :type seed: int
+        :param strategies: merge strategies to measure, defaults to 'concat'
+            and 'tree'.
+        :type strategies: list
+        :param workers: worker processes of the 'tree' strategy.
+        :type workers: int
+    """
+
+    log.info("Running measure_scaling method")
+
+    if not file_counts:
+        file_counts = FILE_COUNTS
+    if quadratic_limit is None:
+        quadratic_limit = QUADRATIC_LIMIT
+    if not strategies:
+        strategies = ['concat', 'tree']
+
+    logging.getLogger('challenge').setLevel(logging.WARNING)
+    reader = c.FileStorage.json_to_dataframe_reader
+
+    results = []
+    for count in file_counts:
+        with tempfile.TemporaryDirectory(prefix='tempus_bench_') as home, \
+                patch(HOME_SETTING, home):
+            generator = PayloadGenerator(seed=seed)
+            generator.write_pipeline(PIPELINE,
+                                     num_sources=count,
+                                     articles_per_source=ARTICLES_PER_FILE,
+                                     home_directory=home)
+
+            headline_dir = c.FileStorage.get_headlines_directory(PIPELINE)
+            files = sorted(os.path.join(headline_dir, name)
+                           for name in os.listdir(headline_dir))
+
+            merges = [(strategy, pipeline_merge(strategy, workers))
+                      for strategy in strategies
+                      if strategy != 'sequential' or count <= quadratic_limit]
+            if count <= quadratic_limit:
+                merges.append(('former', quadratic_merge))
+
+            for name, merge_func in merges:
+                start = time.perf_counter()
+                frame = merge_func(files, reader)
+                seconds = time.perf_counter() - start
+
+                log.info("{} merge of {} files: {:.3f}s".format(
+                    name, count, seconds))
+                results.append({'merge': name,
+                                'files': count,
+                                'rows': len(frame),
+                                'seconds': seconds,
+                                'seconds_per_file': seconds / count})
+
+    return {'meta': environment_info(seed), 'results': results}
+
+
+def main(argv=None):
+    """Prints, and optionally saves, the scaling curve."""
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument('--files', nargs='*', type=int, default=FILE_COUNTS)
+    parser.add_argument('--quadratic-limit', type=int,
+                        default=QUADRATIC_LIMIT)
+    parser.add_argument('--strategies', nargs='*', default=None,
+                        choices=MERGE_STRATEGIES)
+    parser.add_argument('--workers', type=int, default=None,
+                        help="worker processes of the 'tree' strategy")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default=None,
+                        help="json file to write the results to")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+
+    results = measure_scaling(args.files, args.quadratic_limit, args.seed,
+                              args.strategies, args.workers)
+
+    print("{:<10} {:>7} {:>9} {:>11} {:>14}".format(
+        'merge', 'files', 'rows', 'seconds', 'ms per file'))
+    for result in results['results']:
+        print("{:<10} {:>7} {:>9} {:>11.3f} {:>14.3f}".format(
+            result['merge'], result['files'], result['rows'],
+            result['seconds'], result['seconds_per_file'] * 1000))
+
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            json.dump(results, output_file, indent=4)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,461 @@
+"""Tempus challenge  - Benchmark Tools: Local News API Stand-in Server
+
+Describes a local HTTP server that stands in for the News API, so that
+NetworkOperations and the two DAG pipelines can be exercised and benchmarked
+on a single machine with no network access.
+
+It implements the two endpoints the pipelines use:
+
+- /v2/sources (with 'language')
+- /v2/top-headlines (with 'sources', 'q', 'page' and 'pageSize')
+
+serving either fixture data or generated data, and can inject latency
+(fixed, uniform, exponential or lognormal), 429 Too Many Requests and 5xx
+errors, and slow-drip response bodies.
+
+Run it from the repository root with, for example:
+
+    python -m benchmarks.newsapi_stub_server --port 8080 \\
+        --latency lognormal:0.1,0.5 --rate-429 0.05 --rate-5xx 0.01
+
+then point the pipelines at it with NEWS_API_BASE_URL=http://localhost:8080
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import random
+import socketserver
+import threading
+import time
+
+from http.server import BaseHTTPRequestHandler
+from http.server import HTTPServer
+from urllib.parse import parse_qs
+from urllib.parse import urlsplit
+
+from .payload_generator import PayloadGenerator
+
+# ensures that function outputs and any errors encountered
+# are logged to the console
+log = logging.getLogger(__name__)
+
+# page size the News API applies when none is requested, and its maximum
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+class LatencyModel:
+    """Draws the artificial response latency, in seconds, of a request.
+
+    Supported distributions, given as 'name:parameters':
+
+    - 'none'                   no added latency
+    - 'fixed:SECONDS'          always the same latency
+    - 'uniform:LOW,HIGH'       uniformly between LOW and HIGH
+    - 'exponential:MEAN'       exponentially distributed around MEAN
+    - 'lognormal:MEDIAN,SIGMA' log-normally distributed, long tailed
+
+    # Arguments:
+        :param spec: the distribution, e.g. 'lognormal:0.1,0.5'.
+        :type spec: str
+        :param rng: random number generator to draw latencies with.
+        :type rng: random.Random
+
+    # Raises:
+        ValueError: if the distribution name or parameters are not valid.
+    """
+
+    distributions = ['none', 'fixed', 'uniform', 'exponential', 'lognormal']
+
+    def __init__(self, spec=None, rng=None):
+        spec = spec or 'none'
+        name, _, params = spec.partition(':')
+
+        if name not in self.distributions:
+            raise ValueError("Unknown latency distribution {}".format(name))
+
+        self.name = name
+        self.params = [float(value) for value in params.split(',') if value]
+        self.rng = rng or random.Random()
+
+        expected_params = {'none': 0, 'fixed': 1, 'uniform': 2,
+                           'exponential': 1, 'lognormal': 2}
+        if len(self.params) != expected_params[name]:
+            raise ValueError("Latency '{}' expects {} parameter(s)".format(
+                name, expected_params[name]))
+
+    def sample(self):
+        """Returns the latency of the next request, in seconds."""
+
+        if self.name == 'fixed':
+            return self.params[0]
+        elif self.name == 'uniform':
+            return self.rng.uniform(*self.params)
+        elif self.name == 'exponential':
+            return self.rng.expovariate(1.0 / self.params[0])
+        elif self.name == 'lognormal':
+            median, sigma = self.params
+            return self.rng.lognormvariate(0, sigma) * median
+
+        return 0.0
+
+
+class NewsAPIData:
+    """The news sources and articles a stand-in server serves.
+
+    # Arguments:
+        :param sources: news source json objects, as listed by /v2/sources.
+        :type sources: list
+        :param articles: article json objects, as listed by
+            /v2/top-headlines. Each refers to its source by
+            article['source']['id'].
+        :type articles: list
+    """
+
+    def __init__(self, sources, articles):
+        self.sources = sources
+        self.articles = articles
+
+    @classmethod
+    def from_fixtures(cls, fixture_dir):
+        """Loads data from a directory of fixture json files.
+
+        Files holding a 'sources' array contribute news sources, files
+        holding an 'articles' array contribute articles - e.g. the files a
+        pipeline run left in its 'news' and 'headlines' datastores.
+
+        # Arguments:
+            :param fixture_dir: directory containing the json fixtures.
+            :type fixture_dir: str
+        """
+
+        sources = []
+        articles = []
+        for name in sorted(os.listdir(fixture_dir)):
+            if not name.endswith('.json'):
+                continue
+            with open(os.path.join(fixture_dir, name),
+                      encoding='utf-8') as fixture:
+                data = json.load(fixture)
+            sources.extend(data.get('sources') or [])
+            articles.extend(data.get('articles') or [])
+
+        return cls(sources, articles)
+
+    @classmethod
+    def generate(cls,
+                 num_sources=10,
+                 articles_per_source=30,
+                 seed=0,
+                 **generator_options):
+        """Generates a deterministic set of English sources and articles.
+
+        # Arguments:
+            :param num_sources: number of news sources.
+            :type num_sources: int
+            :param articles_per_source: number of articles per source.
+            :type articles_per_source: int
+            :param seed: seed of the random generator.
+            :type seed: int
+            :param generator_options: null, unicode and duplicate rates
+                passed on to the PayloadGenerator.
+            :type generator_options: dict
+        """
+
+        generator = PayloadGenerator(seed=seed, **generator_options)
+        sources = generator.sources(num_sources)
+
+        articles = []
+        for source in sources:
+            articles.extend(generator.articles(source, articles_per_source))
+
+        return cls(sources, articles)
+
+
+class NewsAPIRequestHandler(BaseHTTPRequestHandler):
+    """Answers News API requests from the data and fault settings of the
+    server it belongs to."""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        """routes the request log to the module logger."""
+        log.debug(format % args)
+
+    def do_GET(self):
+        """Serves /v2/sources and /v2/top-headlines."""
+
+        server = self.server
+        server.count_request()
+
+        parts = urlsplit(self.path)
+        params = {name: values[-1]
+                  for name, values in parse_qs(parts.query).items()}
+
+        time.sleep(server.latency.sample())
+
+        # fault injection happens before any real work, as on a real server
+        fault = server.draw_fault()
+        if fault == 429:
+            return self.send_json(429,
+                                  {'status': 'error',
+                                   'code': 'rateLimited',
+                                   'message': "Too many requests"},
+                                  {'Retry-After': str(server.retry_after)})
+        elif fault:
+            return self.send_json(fault,
+                                  {'status': 'error',
+                                   'code': 'unexpectedError',
+                                   'message': "Injected server error"})
+
+        if not params.get('apiKey') and \
+                not self.headers.get('X-Api-Key'):
+            return self.send_json(401, {'status': 'error',
+                                        'code': 'apiKeyMissing',
+                                        'message': "Your API key is missing"})
+
+        if parts.path.rstrip('/') == '/v2/sources':
+            return self.send_json(200, self.sources_page(params))
+        elif parts.path.rstrip('/') == '/v2/top-headlines':
+            return self.send_json(200, self.top_headlines_page(params))
+
+        return self.send_json(404, {'status': 'error',
+                                    'code': 'notFound',
+                                    'message': "Unknown endpoint"})
+
+    def sources_page(self, params):
+        """Returns the /v2/sources body for the given parameters."""
+
+        sources = self.server.data.sources
+        if params.get('language'):
+            sources = [source for source in sources
+                       if source.get('language') == params['language']]
+
+        return {'status': 'ok', 'sources': sources}
+
+    def top_headlines_page(self, params):
+        """Returns the /v2/top-headlines body for the given parameters."""
+
+        articles = self.server.data.articles
+
+        if params.get('sources'):
+            wanted = set(params['sources'].split(','))
+            articles = [article for article in articles
+                        if (article.get('source') or {}).get('id') in wanted]
+
+        if params.get('q'):
+            query = params['q'].lower()
+            articles = [article for article in articles
+                        if query in (article.get('title') or '').lower() or
+                        query in (article.get('description') or '').lower()]
+
+        page_size = min(int(params.get('pageSize', DEFAULT_PAGE_SIZE)),
+                        MAX_PAGE_SIZE)
+        page = max(int(params.get('page', 1)), 1)
+        start = (page - 1) * page_size
+
+        return {'status': 'ok',
+                'totalResults': len(articles),
+                'articles': articles[start:start + page_size]}
+
+    def send_json(self, status_code, data, headers=None):
+        """Sends a json response, honouring If-None-Match and dripping the
+        body slowly if the server is set up to."""
+
+        body = json.dumps(data).encode('utf-8')
+        etag = '"{}"'.format(hashlib.sha1(body).hexdigest())
+
+        if status_code == 200 and self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        self.send_response(status_code)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        if status_code == 200:
+            self.send_header('ETag', etag)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+
+        drip_bytes = self.server.drip_bytes
+        if not drip_bytes:
+            self.wfile.write(body)
+            return
+
+        for start in range(0, len(body), drip_bytes):
+            self.wfile.write(body[start:start + drip_bytes])
+            self.wfile.flush()
+            time.sleep(self.server.drip_interval)
+
+
+class NewsAPIStubServer(socketserver.ThreadingMixIn, HTTPServer):
+    """Local, multi-threaded stand-in for the News API.
+
+    Can be run from the command line (see main()) or started in a background
+    thread from tests and benchmarks:
+
+        server = NewsAPIStubServer(data=NewsAPIData.generate())
+        server.start()
+        ... requests against server.base_url ...
+        server.stop()
+
+    # Arguments:
+        :param data: the sources and articles to serve. Defaults to a small
+            generated data set.
+        :type data: NewsAPIData
+        :param host: interface to listen on.
+        :type host: str
+        :param port: port to listen on; 0 picks a free one.
+        :type port: int
+        :param latency: latency distribution spec, see LatencyModel.
+        :type latency: str
+        :param rate_429: fraction of requests answered with 429.
+        :type rate_429: float
+        :param rate_5xx: fraction of requests answered with a 5xx error.
+        :type rate_5xx: float
+        :param retry_after: seconds sent in the Retry-After header of 429s.
+        :type retry_after: int
+        :param drip_bytes: if set, bodies are sent this many bytes at a time.
+        :type drip_bytes: int
+        :param drip_interval: seconds waited between dripped chunks.
+        :type drip_interval: float
+        :param seed: seed of the random draws of latencies and faults.
+        :type seed: int
+    """
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self,
+                 data=None,
+                 host='127.0.0.1',
+                 port=0,
+                 latency=None,
+                 rate_429=0.0,
+                 rate_5xx=0.0,
+                 retry_after=1,
+                 drip_bytes=None,
+                 drip_interval=0.01,
+                 seed=None):
+        HTTPServer.__init__(self, (host, port), NewsAPIRequestHandler)
+
+        self.data = data or NewsAPIData.generate()
+        self.rng = random.Random(seed)
+        self.latency = LatencyModel(latency, random.Random(seed))
+        self.rate_429 = rate_429
+        self.rate_5xx = rate_5xx
+        self.retry_after = retry_after
+        self.drip_bytes = drip_bytes
+        self.drip_interval = drip_interval
+
+        # number of requests received, for load and retry measurements
+        self.request_count = 0
+        self.lock = threading.Lock()
+        self.thread = None
+
+    @property
+    def base_url(self) -> str:
+        """Returns the url the server is reachable at."""
+        host, port = self.server_address[:2]
+        return "http://{}:{}".format(host, port)
+
+    def count_request(self):
+        """Counts a received request."""
+        with self.lock:
+            self.request_count += 1
+
+    def draw_fault(self):
+        """Returns the error status to inject into a request, or None."""
+
+        with self.lock:
+            draw = self.rng.random()
+
+        if draw < self.rate_429:
+            return 429
+        elif draw < self.rate_429 + self.rate_5xx:
+            return 503 if draw < self.rate_429 + self.rate_5xx / 2 else 500
+
+        return None
+
+    def start(self):
+        """Starts serving in a background thread."""
+
+        self.thread = threading.Thread(target=self.serve_forever,
+                                       daemon=True)
+        self.thread.start()
+        log.info("News API stand-in serving at {}".format(self.base_url))
+
+    def stop(self):
+        """Stops serving and releases the port."""
+
+        self.shutdown()
+        self.server_close()
+        if self.thread:
+            self.thread.join()
+
+
+def main(argv=None):
+    """Runs a stand-in server in the foreground until interrupted."""
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--fixtures',
+                        help="directory of json fixtures to serve")
+    parser.add_argument('--sources', type=int, default=130,
+                        help="number of generated sources")
+    parser.add_argument('--articles-per-source', type=int, default=30)
+    parser.add_argument('--null-rate', type=float, default=0.0)
+    parser.add_argument('--unicode-rate', type=float, default=0.0)
+    parser.add_argument('--duplicate-rate', type=float, default=0.0)
+    parser.add_argument('--latency', default='none',
+                        help="e.g. fixed:0.1, uniform:0.05,0.3, "
+                             "exponential:0.2, lognormal:0.1,0.5")
+    parser.add_argument('--rate-429', type=float, default=0.0)
+    parser.add_argument('--rate-5xx', type=float, default=0.0)
+    parser.add_argument('--retry-after', type=int, default=1)
+    parser.add_argument('--drip-bytes', type=int, default=None)
+    parser.add_argument('--drip-interval', type=float, default=0.01)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    if args.fixtures:
+        data = NewsAPIData.from_fixtures(args.fixtures)
+    else:
+        data = NewsAPIData.generate(args.sources,
+                                    args.articles_per_source,
+                                    args.seed,
+                                    null_rate=args.null_rate,
+                                    unicode_rate=args.unicode_rate,
+                                    duplicate_rate=args.duplicate_rate)
+
+    server = NewsAPIStubServer(data=data,
+                               host=args.host,
+                               port=args.port,
+                               latency=args.latency,
+                               rate_429=args.rate_429,
+                               rate_5xx=args.rate_5xx,
+                               retry_after=args.retry_after,
+                               drip_bytes=args.drip_bytes,
+                               drip_interval=args.drip_interval,
+                               seed=args.seed)
+
+    logging.basicConfig(level=logging.INFO)
+    log.info("News API stand-in serving at {}".format(server.base_url))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,346 @@
+"""Tempus challenge  - Benchmark Tools: Synthetic News API Payloads
+
+Describes a deterministic, seedable generator of realistic News API
+'sources' and 'top-headlines' json payloads, used as the data source of the
+performance benchmarks and of the local News API stand-in server.
+
+The generator can be tuned for:
+
+- the number of news sources and of articles per source
+- the rate at which nullable article fields (author, description,
+  urlToImage, content) are null, as they frequently are on the News API
+- the rate of Unicode-heavy text (accents, Cyrillic, Greek, Arabic, CJK and
+  emoji) in titles, descriptions and content
+- the rate of duplicated articles, i.e. the same story syndicated by several
+  sources or repeated in a source's own feed
+
+and writes its payloads straight into the 'tempdata/<dag_id>/news' and
+'tempdata/<dag_id>/headlines' layout the DAG pipelines read from, e.g.
+
+    python -m benchmarks.payload_generator --dag tempus_challenge_dag \\
+        --sources 10000 --articles 100 --null-rate 0.1 --duplicate-rate 0.05
+"""
+
+import argparse
+import json
+import logging
+import os
+import random
+import time
+
+from datetime import datetime, timedelta
+
+# ensures that function outputs and any errors encountered
+# are logged to the console
+log = logging.getLogger(__name__)
+
+# store the current directory of the airflow home folder
+# airflow creates a home environment variable pointing to the location
+HOME_DIRECTORY = str(os.environ['HOME'])
+
+# the DAG pipelines, and the keywords the 'tempus_bonus_challenge_dag'
+# pipeline searches the headlines for
+VALID_DAGS = ['tempus_challenge_dag', 'tempus_bonus_challenge_dag']
+DEFAULT_KEYWORDS = ['tempus', 'bitcoin', 'airflow', 'cancer']
+
+# article fields the News API may return as null
+NULLABLE_FIELDS = ['author', 'description', 'urlToImage', 'content']
+
+# vocabulary the generated text is drawn from
+WORDS = ['cancer', 'immunotherapy', 'tempus', 'labs', 'genomics', 'market',
+         'election', 'weather', 'football', 'science', 'health', 'trial',
+         'research', 'data', 'policy', 'bitcoin', 'airflow', 'patients',
+         'hospital', 'sequencing', 'startup', 'funding', 'report', 'study',
+         'government', 'economy', 'technology', 'clinical', 'drug', 'city']
+
+UNICODE_WORDS = ['café', 'naïve', 'Zürich', 'São Paulo', 'façade', 'Ωmega',
+                 'Москва', 'новости', 'Αθήνα', 'القاهرة', 'أخبار', '東京',
+                 '北京', '新闻', '뉴스', 'ニュース', '🚀', '📈', '🧬', '🏥',
+                 'Ünïcödé', 'résumé', '«quoted»', '—', '…']
+
+CATEGORIES = ['business', 'entertainment', 'general', 'health', 'science',
+              'sports', 'technology']
+
+
+class PayloadGenerator:
+    """Generates News API sources and top-headlines payloads.
+
+    Every payload is a pure function of the seed and the generator's
+    settings, so two runs with the same arguments produce byte-identical
+    files.
+
+    # Arguments:
+        :param seed: seed of the random generator.
+        :type seed: int
+        :param null_rate: probability, from 0 to 1, that a nullable article
+            field is null.
+        :type null_rate: float
+        :param unicode_rate: probability, from 0 to 1, that a generated word
+            is drawn from the Unicode-heavy vocabulary.
+        :type unicode_rate: float
+        :param duplicate_rate: probability, from 0 to 1, that an article is a
+            copy of one generated before it.
+        :type duplicate_rate: float
+        :param start_date: publication date of the oldest article.
+        :type start_date: datetime
+
+    # Raises:
+        ValueError: if a rate is not between 0 and 1.
+    """
+
+    def __init__(self,
+                 seed=0,
+                 null_rate=0.0,
+                 unicode_rate=0.0,
+                 duplicate_rate=0.0,
+                 start_date=None):
+        for name, rate in [('null_rate', null_rate),
+                           ('unicode_rate', unicode_rate),
+                           ('duplicate_rate', duplicate_rate)]:
+            if not 0 <= rate <= 1:
+                raise ValueError("{} must be between 0 and 1".format(name))
+
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.null_rate = null_rate
+        self.unicode_rate = unicode_rate
+        self.duplicate_rate = duplicate_rate
+        self.start_date = start_date or datetime(2018, 10, 1)
+
+        # a bounded sample of earlier articles that duplicates are copied
+        # from, so memory stays flat when generating millions of articles
+        self.duplicate_pool = []
+        self.duplicate_pool_size = 1000
+        self.article_count = 0
+
+    def words(self, count) -> str:
+        """Returns a string of count generated words."""
+
+        words = []
+        for _ in range(count):
+            if self.unicode_rate and self.rng.random() < self.unicode_rate:
+                words.append(self.rng.choice(UNICODE_WORDS))
+            else:
+                words.append(self.rng.choice(WORDS))
+        return " ".join(words)
+
+    def source(self, index) -> dict:
+        """Returns the News API json object of the index-th source."""
+
+        source_id = "source-{}".format(index)
+        return {'id': source_id,
+                'name': "Source {}".format(index),
+                'description': self.words(12).capitalize(),
+                'url': "https://{}.example.com".format(source_id),
+                'category': CATEGORIES[index % len(CATEGORIES)],
+                'language': 'en',
+                'country': 'us'}
+
+    def sources(self, num_sources) -> list:
+        """Returns the News API json objects of num_sources sources."""
+        return [self.source(index) for index in range(num_sources)]
+
+    def sources_payload(self, num_sources) -> dict:
+        """Returns a /v2/sources response body listing num_sources."""
+        return {'status': 'ok', 'sources': self.sources(num_sources)}
+
+    def nullable(self, value):
+        """Returns the value, or None at the generator's null rate."""
+
+        if self.null_rate and self.rng.random() < self.null_rate:
+            return None
+        return value
+
+    def article(self, source) -> dict:
+        """Returns a News API article json object published by source."""
+
+        self.article_count += 1
+
+        # syndicate an earlier story under this source
+        if self.duplicate_pool and \
+                self.duplicate_rate and \
+                self.rng.random() < self.duplicate_rate:
+            duplicate = dict(self.rng.choice(self.duplicate_pool))
+            duplicate['source'] = {'id': source['id'],
+                                   'name': source['name']}
+            return duplicate
+
+        published = self.start_date + timedelta(
+            seconds=self.rng.randint(0, 30 * 24 * 3600))
+        path = "{}/{}".format(published.strftime("%Y/%m/%d"),
+                              self.article_count)
+
+        article = {
+            'source': {'id': source['id'], 'name': source['name']},
+            'author': self.nullable("Author {}".format(
+                self.rng.randint(1, 5000))),
+            'title': self.words(self.rng.randint(5, 12)).capitalize(),
+            'description': self.nullable(
+                self.words(self.rng.randint(15, 40))),
+            'url': "{}/{}".format(source['url'], path),
+            'urlToImage': self.nullable(
+                "{}/images/{}.jpg".format(source['url'], path)),
+            'publishedAt': published.strftime("%Y-%m-%dT%H:%M:%SZ"),
+            'content': self.nullable(
+                self.words(self.rng.randint(40, 120)) +
+                " [+{} chars]".format(self.rng.randint(100, 5000)))}
+
+        # keep a bounded, uniformly sampled pool of duplication candidates
+        if len(self.duplicate_pool) < self.duplicate_pool_size:
+            self.duplicate_pool.append(article)
+        else:
+            slot = self.rng.randrange(self.article_count)
+            if slot < self.duplicate_pool_size:
+                self.duplicate_pool[slot] = article
+
+        return article
+
+    def articles(self, source, count) -> list:
+        """Returns count articles published by source."""
+        return [self.article(source) for _ in range(count)]
+
+    def headlines_payload(self, source, count) -> dict:
+        """Returns a /v2/top-headlines response body of count articles."""
+
+        return {'status': 'ok',
+                'totalResults': count,
+                'articles': self.articles(source, count)}
+
+    def keyword_payload(self, keyword, count) -> dict:
+        """Returns a /v2/top-headlines response body of count articles
+        matching a keyword query, spread across generated sources."""
+
+        articles = []
+        for index in range(count):
+            article = self.article(self.source(index % 50))
+            article['title'] = "{} {}".format(keyword.capitalize(),
+                                              article['title'])
+            articles.append(article)
+
+        return {'status': 'ok', 'totalResults': count, 'articles': articles}
+
+    def write_pipeline(self,
+                       dag_id,
+                       num_sources=10,
+                       articles_per_source=20,
+                       keywords=None,
+                       home_directory=None,
+                       create_date=None) -> dict:
+        """Writes generated payloads into a pipeline's tempdata layout.
+
+        For the 'tempus_challenge_dag' pipeline this writes the english
+        news sources file into 'news' and one '<source_id>_headlines' file
+        per source into 'headlines'. For 'tempus_bonus_challenge_dag' it
+        writes one '<keyword>_headlines' file per keyword into 'headlines'.
+        Files are named as FileStorage names them. Each file is written as
+        soon as it is generated, so memory use does not grow with the total
+        number of articles.
+
+        # Arguments:
+            :param dag_id: the DAG pipeline to generate data for.
+            :type dag_id: str
+            :param num_sources: number of news sources.
+            :type num_sources: int
+            :param articles_per_source: number of articles per source, or
+                per keyword.
+            :type articles_per_source: int
+            :param keywords: keywords of the bonus pipeline.
+            :type keywords: list
+            :param home_directory: directory holding 'tempdata'. Defaults to
+                the HOME directory, as used by the pipelines.
+            :type home_directory: str
+            :param create_date: date prefix of the file names.
+            :type create_date: str
+
+        # Raises:
+            ValueError: if the dag_id is not one of the pipelines.
+        """
+
+        log.info("Running write_pipeline method")
+
+        if dag_id not in VALID_DAGS:
+            raise ValueError("{} not valid pipeline".format(dag_id))
+
+        if not home_directory:
+            home_directory = HOME_DIRECTORY
+        if not create_date:
+            create_date = time.strftime("%Y-%m-%d")
+        if not keywords:
+            keywords = DEFAULT_KEYWORDS
+
+        dag_dir = os.path.join(home_directory, 'tempdata', dag_id)
+        news_dir = os.path.join(dag_dir, 'news')
+        headlines_dir = os.path.join(dag_dir, 'headlines')
+        for directory in [news_dir, headlines_dir,
+                          os.path.join(dag_dir, 'csv')]:
+            os.makedirs(directory, exist_ok=True)
+
+        summary = {'news_files': 0, 'headline_files': 0, 'articles': 0}
+
+        if dag_id == 'tempus_challenge_dag':
+            sources = self.sources(num_sources)
+            self.write_file({'status': 'ok', 'sources': sources},
+                            news_dir, "english_news_sources", create_date)
+            summary['news_files'] += 1
+
+            for source in sources:
+                payload = self.headlines_payload(source, articles_per_source)
+                self.write_file(payload, headlines_dir,
+                                str(source['id']) + "_headlines",
+                                create_date)
+                summary['headline_files'] += 1
+                summary['articles'] += len(payload['articles'])
+        else:
+            for keyword in keywords:
+                payload = self.keyword_payload(keyword, articles_per_source)
+                self.write_file(payload, headlines_dir,
+                                str(keyword) + "_headlines", create_date)
+                summary['headline_files'] += 1
+                summary['articles'] += len(payload['articles'])
+
+        return summary
+
+    @classmethod
+    def write_file(cls, payload, path_to_dir, filename, create_date):
+        """Writes a payload as a '<create_date>_<filename>.json' file."""
+
+        fname = str(create_date) + "_" + str(filename) + ".json"
+        with open(os.path.join(path_to_dir, fname), 'w',
+                  encoding='utf-8') as output_file:
+            json.dump(payload, output_file, ensure_ascii=False)
+
+
+def main(argv=None):
+    """Generates a pipeline's tempdata payloads from the command line."""
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument('--dag', default='tempus_challenge_dag',
+                        choices=VALID_DAGS)
+    parser.add_argument('--sources', type=int, default=130)
+    parser.add_argument('--articles', type=int, default=20,
+                        help="articles per source, or per keyword")
+    parser.add_argument('--keywords', nargs='*', default=None)
+    parser.add_argument('--null-rate', type=float, default=0.0)
+    parser.add_argument('--unicode-rate', type=float, default=0.0)
+    parser.add_argument('--duplicate-rate', type=float, default=0.0)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--home', default=None,
+                        help="directory holding tempdata, defaults to HOME")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+
+    generator = PayloadGenerator(seed=args.seed,
+                                 null_rate=args.null_rate,
+                                 unicode_rate=args.unicode_rate,
+                                 duplicate_rate=args.duplicate_rate)
+    summary = generator.write_pipeline(args.dag,
+                                       num_sources=args.sources,
+                                       articles_per_source=args.articles,
+                                       keywords=args.keywords,
+                                       home_directory=args.home)
+    log.info("Generated {}".format(summary))
+
+
+if __name__ == '__main__':
+    main()
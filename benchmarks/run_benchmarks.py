@@ -0,0 +1,364 @@
+"""Tempus challenge  - Benchmark Tools: Extract, Transform, Storage and Upload
+
+Times and memory-profiles the hot paths of the DAG pipelines across data
+size tiers, on synthetic data from the PayloadGenerator:
+
+- ExtractOperations.extract_news_data_from_dataframe
+- TransformOperations.transform_jsons_to_dataframe_merger
+- TransformOperations.transform_data_to_dataframe
+- FileStorage.write_json_to_file
+- UploadOperations.upload_csv_to_s3, against moto's local S3 stand-in
+
+Every benchmark runs in a scratch 'tempdata' directory that is removed
+afterwards, so the pipelines' own data is never touched. Results are written
+as json and can be compared with an earlier run, e.g.
+
+    python -m benchmarks.run_benchmarks --tiers small medium \\
+        --output bench_results.json --compare bench_baseline.json
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from datetime import datetime
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+import boto3
+import pandas as pd
+
+from moto import mock_s3
+
+import challenge as c
+
+from .payload_generator import PayloadGenerator
+
+# ensures that function outputs and any errors encountered
+# are logged to the console
+log = logging.getLogger(__name__)
+
+# data size tiers: number of news sources, and of articles per source.
+# The extract, transform and json-write benchmarks work on one payload of
+# sources * articles articles, the merger on one file per source.
+TIERS = {'tiny': {'sources': 3, 'articles': 5},
+         'small': {'sources': 10, 'articles': 20},
+         'medium': {'sources': 100, 'articles': 100},
+         'large': {'sources': 1000, 'articles': 100}}
+
+# fraction by which a benchmark may get slower, or use more memory, than in
+# a compared run before it is reported as a regression
+REGRESSION_THRESHOLD = 0.10
+
+# the pipeline the benchmarks read and write the directories of, and the
+# constant its directories are resolved from
+PIPELINE = 'tempus_challenge_dag'
+HOME_SETTING = 'challenge.storage.filestorage_operations.HOME_DIRECTORY'
+
+
+class BenchmarkData:
+    """Synthetic pipeline data of one tier, laid out in a scratch home
+    directory.
+
+    # Arguments:
+        :param home_directory: scratch directory standing in for HOME.
+        :type home_directory: str
+        :param tier: name of the data size tier.
+        :type tier: str
+        :param seed: seed of the payload generator.
+        :type seed: int
+    """
+
+    def __init__(self, home_directory, tier, seed=0):
+        self.tier = tier
+        self.sizes = TIERS[tier]
+
+        generator = PayloadGenerator(seed=seed, null_rate=0.1,
+                                     unicode_rate=0.1, duplicate_rate=0.05)
+        generator.write_pipeline(PIPELINE,
+                                 num_sources=self.sizes['sources'],
+                                 articles_per_source=self.sizes['articles'],
+                                 home_directory=home_directory)
+
+        self.headlines_directory = c.FileStorage.get_headlines_directory(
+            PIPELINE)
+        self.csv_directory = c.FileStorage.get_csv_directory(PIPELINE)
+        self.headline_files = sorted(
+            os.path.join(self.headlines_directory, name)
+            for name in os.listdir(self.headlines_directory))
+
+        # one payload holding every article of the tier
+        articles = []
+        for path in self.headline_files:
+            articles.extend(c.FileStorage.json_to_dataframe_reader(
+                path)['articles'])
+        self.payload = {'status': 'ok',
+                        'totalResults': len(articles),
+                        'articles': articles}
+        self.payload_frame = pd.DataFrame([self.payload])
+        self.extracted_data = \
+            c.ExtractOperations.extract_news_data_from_dataframe(
+                self.payload_frame)
+
+    @property
+    def article_count(self) -> int:
+        """Returns the number of articles in the tier."""
+        return self.payload['totalResults']
+
+
+class Benchmarks:
+    """The benchmarked operations. Each takes a tier's BenchmarkData and
+    returns the function to be timed."""
+
+    @classmethod
+    def extract_news_data_from_dataframe(cls, data):
+        extract_func = c.ExtractOperations.extract_news_data_from_dataframe
+        return lambda: extract_func(data.payload_frame)
+
+    @classmethod
+    def transform_jsons_to_dataframe_merger(cls, data):
+        merger_func = c.TransformOperations.transform_jsons_to_dataframe_merger
+        reader = c.FileStorage.json_to_dataframe_reader
+        return lambda: merger_func(data.headline_files, reader)
+
+    @classmethod
+    def transform_data_to_dataframe(cls, data):
+        transform_func = c.TransformOperations.transform_data_to_dataframe
+        return lambda: transform_func(data.extracted_data)
+
+    @classmethod
+    def write_json_to_file(cls, data):
+        json_dir = tempfile.mkdtemp(dir=os.path.dirname(data.csv_directory))
+        return lambda: c.FileStorage.write_json_to_file(data.payload,
+                                                        json_dir,
+                                                        "benchmark")
+
+    @classmethod
+    def upload_csv_to_s3(cls, data):
+        # the csv the transform task would leave for upload
+        frame = c.TransformOperations.transform_data_to_dataframe(
+            data.extracted_data)
+        frame.to_csv(os.path.join(data.csv_directory,
+                                  "benchmark_top_headlines.csv"))
+
+        dag = MagicMock()
+        dag.dag_id = PIPELINE
+        bucket_name = c.NewsInfoDTO(PIPELINE).s3_bucket_name
+
+        def run():
+            with mock_s3():
+                client = boto3.client('s3', region_name='us-east-1')
+                resource = boto3.resource('s3', region_name='us-east-1')
+                resource.create_bucket(Bucket=bucket_name)
+                return c.UploadOperations.upload_csv_to_s3(
+                    data.csv_directory, bucket_name, client, resource,
+                    dag=dag)
+
+        return run
+
+
+BENCHMARKS = ['extract_news_data_from_dataframe',
+              'transform_jsons_to_dataframe_merger',
+              'transform_data_to_dataframe',
+              'write_json_to_file',
+              'upload_csv_to_s3']
+
+
+def measure(func, repeat=5) -> dict:
+    """Times func over repeat runs, then measures its peak memory in one
+    more run under tracemalloc (kept apart as tracing slows it down)."""
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {'repeat': repeat,
+            'seconds_min': min(timings),
+            'seconds_median': statistics.median(timings),
+            'seconds_max': max(timings),
+            'peak_memory_bytes': peak}
+
+
+def run_benchmarks(tiers=None, benchmarks=None, repeat=5, seed=0) -> dict:
+    """Runs benchmarks over data size tiers and returns their results.
+
+    # Arguments:
+        :param tiers: names of the tiers to run, defaults to 'small'.
+        :type tiers: list
+        :param benchmarks: names of the benchmarks to run, defaults to all.
+        :type benchmarks: list
+        :param repeat: number of timed runs per benchmark and tier.
+        :type repeat: int
+        :param seed: seed of the synthetic data.
+        :type seed: int
+
+    # Raises:
+        ValueError: if an unknown tier or benchmark is requested.
+    """
+
+    log.info("Running run_benchmarks method")
+
+    if not tiers:
+        tiers = ['small']
+    if not benchmarks:
+        benchmarks = BENCHMARKS
+
+    for tier in tiers:
+        if tier not in TIERS:
+            raise ValueError("Unknown tier {}".format(tier))
+    for name in benchmarks:
+        if name not in BENCHMARKS:
+            raise ValueError("Unknown benchmark {}".format(name))
+
+    # the pipelines are quiet while being measured
+    logging.getLogger('challenge').setLevel(logging.WARNING)
+
+    results = []
+    for tier in tiers:
+        with tempfile.TemporaryDirectory(prefix='tempus_bench_') as home, \
+                patch(HOME_SETTING, home):
+            data = BenchmarkData(home, tier, seed)
+
+            for name in benchmarks:
+                log.info("Benchmarking {} on tier {}".format(name, tier))
+                func = getattr(Benchmarks, name)(data)
+                result = {'benchmark': name,
+                          'tier': tier,
+                          'articles': data.article_count,
+                          'files': len(data.headline_files)}
+                result.update(measure(func, repeat))
+                results.append(result)
+
+    return {'meta': environment_info(seed), 'results': results}
+
+
+def environment_info(seed) -> dict:
+    """Returns what is needed to tell benchmark runs apart."""
+
+    try:
+        commit = subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+
+    return {'timestamp': datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ"),
+            'commit': commit,
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'platform': platform.platform(),
+            'seed': seed}
+
+
+def compare_results(current, baseline, threshold=None) -> list:
+    """Compares two benchmark results and returns the comparison rows.
+
+    Each row holds the benchmark and tier, the median time and peak memory
+    ratios of current to baseline, and whether either grew beyond the
+    threshold.
+
+    # Arguments:
+        :param current: results of run_benchmarks.
+        :type current: dict
+        :param baseline: earlier results of run_benchmarks.
+        :type baseline: dict
+        :param threshold: fraction of growth reported as a regression.
+        :type threshold: float
+    """
+
+    if threshold is None:
+        threshold = REGRESSION_THRESHOLD
+
+    earlier = {(result['benchmark'], result['tier']): result
+               for result in baseline['results']}
+
+    rows = []
+    for result in current['results']:
+        key = (result['benchmark'], result['tier'])
+        if key not in earlier:
+            continue
+
+        time_ratio = result['seconds_median'] / \
+            max(earlier[key]['seconds_median'], 1e-9)
+        memory_ratio = result['peak_memory_bytes'] / \
+            max(earlier[key]['peak_memory_bytes'], 1)
+        rows.append({'benchmark': key[0],
+                     'tier': key[1],
+                     'time_ratio': time_ratio,
+                     'memory_ratio': memory_ratio,
+                     'regression': time_ratio > 1 + threshold or
+                     memory_ratio > 1 + threshold})
+
+    return rows
+
+
+def main(argv=None):
+    """Runs the benchmarks from the command line. Exits with status 1 if a
+    compared run shows a regression."""
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument('--tiers', nargs='*', default=['small'],
+                        choices=sorted(TIERS))
+    parser.add_argument('--benchmarks', nargs='*', default=None,
+                        choices=BENCHMARKS)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default=None,
+                        help="json file to write the results to")
+    parser.add_argument('--compare', default=None,
+                        help="json results of an earlier run to compare to")
+    parser.add_argument('--threshold', type=float,
+                        default=REGRESSION_THRESHOLD)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+
+    results = run_benchmarks(args.tiers, args.benchmarks, args.repeat,
+                             args.seed)
+
+    print("{:<38} {:<7} {:>9} {:>12} {:>14}".format(
+        'benchmark', 'tier', 'articles', 'median (s)', 'peak (bytes)'))
+    for result in results['results']:
+        print("{:<38} {:<7} {:>9} {:>12.4f} {:>14}".format(
+            result['benchmark'], result['tier'], result['articles'],
+            result['seconds_median'], result['peak_memory_bytes']))
+
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            json.dump(results, output_file, indent=4)
+
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            baseline = json.load(baseline_file)
+
+        rows = compare_results(results, baseline, args.threshold)
+        for row in rows:
+            print("{:<38} {:<7} time x{:.2f} memory x{:.2f}{}".format(
+                row['benchmark'], row['tier'], row['time_ratio'],
+                row['memory_ratio'],
+                "  REGRESSION" if row['regression'] else ""))
+
+        if any(row['regression'] for row in rows):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
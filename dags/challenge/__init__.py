@@ -12,3 +12,5 @@ from .upload import *
 from .extract import *
 
 from .dto import *
+
+from .dedup import *
@@ -0,0 +1,4 @@
+"""directory imports for the DedupIndex and NearDuplicates classes."""
+from .dedup_index import *
+
+from .near_duplicates import *
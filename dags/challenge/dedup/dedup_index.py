@@ -0,0 +1,271 @@
+"""Tempus challenge  - Operations and Functions: Deduplication Index
+
+Describes the code definitions of a persistent index of the news articles
+already written out by the DAG pipelines, used by the transform task so the
+same article is not written into every day's csv again.
+"""
+
+import contextlib
+import logging
+import os
+import sqlite3
+import time
+
+from urllib.parse import parse_qsl
+from urllib.parse import urlencode
+from urllib.parse import urlsplit
+from urllib.parse import urlunsplit
+
+# ensures that function outputs and any errors encountered
+# are logged to the Airflow console
+log = logging.getLogger(__name__)
+
+# store the current directory of the airflow home folder
+# airflow creates a home environment variable pointing to the location
+HOME_DIRECTORY = str(os.environ['HOME'])
+
+# what the transform task does with articles already written out by an
+# earlier run:
+# - 'off' writes every article, without consulting the index
+# - 'drop' leaves them out of the csv
+# - 'flag' writes them with True in a 'news_seen_before' column
+DEDUP_MODES = ['off', 'drop', 'flag']
+DEDUP_MODE = os.environ.get('TRANSFORM_DEDUP_MODE', 'off')
+
+# days an article stays in the index after it was last seen. An article
+# that keeps showing up in the headlines stays in the index.
+DEDUP_TTL_DAYS = float(os.environ.get('TRANSFORM_DEDUP_TTL_DAYS', 7))
+
+# query parameters of article urls that only track where a reader came
+# from, and are left out of the canonical url. Parameters starting with
+# 'utm_' are always left out.
+TRACKING_PARAMETERS = ['cmpid', 'fbclid', 'gclid', 'ito', 'ns_campaign',
+                       'ns_mchannel', 'ocid', 'ref', 'smid', 'src']
+
+# the index lives outside the per-pipeline datastore folders, which are
+# wiped at the start of every pipeline run. Each pipeline has its own.
+DEDUP_DIRECTORY = os.path.join(HOME_DIRECTORY, 'tempdata', 'dedup_index')
+
+# column the 'flag' mode adds to the headlines
+SEEN_COLUMN = 'news_seen_before'
+
+
+class DedupIndex:
+    """Persistent index of the news articles a pipeline has written out,
+    keyed by the canonical url of each article.
+
+    The index is a SQLite database holding, for each canonical url, the run
+    it was first written out in and when it was last seen. An article is
+    seen before if an earlier run wrote it out - a retry of the same run
+    writes out the same articles again. Articles not seen for the TTL are
+    expired by compact(), which also reclaims their space on disk.
+
+    # Arguments:
+        :param pipeline_name: name of the DAG pipeline.
+        :type pipeline_name: str
+        :param index_dir: directory the index database is stored in.
+            Defaults to DEDUP_DIRECTORY.
+        :type index_dir: str
+        :param ttl_days: days an article is kept after it was last seen.
+            Defaults to DEDUP_TTL_DAYS.
+        :type ttl_days: float
+    """
+
+    def __init__(self, pipeline_name, index_dir=None, ttl_days=None):
+        self.index_dir = index_dir or DEDUP_DIRECTORY
+        self.ttl_days = DEDUP_TTL_DAYS if ttl_days is None else ttl_days
+        self.path = os.path.join(self.index_dir, pipeline_name + ".sqlite")
+
+        os.makedirs(self.index_dir, exist_ok=True)
+
+        with self.connect() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS articles ("
+                "url TEXT PRIMARY KEY, "
+                "first_run TEXT NOT NULL, "
+                "last_seen REAL NOT NULL)")
+            connection.execute(
+                "CREATE INDEX IF NOT EXISTS articles_last_seen "
+                "ON articles (last_seen)")
+
+    @classmethod
+    def enabled(cls) -> bool:
+        """Returns True unless deduplication is turned off by DEDUP_MODE."""
+        return DEDUP_MODE.lower() != 'off'
+
+    @contextlib.contextmanager
+    def connect(self):
+        """Context manager of a connection to the index database, committed
+        and closed on exit. Another pipeline run holding the database is
+        waited on for up to 30 seconds."""
+
+        connection = sqlite3.connect(self.path, timeout=30)
+        try:
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+    @classmethod
+    def canonical_url(cls, url) -> str:
+        """Returns the canonical form of an article url - with its scheme
+        and host lower-cased, the 'www.' of the host, any fragment, tracking
+        query parameters and trailing slash removed, and the remaining query
+        parameters sorted. An empty string is returned for a missing url.
+
+        # Arguments:
+            :param url: the url of an article.
+            :type url: str
+        """
+
+        if not isinstance(url, str) or not url.strip():
+            return ''
+
+        parts = urlsplit(url.strip())
+
+        host = parts.netloc.lower()
+        if host.startswith('www.'):
+            host = host[len('www.'):]
+
+        params = [(name, value) for name, value
+                  in parse_qsl(parts.query, keep_blank_values=True)
+                  if not name.lower().startswith('utm_')
+                  and name.lower() not in TRACKING_PARAMETERS]
+
+        # http and https urls of an article are the same article
+        scheme = parts.scheme.lower()
+        if scheme == 'http':
+            scheme = 'https'
+
+        return urlunsplit((scheme,
+                           host,
+                           parts.path.rstrip('/'),
+                           urlencode(sorted(params)),
+                           ''))
+
+    def seen_before(self, urls, run_id, now=None) -> list:
+        """Records a run's article urls in the index, and returns for each
+        whether it was seen before - written out by an earlier run, or
+        earlier in the urls of this run. Missing urls are never seen before.
+
+        # Arguments:
+            :param urls: the urls of the run's articles.
+            :type urls: list
+            :param run_id: identifier of the pipeline run, the same for
+                retries of the run, e.g. its execution date.
+            :type run_id: str
+            :param now: time the urls are seen at, in seconds since the
+                epoch. Defaults to the current time.
+            :type now: float
+        """
+
+        log.info("Running seen_before method")
+
+        if now is None:
+            now = time.time()
+
+        keys = [self.canonical_url(url) for url in urls]
+        unique_keys = sorted({key for key in keys if key})
+
+        with self.connect() as connection:
+            # runs of each url already in the index, looked up in batches
+            # that stay under SQLite's limit on query parameters
+            first_runs = {}
+            for start in range(0, len(unique_keys), 500):
+                batch = unique_keys[start:start + 500]
+                first_runs.update(connection.execute(
+                    "SELECT url, first_run FROM articles WHERE url IN "
+                    "({})".format(", ".join("?" * len(batch))), batch))
+
+            connection.executemany(
+                "INSERT OR IGNORE INTO articles (url, first_run, last_seen) "
+                "VALUES (?, ?, ?)",
+                [(key, run_id, now) for key in unique_keys])
+            connection.executemany(
+                "UPDATE articles SET last_seen = ? WHERE url = ?",
+                [(now, key) for key in unique_keys])
+
+        seen = []
+        seen_in_run = set()
+        for key in keys:
+            seen.append(bool(key) and (first_runs.get(key, run_id) != run_id
+                                       or key in seen_in_run))
+            seen_in_run.add(key)
+
+        return seen
+
+    def deduplicate(self, frame, run_id, mode=None, now=None):
+        """Returns a headline DataFrame without the articles seen before, or
+        with them flagged in a 'news_seen_before' column, depending on the
+        mode. The articles are recorded in the index either way.
+
+        # Arguments:
+            :param frame: the headline DataFrame, with a 'news_url' column.
+            :type frame: DataFrame
+            :param run_id: identifier of the pipeline run.
+            :type run_id: str
+            :param mode: one of DEDUP_MODES. Defaults to DEDUP_MODE.
+            :type mode: str
+            :param now: time the articles are seen at, in seconds since the
+                epoch. Defaults to the current time.
+            :type now: float
+
+        # Raises:
+            ValueError: if the mode is not one of DEDUP_MODES.
+        """
+
+        log.info("Running deduplicate method")
+
+        if not mode:
+            mode = DEDUP_MODE
+        if mode not in DEDUP_MODES:
+            raise ValueError("{} not valid dedup mode".format(mode))
+
+        if mode == 'off' or frame.empty:
+            return frame
+
+        seen = self.seen_before(list(frame['news_url']), run_id, now)
+        log.info("{} of {} articles seen before".format(sum(seen),
+                                                        len(seen)))
+
+        if mode == 'flag':
+            return frame.assign(**{SEEN_COLUMN: seen})
+
+        return frame[[not article_seen for article_seen in seen]]
+
+    def compact(self, now=None) -> int:
+        """Removes the articles not seen for the TTL, reclaims their space
+        on disk, and returns the number of articles removed.
+
+        # Arguments:
+            :param now: the current time, in seconds since the epoch.
+                Defaults to the current time.
+            :type now: float
+        """
+
+        log.info("Running compact method")
+
+        if now is None:
+            now = time.time()
+
+        expiry = now - self.ttl_days * 24 * 60 * 60
+
+        with self.connect() as connection:
+            removed = connection.execute(
+                "DELETE FROM articles WHERE last_seen < ?",
+                (expiry,)).rowcount
+
+        if removed:
+            # VACUUM runs outside the transaction of the removal
+            with self.connect() as connection:
+                connection.execute("VACUUM")
+
+        log.info("{} articles expired from the index".format(removed))
+
+        return removed
+
+    def size(self) -> int:
+        """Returns the number of articles in the index."""
+        with self.connect() as connection:
+            return connection.execute(
+                "SELECT COUNT(*) FROM articles").fetchone()[0]
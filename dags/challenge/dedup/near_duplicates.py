@@ -0,0 +1,291 @@
+"""Tempus challenge  - Operations and Functions: Near-Duplicate Headlines
+
+Describes the code definitions used to cluster the near-duplicate news
+articles - syndicated stories re-published by several news sources with
+slightly different titles and descriptions - in the DAG pipelines.
+"""
+
+import logging
+import os
+import re
+import zlib
+
+import numpy as np
+import pandas as pd
+
+# ensures that function outputs and any errors encountered
+# are logged to the Airflow console
+log = logging.getLogger(__name__)
+
+# what the transform task does with near-duplicate articles:
+# - 'off' leaves the headlines as they are
+# - 'cluster' adds the id of each article's cluster in a 'news_cluster_id'
+#   column
+# - 'collapse' also keeps only the first article of each cluster
+NEAR_DUPLICATE_MODES = ['off', 'cluster', 'collapse']
+NEAR_DUPLICATE_MODE = os.environ.get('TRANSFORM_NEAR_DUPLICATE_MODE', 'off')
+
+# estimated Jaccard similarity, of the word shingles of their titles and
+# descriptions, from which two articles are near-duplicates
+NEAR_DUPLICATE_THRESHOLD = float(
+    os.environ.get('TRANSFORM_NEAR_DUPLICATE_THRESHOLD', 0.6))
+
+# number of MinHash functions in a signature, and of LSH bands the
+# signatures are split into. Articles sharing any band of their signature
+# are compared; with 16 bands of 4 hashes, pairs of a similarity of 0.6 are
+# found 89% of the time, and pairs of 0.3 under 13% of the time.
+MINHASH_PERMUTATIONS = 64
+LSH_BANDS = 16
+
+# number of consecutive words in a shingle
+SHINGLE_WORDS = 3
+
+# articles whose signatures are computed at a time, which bounds the
+# memory of the hash matrix
+SIGNATURE_BATCH_ROWS = 5000
+
+# column the cluster ids are written to
+CLUSTER_COLUMN = 'news_cluster_id'
+
+# words and shingles are hashed to 31 bits, modulo a Mersenne prime, and a
+# shingle's hash combines those of its words as digits of SHINGLE_BASE
+MERSENNE_PRIME = (1 << 31) - 1
+SHINGLE_BASE = 1000003
+
+# the MinHash functions are multiply-shift hashes - the top 32 bits of
+# (a * x + b) mod 2^64, for odd a - which need no division, with fixed
+# coefficients so signatures are the same in every run
+HASH_COEFFICIENTS = (np.random.RandomState(2018).randint(
+    0, 1 << 62, size=(2, MINHASH_PERMUTATIONS), dtype=np.uint64)
+    << np.uint64(1)) | np.uint64(1)
+HASH_SHIFT = np.uint64(32)
+
+
+class NearDuplicates:
+    """Clusters near-duplicate news articles with MinHash signatures and
+    locality-sensitive hashing (LSH).
+
+    Each article's title and description are split into overlapping word
+    shingles, summarised by a MinHash signature whose matching fraction
+    estimates the Jaccard similarity of two articles' shingles. The
+    signatures are split into bands, and only articles sharing a band are
+    compared - so the clustering runs in time linear in the number of
+    articles rather than comparing every pair. Articles found similar are
+    joined into clusters with a union-find.
+    """
+
+    @classmethod
+    def enabled(cls) -> bool:
+        """Returns True unless clustering is turned off by
+        NEAR_DUPLICATE_MODE."""
+        return NEAR_DUPLICATE_MODE.lower() != 'off'
+
+    @classmethod
+    def words(cls, text) -> list:
+        """Returns the words of a text, lower-cased and without punctuation.
+
+        # Arguments:
+            :param text: the text of an article.
+            :type text: str
+        """
+        return re.findall(r'\w+', text.lower())
+
+    @classmethod
+    def word_hashes(cls, words):
+        """Returns the hashes of words, as an array. Each distinct word is
+        hashed once, as the words of news articles repeat a lot.
+
+        # Arguments:
+            :param words: the words.
+            :type words: list
+        """
+
+        codes, distinct_words = pd.factorize(np.array(words, dtype=object))
+        distinct_hashes = np.fromiter(
+            (zlib.crc32(word.encode('utf-8')) & MERSENNE_PRIME
+             for word in distinct_words),
+            dtype=np.int64, count=len(distinct_words))
+
+        return distinct_hashes[codes]
+
+    @classmethod
+    def shingle_hashes(cls, word_hashes, lengths):
+        """Returns the hashes of the word shingles of texts, and the number
+        of shingles of each text. A text of fewer words than a shingle is a
+        single shingle, and a text without words has none.
+
+        # Arguments:
+            :param word_hashes: the word hashes of every text, one after
+                another.
+            :type word_hashes: ndarray
+            :param lengths: the number of words of each text.
+            :type lengths: ndarray
+        """
+
+        counts = np.maximum(lengths - SHINGLE_WORDS + 1, 1)
+        counts[lengths == 0] = 0
+
+        # first word and end of the text of each shingle
+        text_starts = np.cumsum(lengths) - lengths
+        shingle_numbers = np.arange(counts.sum()) - np.repeat(
+            np.cumsum(counts) - counts, counts)
+        firsts = np.repeat(text_starts, counts) + shingle_numbers
+        ends = np.repeat(text_starts + lengths, counts)
+
+        # the shingle's words, combined as the digits of a number in a base
+        # of the Mersenne prime. Shingles of short texts stop at their end.
+        hashes = np.zeros(len(firsts), dtype=np.int64)
+        last_word = max(len(word_hashes) - 1, 0)
+        for offset in range(SHINGLE_WORDS):
+            positions = firsts + offset
+            words = np.where(positions < ends,
+                             word_hashes[np.minimum(positions, last_word)],
+                             0)
+            hashes = (hashes * SHINGLE_BASE + words) % MERSENNE_PRIME
+
+        return hashes, counts
+
+    @classmethod
+    def signatures(cls, texts):
+        """Returns the MinHash signatures of texts, one row of
+        MINHASH_PERMUTATIONS hashes per text, and whether each text has any
+        words to sign.
+
+        # Arguments:
+            :param texts: the texts of the articles.
+            :type texts: list
+        """
+
+        signatures = np.full((len(texts), MINHASH_PERMUTATIONS),
+                             np.iinfo(np.uint64).max, dtype=np.uint64)
+        has_words = np.zeros(len(texts), dtype=bool)
+
+        multipliers, increments = HASH_COEFFICIENTS
+        for start in range(0, len(texts), SIGNATURE_BATCH_ROWS):
+            batch = [cls.words(text)
+                     for text in texts[start:start + SIGNATURE_BATCH_ROWS]]
+            lengths = np.array([len(words) for words in batch],
+                               dtype=np.int64)
+            word_hashes = cls.word_hashes([word for words in batch
+                                           for word in words])
+            shingles, counts = cls.shingle_hashes(word_hashes, lengths)
+
+            rows = np.flatnonzero(counts)
+            if not len(rows):
+                continue
+
+            # the shingles of the batch, one run per text, hashed by every
+            # MinHash function at once and reduced to each text's minimum.
+            # Repeated shingles of a text do not change its minimum. Each
+            # function's hashes are a row, so the runs are contiguous.
+            hashes = (multipliers[:, None] * shingles.astype(np.uint64)
+                      + increments[:, None]) >> HASH_SHIFT
+            offsets = (np.cumsum(counts) - counts)[rows]
+            signatures[start + rows] = np.minimum.reduceat(hashes, offsets,
+                                                           axis=1).T
+            has_words[start + rows] = True
+
+        return signatures, has_words
+
+    @classmethod
+    def cluster_ids(cls, texts, threshold=None) -> list:
+        """Returns the cluster id of each text - the number of its cluster,
+        in the order the clusters' first texts come in. A text without
+        words is a cluster of its own.
+
+        # Arguments:
+            :param texts: the texts of the articles.
+            :type texts: list
+            :param threshold: estimated similarity from which two texts are
+                near-duplicates. Defaults to NEAR_DUPLICATE_THRESHOLD.
+            :type threshold: float
+        """
+
+        log.info("Running cluster_ids method")
+
+        if threshold is None:
+            threshold = NEAR_DUPLICATE_THRESHOLD
+
+        signatures, has_words = cls.signatures(texts)
+
+        # union-find of the texts, each of which starts in its own cluster
+        parents = list(range(len(texts)))
+
+        def find(row):
+            while parents[row] != row:
+                parents[row] = parents[parents[row]]
+                row = parents[row]
+            return row
+
+        band_rows = MINHASH_PERMUTATIONS // LSH_BANDS
+        for band in range(LSH_BANDS):
+            band_signatures = signatures[:, band * band_rows:
+                                         (band + 1) * band_rows]
+            # the first text of each bucket is compared with the texts
+            # hashed to the bucket after it
+            buckets = {}
+            for row in np.flatnonzero(has_words).tolist():
+                key = band_signatures[row].tobytes()
+                first = buckets.setdefault(key, row)
+                if first == row:
+                    continue
+
+                first_root, root = find(first), find(row)
+                if first_root == root:
+                    continue
+
+                similarity = np.mean(signatures[first] == signatures[row])
+                if similarity >= threshold:
+                    parents[max(first_root, root)] = min(first_root, root)
+
+        # number the clusters in the order of their first text
+        numbers = {}
+        return [numbers.setdefault(find(row), len(numbers))
+                for row in range(len(texts))]
+
+    @classmethod
+    def cluster_headlines(cls, frame, mode=None, threshold=None):
+        """Returns a headline DataFrame with the cluster id of each article
+        in a 'news_cluster_id' column, and with only the first article of
+        each cluster in the 'collapse' mode. The articles are compared by
+        their title and description.
+
+        # Arguments:
+            :param frame: the headline DataFrame.
+            :type frame: DataFrame
+            :param mode: one of NEAR_DUPLICATE_MODES. Defaults to
+                NEAR_DUPLICATE_MODE.
+            :type mode: str
+            :param threshold: estimated similarity from which two articles
+                are near-duplicates. Defaults to NEAR_DUPLICATE_THRESHOLD.
+            :type threshold: float
+
+        # Raises:
+            ValueError: if the mode is not one of NEAR_DUPLICATE_MODES.
+        """
+
+        log.info("Running cluster_headlines method")
+
+        if not mode:
+            mode = NEAR_DUPLICATE_MODE
+        if mode not in NEAR_DUPLICATE_MODES:
+            raise ValueError("{} not valid near-duplicate mode".format(mode))
+
+        if mode == 'off' or frame.empty:
+            return frame
+
+        texts = [" ".join(value for value in (title, description)
+                          if isinstance(value, str))
+                 for title, description in zip(frame['news_title'],
+                                               frame['news_description'])]
+        clusters = cls.cluster_ids(texts, threshold)
+
+        clustered = frame.assign(**{CLUSTER_COLUMN: clusters})
+        log.info("{} articles in {} clusters".format(
+            len(clusters), len(set(clusters))))
+
+        if mode == 'collapse':
+            clustered = clustered[
+                ~clustered[CLUSTER_COLUMN].duplicated().values]
+
+        return clustered
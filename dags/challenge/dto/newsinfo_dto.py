@@ -83,6 +83,12 @@ class NewsInfoDTO:
             """Returns the path to this pipeline's csv directory."""
             return c.FileStorage.get_csv_directory(self.pipeline)
 
+        @property
+        def output_formats(self) -> list:
+            """Returns the formats the headlines of this pipeline are written
+            out in."""
+            return c.OutputSinks.pipeline_formats(self.pipeline)
+
         @property
         def news_files(self) -> list:
             """Returns json files in the news directory of this pipeline."""
@@ -5,15 +5,11 @@ relevant news source and headline data from JSON news files, in the
 DAG pipelines.
 """
 
-import numpy as np
-
 import json
 import logging
 import os
 import requests
 
-import pandas as pd
-
 # ensures that function outputs and any errors encountered
 # are logged to the Airflow console
 log = logging.getLogger(__name__)
@@ -26,10 +22,6 @@ HOME_DIRECTORY = str(os.environ['HOME'])
 class ExtractOperations:
     """Handles functionality for extracting headlines."""
 
-    # final DataFrame that will be result from the entire merge of
-    # transformed json new files
-    merged_df = pd.DataFrame()
-
     @classmethod
     def create_top_headlines_json(cls, source_id, source_name, headlines):
         """Creates a json object out of given news source and its headlines.
@@ -206,7 +198,7 @@ class ExtractOperations:
             json_path = os.path.join(json_directory, js)
 
             # read each news json and extract the news sources
-            with open(json_path, "r") as js_file:
+            with open(json_path, "r", encoding="utf-8") as js_file:
                 try:
                     raw_data = json.load(js_file)
                     extracted_sources = source_extract_func(raw_data)
@@ -259,53 +251,62 @@ class ExtractOperations:
 
         log.info("Running extract_news_data_from_dataframe method")
 
-        num_of_articles = frame['totalResults'][0]
-
         # dictionary representing the extracted news data
         extracted_data = {}
 
+        # the articles of the news json. The number of articles is taken from
+        # the list itself: 'totalResults' counts every article matching the
+        # request, including those on pages that were not retrieved.
+        articles = None
+        if 'articles' in frame and len(frame['articles']):
+            articles = frame['articles'][0]
+
         # error check - no articles means this json had no news data
-        if num_of_articles < 1:
+        if not isinstance(articles, list) or not articles:
             return extracted_data
 
-        # Using Pandas, extract required information from the given dataframe
-        # each is a return list of data.
-        source_id = [frame['articles'][0][index]['source']['id']
-                     for index in np.arange(num_of_articles)]
-
-        source_name = [frame['articles'][0][index]['source']['name']
-                       for index in np.arange(num_of_articles)]
-
-        author = [frame['articles'][0][index]['author']
-                  for index in np.arange(num_of_articles)]
-
-        title = [frame['articles'][0][index]['title']
-                 for index in np.arange(num_of_articles)]
+        # Extract the required information from every article in a single
+        # pass over the articles, one row of values per article, and turn
+        # the rows into the columns of the extracted data.
+        rows = [cls.extract_article_values(article) for article in articles]
+        columns = [list(column) for column in zip(*rows)]
 
-        description = [frame['articles'][0][index]['description']
-                       for index in np.arange(num_of_articles)]
-
-        url = [frame['articles'][0][index]['url']
-               for index in np.arange(num_of_articles)]
+        # compose a dictionary with the extracted information
+        extracted_data = dict(zip(['source_id',
+                                   'source_name',
+                                   'author',
+                                   'title',
+                                   'description',
+                                   'url',
+                                   'url_to_image',
+                                   'published_at',
+                                   'content'], columns))
 
-        url_to_image = [frame['articles'][0][index]['urlToImage']
-                        for index in np.arange(num_of_articles)]
+        return extracted_data
 
-        published_at = [frame['articles'][0][index]['publishedAt']
-                        for index in np.arange(num_of_articles)]
+    @classmethod
+    def extract_article_values(cls, article) -> tuple:
+        """Returns the news data of a single article json object.
 
-        content = [frame['articles'][0][index]['content']
-                   for index in np.arange(num_of_articles)]
+        The values are in the order of the columns returned by
+        extract_news_data_from_dataframe(): source id, source name, author,
+        title, description, url, urlToImage, publishedAt and content.
+        Fields missing from the article are returned as None.
 
-        # compose a dictionary with the extracted information
-        extracted_data = {'source_id': source_id,
-                          'source_name': source_name,
-                          'author': author,
-                          'title': title,
-                          'description': description,
-                          'url': url,
-                          'url_to_image': url_to_image,
-                          'published_at': published_at,
-                          'content': content}
+        # Arguments:
+            :param article: a news article json object, as listed in the
+                'articles' of a top-headlines response.
+            :type article: dict
+        """
 
-        return extracted_data
+        source = article.get('source') or {}
+
+        return (source.get('id'),
+                source.get('name'),
+                article.get('author'),
+                article.get('title'),
+                article.get('description'),
+                article.get('url'),
+                article.get('urlToImage'),
+                article.get('publishedAt'),
+                article.get('content'))
@@ -1,2 +1,9 @@
-"""directory imports for the NetworkOperations class."""
+"""directory imports for the NetworkOperations, ResponseCache, StreamedBody,
+TokenBucket and AIMDController classes."""
 from .network_operations import *
+
+from .response_cache import *
+
+from .streamed_body import *
+
+from .rate_limiter import *
@@ -5,14 +5,24 @@ news data from an external News API, in the DAG pipelines.
 """
 
 
+import email.utils
 import logging
 import os
 import requests
+import threading
+import time
 
 from airflow.models import Variable
+from requests.adapters import HTTPAdapter
 
 import challenge as c
 
+from .rate_limiter import AIMDController
+from .rate_limiter import TokenBucket
+from .response_cache import CACHE_TTL
+from .response_cache import ResponseCache
+from .streamed_body import StreamedBody
+
 # ensures that function outputs and any errors encountered
 # are logged to the Airflow console
 log = logging.getLogger(__name__)
@@ -21,10 +31,325 @@ log = logging.getLogger(__name__)
 # airflow creates a home environment variable pointing to the location
 HOME_DIRECTORY = str(os.environ['HOME'])
 
+# maximum number of keep-alive connections the shared HTTP session keeps open
+# to the News API host. Can be overridden with an environment variable.
+HTTP_POOL_SIZE = int(os.environ.get('NEWS_API_POOL_SIZE', 10))
+
+# (connect, read) timeouts, in seconds, applied to every News API request so a
+# stalled connection cannot hang an Airflow task indefinitely.
+HTTP_TIMEOUT = (float(os.environ.get('NEWS_API_CONNECT_TIMEOUT', 3.05)),
+                float(os.environ.get('NEWS_API_READ_TIMEOUT', 30)))
+
+# maximum number of news source headlines fetched concurrently by the
+# 'tempus_challenge_dag' headline extraction task. Kept within the pool size
+# so every in-flight request can reuse a pooled connection.
+HEADLINE_FETCH_WORKERS = int(os.environ.get('NEWS_API_MAX_WORKERS', 8))
+
+# number of times a request throttled (429) or failed by the server (5xx) is
+# retried, after waiting for its Retry-After time, before giving up on it.
+HTTP_MAX_RETRIES = int(os.environ.get('NEWS_API_MAX_RETRIES', 3))
+
+# number of news source ids packed into one multi-source top-headlines
+# request. A value of 1 requests every source on its own.
+HEADLINE_BATCH_SIZE = int(os.environ.get('NEWS_API_BATCH_SIZE', 20))
+
+# number of articles requested per page of top-headlines, and the most pages
+# walked for a single source, batch or keyword before giving up on the rest.
+HEADLINE_PAGE_SIZE = int(os.environ.get('NEWS_API_PAGE_SIZE', 100))
+HEADLINE_MAX_PAGES = int(os.environ.get('NEWS_API_MAX_PAGES', 10))
+
+# base url of the News API. Can be pointed at a local stand-in server (see
+# benchmarks/newsapi_stub_server.py) to exercise the pipelines offline.
+NEWS_API_BASE_URL = os.environ.get('NEWS_API_BASE_URL',
+                                   "https://newsapi.org").rstrip('/')
+
+# News API endpoint serving the top-headlines of sources and keywords
+TOP_HEADLINES_ENDPOINT = NEWS_API_BASE_URL + "/v2/top-headlines?"
+
 
 class NetworkOperations:
     """Handles functionality for making remote calls to the News API."""
 
+    # largest page size the News API top-headlines endpoint accepts
+    MAX_PAGE_SIZE = 100
+
+    # shared keep-alive session reused by every remote call to the News API,
+    # so connections (and their TCP+TLS handshakes) are pooled between calls.
+    http_session = None
+    http_pool_size = None
+    http_session_lock = threading.Lock()
+
+    # shared on-disk cache of News API responses, see get_response_cache()
+    response_cache = None
+
+    # rate limiter and concurrency controller shared by every remote call,
+    # see get_rate_limiter() and get_concurrency_controller()
+    rate_limiter = None
+    concurrency_controller = None
+
+    @classmethod
+    def get_http_session(cls, pool_size=None):
+        """Returns the shared, connection-pooled HTTP session.
+
+        The session is created lazily on first use and reused afterwards.
+        Passing a pool size different from that of the current session
+        replaces it with a new one sized accordingly.
+
+        # Arguments:
+            :param pool_size: maximum number of connections kept alive in
+                the pool. Defaults to HTTP_POOL_SIZE.
+            :type pool_size: int
+        """
+
+        if not pool_size:
+            pool_size = HTTP_POOL_SIZE
+
+        with cls.http_session_lock:
+            if cls.http_session is None or cls.http_pool_size != pool_size:
+                if cls.http_session is not None:
+                    cls.http_session.close()
+
+                # pool_block makes callers wait for a free connection rather
+                # than opening (and throwing away) extra ones past the limit
+                adapter = HTTPAdapter(pool_connections=pool_size,
+                                      pool_maxsize=pool_size,
+                                      pool_block=True)
+                session = requests.Session()
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+
+                cls.http_session = session
+                cls.http_pool_size = pool_size
+
+        return cls.http_session
+
+    @classmethod
+    def get_response_cache(cls):
+        """Returns the shared on-disk News API response cache.
+
+        Returns None if caching is turned off, i.e. its ttl
+        (NEWS_API_CACHE_TTL) is set to 0.
+        """
+
+        if CACHE_TTL <= 0:
+            return None
+
+        with cls.http_session_lock:
+            if cls.response_cache is None:
+                cls.response_cache = ResponseCache()
+
+        return cls.response_cache
+
+    @classmethod
+    def get_rate_limiter(cls):
+        """Returns the token bucket shared by every News API request."""
+
+        with cls.http_session_lock:
+            if cls.rate_limiter is None:
+                cls.rate_limiter = TokenBucket()
+
+        return cls.rate_limiter
+
+    @classmethod
+    def get_concurrency_controller(cls):
+        """Returns the AIMD controller shared by every News API request.
+
+        Its limit can grow up to HEADLINE_FETCH_WORKERS requests in flight.
+        """
+
+        with cls.http_session_lock:
+            if cls.concurrency_controller is None:
+                cls.concurrency_controller = AIMDController(
+                    maximum=HEADLINE_FETCH_WORKERS)
+
+        return cls.concurrency_controller
+
+    @classmethod
+    def retry_after_seconds(cls, response, default=None):
+        """Returns the wait time, in seconds, a response asks for in its
+        Retry-After header, or the default if there is none.
+
+        The header holds either a number of seconds or an HTTP date.
+
+        # Arguments:
+            :param response: http response object.
+            :type response: object
+            :param default: wait time returned when no usable Retry-After
+                header is present.
+            :type default: float
+        """
+
+        value = response.headers.get('Retry-After')
+        if not value:
+            return default
+
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+
+        try:
+            retry_at = email.utils.parsedate_to_datetime(value)
+            return max(0.0, retry_at.timestamp() - time.time())
+        except (TypeError, ValueError):
+            return default
+
+    @classmethod
+    def send_throttled(cls,
+                       session,
+                       url,
+                       timeout,
+                       headers=None,
+                       limiter=None,
+                       controller=None,
+                       max_retries=None,
+                       stream=False):
+        """Sends a GET request within the News API rate limits.
+
+        Every request first takes a token from the shared rate limiter and a
+        slot from the shared AIMD concurrency controller, and reports its
+        latency and outcome back to the controller. A request answered with
+        429 Too Many Requests or a 5xx error pauses the rate limiter for the
+        Retry-After time the server asked for (or an exponential backoff if
+        it gave none) and is retried up to `max_retries` times; the last
+        response is returned if it still fails.
+
+        With `stream`, the body of an OK response is left for the caller to
+        read, and the request keeps its concurrency slot until the body has
+        been read or the response closed - so the caller must do either.
+        Other bodies, e.g. of errors, are small and read right away.
+
+        # Arguments:
+            :param session: the session to make the request with.
+            :type session: object
+            :param url: the full url of the request.
+            :type url: str
+            :param timeout: (connect, read) timeouts of the request.
+            :type timeout: tuple
+            :param headers: extra headers of the request.
+            :type headers: dict
+            :param limiter: the rate limiter to use. Defaults to the shared
+                one returned by get_rate_limiter().
+            :type limiter: TokenBucket
+            :param controller: the concurrency controller to use. Defaults to
+                the shared one returned by get_concurrency_controller().
+            :type controller: AIMDController
+            :param max_retries: number of retries of a throttled or failed
+                request. Defaults to HTTP_MAX_RETRIES.
+            :type max_retries: int
+            :param stream: whether the body of an OK response is streamed,
+                rather than read before the response is returned.
+            :type stream: bool
+        """
+
+        if not limiter:
+            limiter = cls.get_rate_limiter()
+        if not controller:
+            controller = cls.get_concurrency_controller()
+        if max_retries is None:
+            max_retries = HTTP_MAX_RETRIES
+
+        for attempt in range(max_retries + 1):
+            limiter.acquire()
+            controller.acquire()
+            started = time.monotonic()
+
+            def finish(success, started=started):
+                controller.record(time.monotonic() - started, success)
+                controller.release()
+
+            try:
+                response = session.get(url,
+                                       timeout=timeout,
+                                       headers=headers,
+                                       stream=stream)
+
+                # the slot of a streamed OK body is freed once it is read
+                if response.status_code == requests.codes.ok and \
+                        StreamedBody.wrap(response, on_close=finish):
+                    return response
+                response.content
+            except requests.RequestException:
+                finish(False)
+                raise
+
+            throttled = response.status_code == requests.codes.too_many or \
+                response.status_code >= 500
+            finish(not throttled)
+
+            if not throttled or attempt == max_retries:
+                return response
+
+            wait = cls.retry_after_seconds(response, default=2 ** attempt)
+            log.info("Request got status code {}, retrying in {:.1f}s".format(
+                response.status_code, wait))
+            limiter.pause(wait)
+
+        return response
+
+    @classmethod
+    def http_get(cls, url, session=None, timeout=None, cache=None):
+        """Performs a GET request over the shared keep-alive session.
+
+        Remote calls are throttled by send_throttled(). They go through the
+        response cache first: a fresh cached
+        response is returned without any remote call, and a stale one is
+        revalidated with a conditional request (If-None-Match /
+        If-Modified-Since), reusing the cached body when the server answers
+        304 Not Modified. Successful responses are stored in the cache.
+
+        Remote calls are streamed: the body of an OK response is read by the
+        caller as it arrives - e.g. straight into a datastore file by
+        FileStorage.write_response_to_file() - and copied into the cache on
+        the way. The request holds its concurrency slot until then, so every
+        response returned must be read or closed.
+
+        # Arguments:
+            :param url: the full url of the request.
+            :type url: str
+            :param session: the session to make the request with. Defaults to
+                the shared session returned by get_http_session().
+            :type session: object
+            :param timeout: (connect, read) timeouts of the request in seconds.
+                Defaults to HTTP_TIMEOUT.
+            :type timeout: tuple
+            :param cache: the response cache to use. Defaults to the shared
+                cache returned by get_response_cache().
+            :type cache: ResponseCache
+        """
+
+        if not session:
+            session = cls.get_http_session()
+
+        if not timeout:
+            timeout = HTTP_TIMEOUT
+
+        if not cache:
+            cache = cls.get_response_cache()
+
+        if not cache:
+            return cls.send_throttled(session, url, timeout, stream=True)
+
+        headers = {}
+        entry = cache.get(url)
+        if entry:
+            if cache.is_fresh(entry):
+                log.info("Serving cached response")
+                return cache.to_response(entry, url)
+            headers = cache.conditional_headers(entry)
+
+        response = cls.send_throttled(session, url, timeout, headers,
+                                      stream=True)
+
+        if entry and response.status_code == requests.codes.not_modified:
+            log.info("Cached response revalidated")
+            cache.refresh(url, entry)
+            return cache.to_response(entry, url)
+
+        cache.put(url, response)
+
+        return response
+
     @classmethod
     def get_news(cls,
                  response: requests.Response,
@@ -63,6 +388,9 @@ class NetworkOperations:
                 (Using either Airflow's Variable or XCom classes might be more
                 ideal here eventually.)
             :type gb_var: str
+
+        # Raises:
+            ValueError: if the body of an OK response is not valid json.
         """
 
         log.info("Running get_news method")
@@ -88,14 +416,12 @@ class NetworkOperations:
         if not filename:
             fname = "english_news_sources"
 
-        # copy of the json data
-        json_data = response.json()
-
-        # write the data to file if the response status is 'okay'
+        # write the raw json data to file if the response status is 'okay',
+        # once it is known to be valid json
         if status_code == requests.codes.ok:
-            c.FileStorage.write_json_to_file(data=json_data,
-                                             path_to_dir=news_dir,
-                                             filename=fname)
+            c.FileStorage.write_response_to_file(response,
+                                                 path_to_dir=news_dir,
+                                                 filename=fname)
 
             return [True, status_code]
         elif status_code >= 400:
@@ -118,9 +444,14 @@ class NetworkOperations:
            - read the file (json.load)
            - get the news sources id and put them in a list.
 
-        - for each source id in the list
-           - make remote httpcall to get its headlines as json
-           - write the json to the 'headlines' directory (write_json_to_file)
+        - for each batch of HEADLINE_BATCH_SIZE source ids in the list
+          (fetched concurrently, with at most HEADLINE_FETCH_WORKERS requests
+          in flight)
+           - make remote httpcalls to get the batch's headlines as json,
+             walking every page of HEADLINE_PAGE_SIZE articles (up to
+             HEADLINE_MAX_PAGES)
+           - split the articles back per source and stream each source's
+             articles to its json file in the 'headlines' directory
 
         # Arguments:
             :param context: airflow context object of the currently running
@@ -155,11 +486,18 @@ class NetworkOperations:
         extracted_ids = source_info[0]
         extracted_names = source_info[1]
 
+        # never run more fetches at once than there are pooled connections
+        workers = min(HEADLINE_FETCH_WORKERS, HTTP_POOL_SIZE)
+
         # get the headlines of sources, write them to json files. Note status.
         write_stat = source_headlines_writer(extracted_ids,
                                              extracted_names,
                                              pipeline_info.headlines_directory,
-                                             apikey)
+                                             apikey,
+                                             max_workers=workers,
+                                             batch_size=HEADLINE_BATCH_SIZE,
+                                             page_size=HEADLINE_PAGE_SIZE,
+                                             max_pages=HEADLINE_MAX_PAGES)
 
         # PythonOperator callable needs to return True or False status.
         return write_stat
@@ -174,6 +512,11 @@ class NetworkOperations:
         Used by the SimpleHTTPOperator exclusively in the DAG pipeline
         'tempus_bonus_challenge_dag'.
 
+        The response only holds the first page of the keyword's headlines.
+        If the News API reports more results than it returned, the remaining
+        pages are fetched and all the articles are streamed to the json file
+        as they arrive, rather than keeping only the first page.
+
         # Arguments:
             :param response: http response object returned from the
                 SimpleHTTPOperator http call.
@@ -203,15 +546,25 @@ class NetworkOperations:
         if not headlines_dir:
             headlines_dir = pipeline_info.headlines_directory
 
-        # retrieve the json data from the Response object
-        json_data = response.json()
-
-        # write to json data to a file with the query-keyword as its filename.
-        # Note status of the operation. True implies the write went okay,
-        # False otherwise.
-        write_stat = c.FileStorage.write_json_to_file(json_data,
-                                                      headlines_dir,
-                                                      filename)
+        # write the raw json data to a file with the query-keyword as its
+        # filename. Note status of the operation. True implies the write went
+        # okay, False otherwise.
+        json_data = c.FileStorage.write_response_to_file(response,
+                                                         headlines_dir,
+                                                         filename)
+        write_stat = True
+
+        if cls.has_more_pages(json_data):
+            # the remaining pages are requested with the same page size the
+            # (full) first page was returned with
+            articles = cls.iter_headline_articles(
+                os.environ['NEWS_API_KEY'],
+                query=query,
+                page_size=len(json_data["articles"]),
+                first_page=json_data)
+            write_stat = c.FileStorage.write_articles_to_file(articles,
+                                                              headlines_dir,
+                                                              filename)
 
         # file-write was successful and 'headlines' folder contains the json
         if write_stat and os.listdir(headlines_dir):
@@ -224,22 +577,30 @@ class NetworkOperations:
                              source_id,
                              url_endpoint=None,
                              http_method=None,
-                             api_key=None):
+                             api_key=None,
+                             page_size=None):
         """Retrieves a news source's top-headlines via a remote API call.
 
+        Several sources can be requested at once by passing their ids as a
+        single comma-separated string, e.g. 'abc-news,bbc-news'.
+
         # Arguments:
-            :param source_id: the id of the news source.
+            :param source_id: the id of the news source, or a comma-separated
+                list of ids.
             :type source_id: str
             :param url_endpoint: the news api source url address. If not filled
                 in the default News API sources endpoint is used.
             :type url_endpoint: str
             :param http_method: the Python function to use for making the
-                remote call. If not filled in the default Python Request
-                Library's get() method is used.
+                remote call. If not filled in, the request is made over the
+                shared keep-alive session via http_get().
             :type http_method: function
             :param api_key: the News API Key for using the News API service.
                 The key is required to use the API and cannot be left blank.
             :type api_key: str
+            :param page_size: number of articles to request per page. If not
+                filled in the News API default (20) applies.
+            :type page_size: int
 
         # Raises:
             ValueError: if no news source id argument is passed in.
@@ -256,13 +617,15 @@ class NetworkOperations:
             raise ValueError("No News API Key found")
 
         if not http_method:
-            http_method = requests.get
+            http_method = cls.http_get
 
         if not url_endpoint:
-            url_endpoint = "https://newsapi.org/v2/top-headlines?"
+            url_endpoint = TOP_HEADLINES_ENDPOINT
 
         # craft the http request
         params = "sources=" + source_id
+        if page_size:
+            params = "&".join([params, "pageSize=" + str(page_size)])
         key = "apiKey=" + api_key
         header = "".join([url_endpoint, params])
         full_request = "&".join([header, key])
@@ -270,3 +633,127 @@ class NetworkOperations:
         response = http_method(full_request)
 
         return response
+
+    @classmethod
+    def has_more_pages(cls, page_json):
+        """Returns True if a top-headlines json page holds fewer articles
+        than the total number of results the News API reported for it.
+
+        # Arguments:
+            :param page_json: a page of top-headlines json data.
+            :type page_json: dict
+        """
+
+        if not isinstance(page_json, dict):
+            return False
+
+        articles = page_json.get("articles") or []
+        total_results = page_json.get("totalResults") or 0
+
+        return bool(articles) and total_results > len(articles)
+
+    @classmethod
+    def iter_headline_articles(cls,
+                               api_key,
+                               sources=None,
+                               query=None,
+                               page_size=None,
+                               max_pages=None,
+                               first_page=None,
+                               url_endpoint=None,
+                               http_method=None):
+        """Yields top-headlines articles one at a time, page after page.
+
+        Walks the 'page'/'pageSize' parameters of the top-headlines endpoint
+        until 'totalResults' articles have been yielded, a page comes back
+        empty or `max_pages` pages have been read. Only one page of articles
+        is held in memory at a time.
+
+        If a page request fails, paging stops there (and the failure is
+        logged) so whatever was already collected can still be used.
+
+        # Arguments:
+            :param api_key: the News API Key for using the News API service.
+            :type api_key: str
+            :param sources: id of the news source, or comma-separated ids of
+                news sources, whose headlines to page through.
+            :type sources: str
+            :param query: keyword whose headlines to page through. Used when
+                no sources are given.
+            :type query: str
+            :param page_size: number of articles per page. Defaults to
+                HEADLINE_PAGE_SIZE.
+            :type page_size: int
+            :param max_pages: maximum number of pages to read. Defaults to
+                HEADLINE_MAX_PAGES.
+            :type max_pages: int
+            :param first_page: the already retrieved json of the first page,
+                which is then not requested again.
+            :type first_page: dict
+            :param url_endpoint: the news api top-headlines url address. If
+                not filled in the default News API endpoint is used.
+            :type url_endpoint: str
+            :param http_method: the Python function to use for making the
+                remote call. If not filled in, the request is made over the
+                shared keep-alive session via http_get().
+            :type http_method: function
+
+        # Raises:
+            ValueError: if no News API Key argument is passed in.
+            ValueError: if neither sources nor a query are passed in.
+        """
+
+        log.info("Running iter_headline_articles method")
+
+        if not api_key:
+            raise ValueError("No News API Key found")
+
+        if not sources and not query:
+            raise ValueError("Either 'sources' or 'query' must be given")
+
+        if not page_size:
+            page_size = HEADLINE_PAGE_SIZE
+
+        if not max_pages:
+            max_pages = HEADLINE_MAX_PAGES
+
+        if not url_endpoint:
+            url_endpoint = TOP_HEADLINES_ENDPOINT
+
+        if not http_method:
+            http_method = cls.http_get
+
+        if sources:
+            params = "sources=" + sources
+        else:
+            params = "q=" + query
+
+        articles_yielded = 0
+        for page in range(1, max_pages + 1):
+            if page == 1 and first_page is not None:
+                page_json = first_page
+            else:
+                # craft the http request of this page
+                paging = "pageSize={}&page={}".format(page_size, page)
+                key = "apiKey=" + api_key
+                full_request = url_endpoint + "&".join([params, paging, key])
+
+                response = http_method(full_request)
+                if response.status_code != requests.codes.ok:
+                    log.info("Stopped paging {} at page {}: status code {}"
+                             .format(params, page, response.status_code))
+                    return
+                page_json = response.json()
+
+            articles = page_json.get("articles") or []
+            for article in articles:
+                yield article
+
+            # stop once every reported result has been seen
+            articles_yielded += len(articles)
+            total_results = page_json.get("totalResults") or 0
+            if not articles or articles_yielded >= total_results:
+                return
+
+        log.info("Stopped paging {} after the maximum of {} pages".format(
+            params, max_pages))
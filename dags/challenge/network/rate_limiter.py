@@ -0,0 +1,187 @@
+"""Tempus challenge  - Operations and Functions: Request Throttling
+
+Describes the code definitions of the rate limiter and the adaptive
+concurrency controller shared by the remote calls made to the News API
+in the DAG pipelines, keeping them just under the API's rate limits.
+"""
+
+import logging
+import os
+import threading
+import time
+
+# ensures that function outputs and any errors encountered
+# are logged to the Airflow console
+log = logging.getLogger(__name__)
+
+# sustained number of requests per second allowed to the News API, and the
+# size of the burst allowed on top of it after a quiet period.
+RATE_LIMIT = float(os.environ.get('NEWS_API_RATE_LIMIT', 5))
+RATE_BURST = int(os.environ.get('NEWS_API_RATE_BURST', 10))
+
+# response time, in seconds, under which the News API is considered healthy
+# enough for the number of concurrent requests to keep growing.
+TARGET_LATENCY = float(os.environ.get('NEWS_API_TARGET_LATENCY', 2.0))
+
+
+class TokenBucket:
+    """Thread-safe token bucket rate limiter.
+
+    Tokens are added at `rate` per second up to `capacity`; every request
+    takes one, waiting for it if the bucket is empty. When the server asks
+    callers to slow down (e.g. with a Retry-After header), pause() empties
+    the bucket and holds every caller back for the given time.
+
+    # Arguments:
+        :param rate: tokens added per second. Defaults to RATE_LIMIT.
+        :type rate: float
+        :param capacity: maximum number of tokens the bucket holds, i.e. the
+            largest burst of requests allowed. Defaults to RATE_BURST.
+        :type capacity: int
+        :param clock: function returning the current time in seconds.
+        :type clock: function
+        :param sleep: function used to wait for a number of seconds.
+        :type sleep: function
+    """
+
+    def __init__(self, rate=None, capacity=None, clock=None, sleep=None):
+        self.rate = rate or RATE_LIMIT
+        self.capacity = capacity or RATE_BURST
+        self.clock = clock or time.monotonic
+        self.sleep = sleep or time.sleep
+
+        self.tokens = float(self.capacity)
+        self.updated_at = self.clock()
+        self.blocked_until = 0.0
+        self.lock = threading.Lock()
+
+    def refill(self, now):
+        """Adds the tokens accumulated since the last update."""
+
+        elapsed = max(0.0, now - self.updated_at)
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+        self.updated_at = now
+
+    def acquire(self):
+        """Takes a token, waiting until one is available."""
+
+        while True:
+            with self.lock:
+                now = self.clock()
+                self.refill(now)
+
+                if now < self.blocked_until:
+                    wait = self.blocked_until - now
+                elif self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                else:
+                    wait = (1 - self.tokens) / self.rate
+
+            self.sleep(wait)
+
+    def pause(self, seconds):
+        """Holds back every caller for the given number of seconds."""
+
+        with self.lock:
+            now = self.clock()
+            self.refill(now)
+            self.tokens = 0.0
+            self.blocked_until = max(self.blocked_until, now + seconds)
+
+        log.info("Requests paused for {:.1f} seconds".format(seconds))
+
+
+class AIMDController:
+    """Adaptive concurrency limit using additive-increase/multiplicative-
+    decrease (AIMD), as TCP congestion control does.
+
+    Callers acquire() a slot before a request and release() it afterwards,
+    so no more than `limit` requests are in flight at once. Each request's
+    outcome is fed back through record(): healthy responses (successful and
+    faster than the latency target) grow the limit by about `increase` per
+    round of requests, while an error, throttling response or slow response
+    cuts it by the `decrease` factor - at most once per latency target
+    period, so one burst of failures counts as a single signal.
+
+    # Arguments:
+        :param initial: the starting concurrency limit.
+        :type initial: int
+        :param minimum: the lowest the limit can be cut to.
+        :type minimum: int
+        :param maximum: the highest the limit can grow to.
+        :type maximum: int
+        :param increase: the amount the limit grows by per round of healthy
+            requests.
+        :type increase: float
+        :param decrease: the factor the limit is multiplied by on an
+            unhealthy request.
+        :type decrease: float
+        :param latency_target: response time in seconds above which a
+            request counts as unhealthy. Defaults to TARGET_LATENCY.
+        :type latency_target: float
+        :param clock: function returning the current time in seconds.
+        :type clock: function
+    """
+
+    def __init__(self,
+                 initial=2,
+                 minimum=1,
+                 maximum=8,
+                 increase=1.0,
+                 decrease=0.5,
+                 latency_target=None,
+                 clock=None):
+        self.minimum = minimum
+        self.maximum = max(minimum, maximum)
+        self.limit = float(min(max(initial, minimum), self.maximum))
+        self.increase = increase
+        self.decrease = decrease
+        self.latency_target = latency_target or TARGET_LATENCY
+        self.clock = clock or time.monotonic
+
+        self.in_flight = 0
+        self.last_decrease = None
+        self.condition = threading.Condition()
+
+    def acquire(self):
+        """Waits until a request can be sent within the current limit."""
+
+        with self.condition:
+            while self.in_flight >= int(self.limit):
+                self.condition.wait()
+            self.in_flight += 1
+
+    def release(self):
+        """Frees the slot of a completed request."""
+
+        with self.condition:
+            self.in_flight -= 1
+            self.condition.notify_all()
+
+    def record(self, latency, success):
+        """Adjusts the limit to the outcome of a request.
+
+        # Arguments:
+            :param latency: time the request took, in seconds.
+            :type latency: float
+            :param success: whether the request succeeded without being
+                throttled.
+            :type success: bool
+        """
+
+        with self.condition:
+            if success and latency <= self.latency_target:
+                self.limit = min(self.maximum,
+                                 self.limit + self.increase / self.limit)
+            else:
+                now = self.clock()
+                if self.last_decrease is None or \
+                        now - self.last_decrease >= self.latency_target:
+                    self.limit = max(self.minimum,
+                                     self.limit * self.decrease)
+                    self.last_decrease = now
+                    log.info("Concurrency limit cut to {:.1f}".format(
+                        self.limit))
+
+            self.condition.notify_all()
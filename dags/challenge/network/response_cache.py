@@ -0,0 +1,304 @@
+"""Tempus challenge  - Operations and Functions: HTTP Response Cache
+
+Describes the code definitions of a persistent, on-disk cache of News API
+responses, used by the remote calls made in the DAG pipelines so repeated
+runs and Airflow task retries do not download the same data again.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+import requests
+
+from requests.structures import CaseInsensitiveDict
+from urllib.parse import parse_qsl
+from urllib.parse import urlencode
+from urllib.parse import urlsplit
+from urllib.parse import urlunsplit
+
+from .streamed_body import StreamedBody
+
+# ensures that function outputs and any errors encountered
+# are logged to the Airflow console
+log = logging.getLogger(__name__)
+
+# store the current directory of the airflow home folder
+# airflow creates a home environment variable pointing to the location
+HOME_DIRECTORY = str(os.environ['HOME'])
+
+# seconds a cached response is served without asking the News API again.
+# Setting it to 0 turns the cache off.
+CACHE_TTL = float(os.environ.get('NEWS_API_CACHE_TTL', 1800))
+
+# upper bound, in bytes, on the size of the cache on disk. The least recently
+# used responses are evicted first once it is exceeded.
+CACHE_MAX_BYTES = int(os.environ.get('NEWS_API_CACHE_MAX_BYTES',
+                                     256 * 1024 * 1024))
+
+# the cache lives outside the per-pipeline datastore folders, which are
+# wiped at the start of every pipeline run.
+CACHE_DIRECTORY = os.path.join(HOME_DIRECTORY, 'tempdata', 'http_cache')
+
+
+class ResponseCache:
+    """Persistent cache of News API responses on the local filesystem.
+
+    Responses are keyed by their normalized request url - with the News API
+    key stripped and the query parameters sorted - so the same request
+    made with a different key or parameter order is still a cache hit.
+
+    Each entry is stored as two files: the raw response body and a small
+    json file of metadata (status, validators, storage time). A fresh entry
+    is served as-is; a stale one carries its ETag/Last-Modified validators
+    so the request can be revalidated with a conditional request instead
+    of downloading the body again. When the cache grows past its size
+    bound, the least recently used entries are evicted.
+
+    # Arguments:
+        :param cache_dir: directory in which the cached responses are
+            stored. Defaults to CACHE_DIRECTORY.
+        :type cache_dir: str
+        :param ttl: seconds a cached response is considered fresh.
+            Defaults to CACHE_TTL.
+        :type ttl: float
+        :param max_bytes: maximum total size of the cache on disk.
+            Defaults to CACHE_MAX_BYTES.
+        :type max_bytes: int
+    """
+
+    # response headers kept alongside a cached body
+    stored_headers = ['Content-Type', 'ETag', 'Last-Modified']
+
+    def __init__(self, cache_dir=None, ttl=None, max_bytes=None):
+        self.cache_dir = cache_dir or CACHE_DIRECTORY
+        self.ttl = CACHE_TTL if ttl is None else ttl
+        self.max_bytes = max_bytes or CACHE_MAX_BYTES
+
+        # serializes evictions between the threads sharing this cache
+        self.lock = threading.Lock()
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    @classmethod
+    def normalize_url(cls, url):
+        """Returns the url with its News API key removed and its query
+        parameters sorted.
+
+        # Arguments:
+            :param url: the full url of a request.
+            :type url: str
+        """
+
+        parts = urlsplit(url)
+        params = [(name, value) for name, value in parse_qsl(parts.query)
+                  if name.lower() != 'apikey']
+
+        return urlunsplit((parts.scheme.lower(),
+                           parts.netloc.lower(),
+                           parts.path,
+                           urlencode(sorted(params)),
+                           ''))
+
+    def key(self, url):
+        """Returns the cache key of a request url."""
+        return hashlib.sha256(self.normalize_url(url).encode()).hexdigest()
+
+    def paths(self, url):
+        """Returns the paths of the body and metadata files of a url."""
+        base = os.path.join(self.cache_dir, self.key(url))
+        return base + ".body", base + ".json"
+
+    def get(self, url):
+        """Returns the cached entry of a url, or None if there is none.
+
+        The entry is a dict of the stored metadata with the response body
+        under 'content'. Reading an entry marks it as recently used.
+
+        # Arguments:
+            :param url: the full url of a request.
+            :type url: str
+        """
+
+        body_path, meta_path = self.paths(url)
+
+        try:
+            with open(meta_path, "r") as meta_file:
+                entry = json.load(meta_file)
+            with open(body_path, "rb") as body_file:
+                entry['content'] = body_file.read()
+        except (IOError, ValueError):
+            # missing, half-evicted or corrupt entries are cache misses
+            return None
+
+        # bump the entry's last use, which eviction orders by
+        os.utime(meta_path, None)
+
+        return entry
+
+    def is_fresh(self, entry):
+        """Returns True if an entry is younger than the cache's ttl."""
+        return time.time() - entry['stored_at'] < self.ttl
+
+    def conditional_headers(self, entry):
+        """Returns the headers revalidating an entry with the server.
+
+        Empty if the server sent no validators for the entry.
+        """
+
+        headers = {}
+        validators = entry.get('headers', {})
+
+        if validators.get('ETag'):
+            headers['If-None-Match'] = validators['ETag']
+        if validators.get('Last-Modified'):
+            headers['If-Modified-Since'] = validators['Last-Modified']
+
+        return headers
+
+    def put(self, url, response):
+        """Stores a successful response in the cache.
+
+        The body of a streamed response not read yet is copied into the
+        cache as the caller reads it, chunk by chunk, and the entry is only
+        stored once the whole body came in - a body read partly is dropped.
+
+        Returns True if the response was stored, or is stored as it is
+        read, False if it was not cacheable (not an OK response, or not
+        carrying a byte body).
+
+        # Arguments:
+            :param url: the full url of the request.
+            :type url: str
+            :param response: the response of the request.
+            :type response: requests.Response
+        """
+
+        if response.status_code != requests.codes.ok:
+            return False
+
+        streamed = StreamedBody.is_unread(response)
+        content = None if streamed else getattr(response, 'content', None)
+        if not streamed and not isinstance(content, bytes):
+            return False
+
+        headers = {name: response.headers[name]
+                   for name in self.stored_headers
+                   if name in response.headers}
+        entry = {'url': self.normalize_url(url),
+                 'status_code': response.status_code,
+                 'encoding': response.encoding,
+                 'headers': headers,
+                 'stored_at': time.time()}
+
+        body_path, meta_path = self.paths(url)
+
+        if not streamed:
+            self.write_atomically(body_path, content)
+            self.write_atomically(meta_path, json.dumps(entry).encode())
+            self.evict()
+            return True
+
+        temp_path = "{}.{}.tmp".format(body_path, threading.get_ident())
+        body_file = open(temp_path, "wb")
+
+        def store(complete):
+            body_file.close()
+            if not complete:
+                os.remove(temp_path)
+                return
+
+            os.replace(temp_path, body_path)
+            self.write_atomically(meta_path, json.dumps(entry).encode())
+            self.evict()
+
+        return StreamedBody.wrap(response,
+                                 on_chunk=body_file.write,
+                                 on_close=store)
+
+    def refresh(self, url, entry):
+        """Restarts the ttl of an entry the server confirmed as unchanged.
+
+        # Arguments:
+            :param url: the full url of the request.
+            :type url: str
+            :param entry: the cached entry, as returned by get().
+            :type entry: dict
+        """
+
+        meta = {name: value for name, value in entry.items()
+                if name != 'content'}
+        meta['stored_at'] = time.time()
+
+        _, meta_path = self.paths(url)
+        self.write_atomically(meta_path, json.dumps(meta).encode())
+
+    def to_response(self, entry, url):
+        """Rebuilds a requests.Response object out of a cached entry."""
+
+        response = requests.Response()
+        response.status_code = entry['status_code']
+        response.reason = 'OK'
+        response.url = url
+        response.encoding = entry.get('encoding')
+        response.headers = CaseInsensitiveDict(entry.get('headers', {}))
+        response._content = entry['content']
+        response._content_consumed = True
+
+        return response
+
+    def stored_files(self):
+        """Yields the name, size and last modification time of each file
+        stored in the cache. Temporary files still being written are left
+        out, as are files removed meanwhile by another thread or process."""
+
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".tmp"):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.cache_dir, name))
+            except FileNotFoundError:
+                continue
+            yield name, stat.st_size, stat.st_mtime
+
+    def size(self):
+        """Returns the total size in bytes of the cache on disk."""
+        return sum(size for _, size, _ in self.stored_files())
+
+    def evict(self):
+        """Removes least recently used entries till the cache fits within
+        its size bound."""
+
+        with self.lock:
+            entries = []
+            total_size = 0
+            for name, size, modified in self.stored_files():
+                total_size += size
+                if name.endswith(".json"):
+                    entries.append((modified, name[:-5]))
+
+            # oldest last use first
+            for _, key in sorted(entries):
+                if total_size <= self.max_bytes:
+                    break
+                for extension in (".body", ".json"):
+                    path = os.path.join(self.cache_dir, key + extension)
+                    # another process may have evicted it already
+                    try:
+                        size = os.path.getsize(path)
+                        os.remove(path)
+                    except FileNotFoundError:
+                        continue
+                    total_size -= size
+                log.info("Evicted cached response {}".format(key))
+
+    def write_atomically(self, path, data):
+        """Writes bytes to a file such that readers never see it partially
+        written."""
+
+        temp_path = "{}.{}.tmp".format(path, threading.get_ident())
+        with open(temp_path, "wb") as output_file:
+            output_file.write(data)
+        os.replace(temp_path, path)
@@ -0,0 +1,131 @@
+"""Tempus challenge  - Operations and Functions: Streamed Response Bodies
+
+Describes the code definitions used to follow the body of a News API
+response sent with stream=True as it is read, in the DAG pipelines.
+"""
+
+import logging
+
+# ensures that function outputs and any errors encountered
+# are logged to the Airflow console
+log = logging.getLogger(__name__)
+
+
+class StreamedBody:
+    """Raw body of a streamed http response, passing each chunk read on to
+    callbacks.
+
+    Replaces the `raw` attribute of a requests.Response sent with
+    stream=True, so whatever reads the response - iter_content(), json() or
+    content - hands every chunk of the body to `on_chunk` as it arrives.
+    `on_close` is called once, with whether the whole body was read, when
+    the body has been read through, reading it failed or the response was
+    closed. Bodies can be wrapped several times, the innermost callbacks
+    being called first.
+
+    # Arguments:
+        :param raw: the raw body of the response, an urllib3 response.
+        :type raw: object
+        :param on_chunk: function called with each chunk of the body.
+        :type on_chunk: function
+        :param on_close: function called with True once the whole body was
+            read, or False if the reading stopped short of it.
+        :type on_close: function
+    """
+
+    def __init__(self, raw, on_chunk=None, on_close=None):
+        self.raw = raw
+        self.on_chunk = on_chunk
+        self.on_close = on_close
+        self.finished = False
+
+    @classmethod
+    def is_unread(cls, response) -> bool:
+        """Returns True if a response was sent with stream=True and its body
+        has not been read yet.
+
+        # Arguments:
+            :param response: http response object.
+            :type response: requests.Response
+        """
+
+        # requests keeps the body as False until it is read
+        return getattr(response, 'raw', None) is not None and \
+            getattr(response, '_content', None) is False
+
+    @classmethod
+    def wrap(cls, response, on_chunk=None, on_close=None) -> bool:
+        """Wraps the unread body of a response. Returns True if it was
+        wrapped, False if the body was already read, in which case no
+        callback is ever called.
+
+        # Arguments:
+            :param response: http response object.
+            :type response: requests.Response
+            :param on_chunk: function called with each chunk of the body.
+            :type on_chunk: function
+            :param on_close: function called with whether the whole body was
+                read, once it stops being read.
+            :type on_close: function
+        """
+
+        if not cls.is_unread(response):
+            return False
+
+        response.raw = cls(response.raw, on_chunk, on_close)
+
+        return True
+
+    def stream(self, amt=2 ** 16, decode_content=None):
+        """Yields the body in chunks of up to `amt` bytes, as
+        urllib3's HTTPResponse.stream() does."""
+
+        complete = False
+        try:
+            for chunk in self.raw.stream(amt, decode_content=decode_content):
+                if self.on_chunk:
+                    self.on_chunk(chunk)
+                yield chunk
+            complete = True
+        finally:
+            self.finish(complete)
+
+    def read(self, amt=None, decode_content=None, **kwargs):
+        """Reads up to `amt` bytes of the body, or all of it, as urllib3's
+        HTTPResponse.read() does."""
+
+        try:
+            chunk = self.raw.read(amt, decode_content=decode_content,
+                                  **kwargs)
+        except Exception:
+            self.finish(False)
+            raise
+
+        if chunk and self.on_chunk:
+            self.on_chunk(chunk)
+        if amt is None or not chunk:
+            self.finish(True)
+
+        return chunk
+
+    def close(self):
+        """Closes the body, without reading the rest of it."""
+
+        try:
+            self.raw.close()
+        finally:
+            self.finish(False)
+
+    def finish(self, complete):
+        """Calls `on_close` the first time the body stops being read."""
+
+        if self.finished:
+            return
+        self.finished = True
+
+        if self.on_close:
+            self.on_close(complete)
+
+    def __getattr__(self, name):
+        # everything else, e.g. release_conn(), is the raw body's
+        return getattr(self.raw, name)
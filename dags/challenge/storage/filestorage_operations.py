@@ -13,6 +13,8 @@ import shutil
 import time
 
 from airflow.models import Variable
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import as_completed
 
 import challenge as c
 
@@ -28,6 +30,9 @@ HOME_DIRECTORY = str(os.environ['HOME'])
 class FileStorage:
     """Handles functionality for news data storage on the local filesystem."""
 
+    # number of bytes of a http response body written to file at a time
+    RESPONSE_CHUNK_SIZE = 64 * 1024
+
     @classmethod
     def dummy_function(cls, dummy_arg=None):
         """Function that does absolutely nothing.
@@ -219,6 +224,86 @@ class FileStorage:
         except IOError:
             raise IOError("Error in Reading Data - IOError")
 
+    @classmethod
+    def write_response_to_file(cls,
+                               response,
+                               path_to_dir,
+                               filename=None,
+                               create_date=None,
+                               chunk_size=None):
+        """Writes the raw json body of a http response to a directory.
+
+        Unlike write_json_to_file, the response is never decoded and then
+        re-encoded: its body is copied to file in chunks, exactly as the
+        News API sent it (decompressed, as requests asks for gzip-encoded
+        bodies by default). A response streamed by
+        NetworkOperations.http_get() is written as it arrives, without
+        being held in memory. The file is written under a temporary '.part'
+        name and only moved into place once it is complete and known to be
+        valid json, so a truncated body or an error page served with a 200
+        never takes the place of the data. Files are prefixed with the
+        current date, the same way write_json_to_file names them.
+
+        Returns the validated json data.
+
+        # Arguments:
+            :param response: http response object whose body is written.
+            :type response: requests.Response
+            :param path_to_dir: folder path where the json file will be
+                stored in.
+            :type path_to_dir: str
+            :param filename: the name of the created json file.
+            :type filename: str
+            :param create_date: date the file was created.
+            :type create_date: str
+            :param chunk_size: number of bytes copied to file at a time.
+            :type chunk_size: int
+
+        # Raises:
+            OSError: if the directory path given does not exist.
+            ValueError: if the response body is not valid json.
+            IOError: if it fails to write the response body as a file to the
+                given directory.
+        """
+
+        log.info("Running write_response_to_file method")
+
+        if not os.path.isdir(path_to_dir):
+            raise OSError("Directory {} does not exist".format(path_to_dir))
+        if not create_date:
+            create_date = time.strftime("%Y-%m-%d")
+        if not filename:
+            filename = "sample"
+        if not chunk_size:
+            chunk_size = cls.RESPONSE_CHUNK_SIZE
+
+        # create the filename and its extension, append date
+        fname = str(create_date) + "_" + str(filename) + ".json"
+        fpath = os.path.join(path_to_dir, fname)
+        partial_path = fpath + ".part"
+
+        try:
+            with open(partial_path, 'wb') as outputfile:
+                for chunk in response.iter_content(chunk_size=chunk_size):
+                    outputfile.write(chunk)
+
+            # json validation - the single parse of the written data
+            with open(partial_path, 'r', encoding='utf-8') as inputfile:
+                json_data = json.load(inputfile)
+        except ValueError:
+            os.remove(partial_path)
+            raise ValueError("Error Decoding - Data is not Valid JSON")
+        except IOError:
+            # a body left partly read is not read any further
+            response.close()
+            if os.path.exists(partial_path):
+                os.remove(partial_path)
+            raise IOError("Error in Writing Data - IOError")
+
+        os.replace(partial_path, fpath)
+
+        return json_data
+
     @classmethod
     def json_to_dataframe_reader(cls, json_file, reader_func=None):
         """Reads in a news json file and returns a structure suitable
@@ -250,7 +335,7 @@ class FileStorage:
             reader_func = json.load
 
         try:
-            with open(json_file, "r") as inputfile:
+            with open(json_file, "r", encoding="utf-8") as inputfile:
                 reader_data = reader_func(inputfile)
 
         except IOError as err:
@@ -272,9 +357,27 @@ class FileStorage:
                                        source_names,
                                        headline_dir,
                                        api_key,
-                                       headline_func=None):
+                                       headline_func=None,
+                                       max_workers=None,
+                                       batch_size=None,
+                                       page_size=None,
+                                       max_pages=None):
         """Writes extracted news source headline json data to an existing directory.
 
+        By default the sources are fetched one after the other. Setting
+        `max_workers` above 1 fans the fetches out over a thread pool, with
+        at most that many requests in flight at any time; since the work is
+        almost entirely waiting on network I/O, threads are sufficient.
+        Each source is still fetched, checked and written independently, so
+        the resulting headline files are the same in both modes.
+
+        Setting `batch_size` above 1 packs that many source ids into each
+        top-headlines request (see write_batched_source_headlines), which
+        still results in one headline file per source.
+
+        Sources (or batches) with more articles than fit in one page are
+        paged through, and their articles streamed to file as they arrive.
+
         # Arguments:
             :param source_ids: list of news source id tags.
             :type source_ids: list
@@ -288,6 +391,16 @@ class FileStorage:
             :type api_key: str
             :param headline_func: function to use for extracting headlines.
             :type headline_func: function
+            :param max_workers: maximum number of source headlines fetched
+                concurrently. None or 1 fetches them sequentially.
+            :type max_workers: int
+            :param batch_size: maximum number of sources requested together
+                in one remote call. None or 1 requests each source on its own.
+            :type batch_size: int
+            :param page_size: number of articles requested per page.
+            :type page_size: int
+            :param max_pages: maximum number of pages read per request.
+            :type max_pages: int
 
         # Raises:
             ValueError: if any of the arguments are left blank.
@@ -311,25 +424,37 @@ class FileStorage:
         if not api_key:
             raise ValueError("Argument '{}' is blank".format(api_key))
 
+        # each unit of work is either a single source id or a batch of them
+        if batch_size and batch_size > 1:
+            units = [source_ids[index:index + batch_size]
+                     for index in range(0, len(source_ids), batch_size)]
+            unit_func = cls.write_batched_source_headlines
+        else:
+            units = source_ids
+            unit_func = cls.write_single_source_headlines
+
+        # arguments shared by every unit of work
+        unit_args = (headline_dir, api_key, headline_func, page_size,
+                     max_pages)
+
         # get the headlines of each source
-        for index, value in enumerate(source_ids):
-            headlines_obj = headline_func(value, api_key=api_key)
-            if headlines_obj.status_code == requests.codes.ok:
-                headline_json = headlines_obj.json()
-
-                # descriptive name of the headline file.
-                # use the source id rather than source name, since
-                # (after testing) it was discovered that strange formattings
-                # like 'Reddit /r/all' get read by the open() like a directory
-                # path rather than a filename, and hence requires another
-                # separate parsing all together.
-                # Is of the form  'source_id' + '_headlines'
-                fname = str(value) + "_headlines"
-
-                # write this json object to the headlines directory
-                cls.write_json_to_file(headline_json,
-                                       headline_dir,
-                                       fname)
+        if not max_workers or max_workers <= 1:
+            for value in units:
+                unit_func(value, *unit_args)
+        else:
+            log.info("Fetching headlines with {} workers".format(max_workers))
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                futures = [executor.submit(unit_func, value, *unit_args)
+                           for value in units]
+                try:
+                    for future in as_completed(futures):
+                        future.result()
+                except Exception:
+                    # mirror the sequential behaviour of stopping at the
+                    # first error: drop the fetches that have not started
+                    for future in futures:
+                        future.cancel()
+                    raise
 
         # return with a verification that these operations succeeded
         if os.listdir(headline_dir):
@@ -341,6 +466,229 @@ class FileStorage:
         else:
             return False
 
+    @classmethod
+    def write_single_source_headlines(cls,
+                                      source_id,
+                                      headline_dir,
+                                      api_key,
+                                      headline_func=None,
+                                      page_size=None,
+                                      max_pages=None):
+        """Fetches one news source's top-headlines and writes them as json.
+
+        Returns True if the headlines were retrieved and written, False if
+        the News API did not answer with an OK status for the source, in
+        which case no file is written for it.
+
+        # Arguments:
+            :param source_id: the id of the news source.
+            :type source_id: str
+            :param headline_dir: directory path in which the source-headlines
+                should be stored in.
+            :type headline_dir: str
+            :param api_key: string News API Key used for performing retrieval
+                of a source's top headlines remotely.
+            :type api_key: str
+            :param headline_func: function to use for extracting headlines.
+            :type headline_func: function
+            :param page_size: number of articles requested per page.
+            :type page_size: int
+            :param max_pages: maximum number of pages read for the source.
+            :type max_pages: int
+        """
+
+        if not headline_func:
+            headline_func = c.NetworkOperations.get_source_headlines
+        if not page_size:
+            page_size = c.NetworkOperations.MAX_PAGE_SIZE
+
+        headlines_obj = headline_func(source_id,
+                                      api_key=api_key,
+                                      page_size=page_size)
+        if headlines_obj.status_code != requests.codes.ok:
+            log.info("Skipping {}: status code {}".format(
+                source_id, headlines_obj.status_code))
+            return False
+
+        # descriptive name of the headline file.
+        # use the source id rather than source name, since
+        # (after testing) it was discovered that strange formattings
+        # like 'Reddit /r/all' get read by the open() like a directory
+        # path rather than a filename, and hence requires another
+        # separate parsing all together.
+        # Is of the form  'source_id' + '_headlines'
+        fname = str(source_id) + "_headlines"
+
+        # write the first page as it came; it is usually all there is
+        headline_json = cls.write_response_to_file(headlines_obj,
+                                                   headline_dir,
+                                                   fname)
+        if not c.NetworkOperations.has_more_pages(headline_json):
+            return True
+
+        # stream the first page and all the pages after it to the file
+        articles = c.NetworkOperations.iter_headline_articles(
+            api_key,
+            sources=source_id,
+            page_size=page_size,
+            max_pages=max_pages,
+            first_page=headline_json)
+
+        return cls.write_articles_to_file(articles, headline_dir, fname)
+
+    @classmethod
+    def write_batched_source_headlines(cls,
+                                       source_ids,
+                                       headline_dir,
+                                       api_key,
+                                       headline_func=None,
+                                       page_size=None,
+                                       max_pages=None):
+        """Fetches the top-headlines of several news sources in one request
+        and writes them as one json file per source.
+
+        The combined 'articles' array of the response is split back by each
+        article's source id, so every source ends up with the same
+        'source_id' + '_headlines' json file it would get when requested on
+        its own - including sources that currently have no articles.
+
+        A batch with more articles than fit in one page is paged through,
+        each article being streamed to its source's file as it arrives.
+        When the paging stops before every article of the batch was read -
+        at max_pages, or on a failed page - the batch's files are discarded
+        and its sources are fetched one at a time instead, so no source is
+        left with a partial or empty file.
+
+        Returns True if the batch was retrieved and written, False if the
+        News API did not answer with an OK status.
+
+        # Arguments:
+            :param source_ids: list of news source ids to request together.
+            :type source_ids: list
+            :param headline_dir: directory path in which the source-headlines
+                should be stored in.
+            :type headline_dir: str
+            :param api_key: string News API Key used for performing retrieval
+                of a source's top headlines remotely.
+            :type api_key: str
+            :param headline_func: function to use for extracting headlines.
+            :type headline_func: function
+            :param page_size: number of articles requested per page.
+            :type page_size: int
+            :param max_pages: maximum number of pages read for the batch.
+            :type max_pages: int
+        """
+
+        if not headline_func:
+            headline_func = c.NetworkOperations.get_source_headlines
+        if not page_size:
+            page_size = c.NetworkOperations.MAX_PAGE_SIZE
+
+        batch = ",".join(source_ids)
+
+        headlines_obj = headline_func(batch,
+                                      api_key=api_key,
+                                      page_size=page_size)
+        if headlines_obj.status_code != requests.codes.ok:
+            log.info("Skipping {}: status code {}".format(
+                source_ids, headlines_obj.status_code))
+            return False
+
+        headline_json = headlines_obj.json()
+        articles = c.NetworkOperations.iter_headline_articles(
+            api_key,
+            sources=batch,
+            page_size=page_size,
+            max_pages=max_pages,
+            first_page=headline_json)
+
+        # one open file per source of the batch, each article is routed to
+        # the file of the source that published it.
+        # Each is of the form  'source_id' + '_headlines'
+        writers = {}
+        received = 0
+        try:
+            for source_id in source_ids:
+                writers[source_id] = ArticleStreamWriter(
+                    headline_dir, str(source_id) + "_headlines")
+
+            for article in articles:
+                received += 1
+                source_id = (article.get("source") or {}).get("id")
+                if source_id in writers:
+                    writers[source_id].write(article)
+                else:
+                    log.info("Article from unrequested source {}".format(
+                        source_id))
+        except Exception:
+            for writer in writers.values():
+                writer.discard()
+            raise
+
+        if received < (headline_json.get("totalResults") or 0):
+            for writer in writers.values():
+                writer.discard()
+
+            log.info("Batch {} truncated, fetching sources one at a "
+                     "time".format(source_ids))
+            stats = [cls.write_single_source_headlines(source_id,
+                                                       headline_dir,
+                                                       api_key,
+                                                       headline_func,
+                                                       page_size,
+                                                       max_pages)
+                     for source_id in source_ids]
+            return all(stats)
+
+        for writer in writers.values():
+            writer.close()
+
+        return True
+
+    @classmethod
+    def write_articles_to_file(cls,
+                               articles,
+                               path_to_dir,
+                               filename=None,
+                               create_date=None):
+        """Streams news articles into a headlines json file as they arrive.
+
+        The articles can come from any iterable, e.g. a generator paging
+        through the News API, and are written one at a time so only a single
+        article needs to be held in memory. The file has the same layout as
+        a top-headlines response, with 'totalResults' set to the number of
+        articles actually written.
+
+        # Arguments:
+            :param articles: iterable of news article json objects.
+            :type articles: iterable
+            :param path_to_dir: folder path where the json file will be
+                stored in.
+            :type path_to_dir: str
+            :param filename: the name of the created json file.
+            :type filename: str
+            :param create_date: date the file was created.
+            :type create_date: str
+
+        # Raises:
+            OSError: if the directory path given does not exist.
+            ValueError: if an article is not valid json data.
+        """
+
+        log.info("Running write_articles_to_file method")
+
+        writer = ArticleStreamWriter(path_to_dir, filename, create_date)
+        try:
+            for article in articles:
+                writer.write(article)
+        except Exception:
+            writer.discard()
+            raise
+        writer.close()
+
+        # the file-write was successful so return a True status
+        return True
+
     @classmethod
     def get_news_directory(cls, pipeline_name: str):
         """Returns the news directory path for a given DAG pipeline.
@@ -457,3 +805,75 @@ class FileStorage:
             raise ValueError("No directory path for given pipeline name")
 
         return csv_store[pipeline_name]
+
+
+class ArticleStreamWriter:
+    """Incrementally writes news articles to a headlines json file.
+
+    The json is written to a temporary '.part' file next to its final path,
+    one article at a time, and only moved into place on close() - so
+    downstream tasks never see a half-written headlines file. The final file
+    is named the same way write_json_to_file() names its files.
+
+    # Arguments:
+        :param path_to_dir: folder path where the json file will be
+            stored in.
+        :type path_to_dir: str
+        :param filename: the name of the created json file.
+        :type filename: str
+        :param create_date: date the file was created.
+        :type create_date: str
+
+    # Raises:
+        OSError: if the directory path given does not exist.
+    """
+
+    def __init__(self, path_to_dir, filename=None, create_date=None):
+        if not os.path.isdir(path_to_dir):
+            raise OSError("Directory {} does not exist".format(path_to_dir))
+        if not create_date:
+            create_date = time.strftime("%Y-%m-%d")
+        if not filename:
+            filename = "sample"
+
+        # create the filename and its extension, append date
+        fname = str(create_date) + "_" + str(filename) + ".json"
+        self.path = os.path.join(path_to_dir, fname)
+        self.partial_path = self.path + ".part"
+
+        # number of articles written so far
+        self.count = 0
+
+        self.output_file = open(self.partial_path, 'w')
+        self.output_file.write('{"status": "ok", "articles": [')
+
+    def write(self, article):
+        """Appends a single article to the file.
+
+        # Raises:
+            ValueError: if the article is not valid json data.
+        """
+
+        try:
+            data = json.dumps(article)
+        except (TypeError, ValueError):
+            raise ValueError("Error Decoding - Data is not Valid JSON")
+
+        if self.count:
+            self.output_file.write(", ")
+        self.output_file.write(data)
+        self.count += 1
+
+    def close(self):
+        """Completes the json document and moves it to its final path."""
+
+        self.output_file.write('], "totalResults": {}}}'.format(self.count))
+        self.output_file.close()
+        os.replace(self.partial_path, self.path)
+
+    def discard(self):
+        """Abandons the file, removing what was written of it so far."""
+
+        self.output_file.close()
+        if os.path.exists(self.partial_path):
+            os.remove(self.partial_path)
@@ -1,2 +1,9 @@
-"""directory imports for the TransformOperations class."""
+"""directory imports for the TransformOperations, OutputSinks,
+TransformCache and SpillStore classes."""
 from .transform_operations import *
+
+from .output_sinks import *
+
+from .transform_cache import *
+
+from .spill_store import *
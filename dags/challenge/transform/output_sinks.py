@@ -0,0 +1,248 @@
+"""Tempus challenge  - Operations and Functions: Output Sinks
+
+Describes the code definitions of the file formats the transformed news
+headlines are written out in, in the DAG pipelines.
+"""
+
+import gzip
+import io
+import logging
+import os
+
+from .transform_operations import CSV_DATE_FORMAT
+
+# pyarrow is optional, it is only needed by the Parquet output sink
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+# zstandard is optional, it is only needed by zstd-compressed csv files
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# ensures that function outputs and any errors encountered
+# are logged to the Airflow console
+log = logging.getLogger(__name__)
+
+# file formats the transformed headlines are written out in, any of the
+# formats of OUTPUT_SINKS. Each pipeline writes the comma-separated formats
+# of its '<PIPELINE>_OUTPUT_FORMATS' environment variable if set, e.g.
+# TEMPUS_CHALLENGE_DAG_OUTPUT_FORMATS=csv,parquet, or else these
+DEFAULT_OUTPUT_FORMATS = os.environ.get('TRANSFORM_OUTPUT_FORMATS', 'csv')
+
+# compression of the csv files, and its level - the codec's own default
+# (gzip 9, zstd 3) when not set. A compressed csv file takes the suffix of
+# its codec after '.csv'.
+CSV_COMPRESSIONS = ['none', 'gzip', 'zstd']
+CSV_COMPRESSION = os.environ.get('TRANSFORM_CSV_COMPRESSION', 'none')
+CSV_COMPRESSION_LEVEL = os.environ.get('TRANSFORM_CSV_COMPRESSION_LEVEL')
+CSV_COMPRESSION_SUFFIXES = {'none': '', 'gzip': '.gz', 'zstd': '.zst'}
+
+# compression of the Parquet files, and the most rows in each of their row
+# groups. Every row group carries min/max statistics of its columns, so
+# readers can skip row groups that a filter rules out.
+PARQUET_COMPRESSIONS = ['snappy', 'zstd', 'gzip', 'none']
+PARQUET_COMPRESSION = os.environ.get('TRANSFORM_PARQUET_COMPRESSION',
+                                     'snappy')
+PARQUET_ROW_GROUP_ROWS = int(os.environ.get('TRANSFORM_PARQUET_ROW_GROUP_ROWS',
+                                            100000))
+
+# columns of repeating values that are dictionary-encoded in Parquet files
+PARQUET_DICTIONARY_COLUMNS = ['news_source_id', 'news_source_name']
+
+
+class CsvSink:
+    """Writes a headline DataFrame out as a csv file, with its index column
+    and the publication dates in the format of the News API, optionally
+    gzip or zstd compressed.
+
+    # Arguments:
+        :param compression: compression codec, one of CSV_COMPRESSIONS.
+            Defaults to CSV_COMPRESSION.
+        :type compression: str
+        :param level: compression level. Defaults to CSV_COMPRESSION_LEVEL.
+        :type level: int
+
+    # Raises:
+        ValueError: if the compression is not one of CSV_COMPRESSIONS.
+        ImportError: if zstd is selected and zstandard is not installed.
+    """
+
+    def __init__(self, compression=None, level=None):
+        self.compression = compression or CSV_COMPRESSION
+        if level is None and CSV_COMPRESSION_LEVEL:
+            level = int(CSV_COMPRESSION_LEVEL)
+        self.level = level
+
+        if self.compression not in CSV_COMPRESSIONS:
+            raise ValueError("{} not valid csv compression".format(
+                self.compression))
+
+        if self.compression == 'zstd' and zstandard is None:
+            raise ImportError("zstd csv output needs zstandard installed")
+
+    @property
+    def extension(self) -> str:
+        """Returns the extension of the csv files, with the suffix of their
+        compression."""
+        return '.csv' + CSV_COMPRESSION_SUFFIXES[self.compression]
+
+    def open(self, path):
+        """Opens the csv file at path for writing text, compressing what is
+        written to it."""
+
+        if self.compression == 'gzip':
+            options = {} if self.level is None \
+                else {'compresslevel': self.level}
+            return gzip.open(path, 'wt', encoding='utf-8', newline='',
+                             **options)
+
+        if self.compression == 'zstd':
+            options = {} if self.level is None else {'level': self.level}
+            compressor = zstandard.ZstdCompressor(**options)
+            return io.TextIOWrapper(
+                compressor.stream_writer(open(path, 'wb')),
+                encoding='utf-8', newline='')
+
+        return open(path, 'w', encoding='utf-8', newline='')
+
+    def write(self, frame, path):
+        """Writes the DataFrame to the csv file at path."""
+
+        if self.compression == 'none':
+            frame.to_csv(path, date_format=CSV_DATE_FORMAT)
+            return
+
+        with self.open(path) as output:
+            frame.to_csv(output, date_format=CSV_DATE_FORMAT)
+
+
+class ParquetSink:
+    """Writes a headline DataFrame out as a Parquet file, with pyarrow.
+
+    The source columns are dictionary-encoded, every row group carries the
+    statistics of its columns, and the index is left out, as it is only
+    the position of the article in its json file.
+
+    # Arguments:
+        :param compression: compression codec, one of PARQUET_COMPRESSIONS.
+            Defaults to PARQUET_COMPRESSION.
+        :type compression: str
+        :param row_group_rows: most rows in a row group. Defaults to
+            PARQUET_ROW_GROUP_ROWS.
+        :type row_group_rows: int
+
+    # Raises:
+        ImportError: if pyarrow is not installed.
+        ValueError: if the compression is not one of PARQUET_COMPRESSIONS.
+    """
+
+    extension = '.parquet'
+
+    def __init__(self, compression=None, row_group_rows=None):
+        if pyarrow is None:
+            raise ImportError("parquet output needs pyarrow installed")
+
+        self.compression = compression or PARQUET_COMPRESSION
+        self.row_group_rows = row_group_rows or PARQUET_ROW_GROUP_ROWS
+
+        if self.compression not in PARQUET_COMPRESSIONS:
+            raise ValueError("{} not valid parquet compression".format(
+                self.compression))
+
+    def write(self, frame, path):
+        """Writes the DataFrame to the Parquet file at path."""
+
+        table = pyarrow.Table.from_pandas(frame, preserve_index=False)
+        dictionary_columns = [column for column in PARQUET_DICTIONARY_COLUMNS
+                              if column in frame.columns]
+
+        pyarrow.parquet.write_table(
+            table,
+            path,
+            compression=None if self.compression == 'none'
+            else self.compression,
+            use_dictionary=dictionary_columns,
+            write_statistics=True,
+            row_group_size=self.row_group_rows)
+
+
+class OutputSinks:
+    """Handles the output formats of the transformed news headlines.
+
+    Sinks are looked up by format name in OUTPUT_SINKS, so another output
+    format is added by registering a class there, whose instances have an
+    'extension' attribute and a write(frame, path) method.
+    """
+
+    @classmethod
+    def pipeline_formats(cls, pipeline_name) -> list:
+        """Returns the output formats of a pipeline.
+
+        # Arguments:
+            :param pipeline_name: name of the DAG pipeline.
+            :type pipeline_name: str
+
+        # Raises:
+            ValueError: if no format, or a format not in OUTPUT_SINKS, is
+                configured.
+        """
+
+        setting = os.environ.get(pipeline_name.upper() + '_OUTPUT_FORMATS',
+                                 DEFAULT_OUTPUT_FORMATS)
+        formats = [name.strip().lower() for name in setting.split(',')
+                   if name.strip()]
+
+        if not formats:
+            raise ValueError("{} has no output format".format(pipeline_name))
+
+        for name in formats:
+            if name not in OUTPUT_SINKS:
+                raise ValueError("{} not valid output format".format(name))
+
+        return formats
+
+    @classmethod
+    def write_headlines(cls, frame, csv_save_path, formats) -> list:
+        """Writes a headline DataFrame out in each of the given formats,
+        and returns the paths of the files written.
+
+        Each file takes the path of the csv file, with the extension of its
+        format.
+
+        # Arguments:
+            :param frame: the headline DataFrame.
+            :type frame: DataFrame
+            :param csv_save_path: path of the csv file of the headlines.
+            :type csv_save_path: str
+            :param formats: names of the output formats.
+            :type formats: list
+
+        # Raises:
+            ValueError: if a format is not in OUTPUT_SINKS.
+        """
+
+        log.info("Running write_headlines method")
+
+        base_path = os.path.splitext(csv_save_path)[0]
+
+        paths = []
+        for name in formats:
+            if name not in OUTPUT_SINKS:
+                raise ValueError("{} not valid output format".format(name))
+
+            sink = OUTPUT_SINKS[name]()
+            path = base_path + sink.extension
+            sink.write(frame, path)
+            paths.append(path)
+
+        return paths
+
+
+# the sink class of each output format
+OUTPUT_SINKS = {'csv': CsvSink,
+                'parquet': ParquetSink}
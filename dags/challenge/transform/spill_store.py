@@ -0,0 +1,131 @@
+"""Tempus challenge  - Operations and Functions: Spill Store
+
+Describes the code definitions of the temporary columnar files that partial
+headline DataFrames are spilled to, when the transform task of the DAG
+pipelines runs over its memory budget.
+"""
+
+import logging
+import os
+import shutil
+import tempfile
+
+import pandas as pd
+
+# pyarrow is optional, it is only needed once a memory budget is exceeded
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+# ensures that function outputs and any errors encountered
+# are logged to the Airflow console
+log = logging.getLogger(__name__)
+
+# directory the spill files are created in. Defaults to the temporary
+# directory of the Airflow worker.
+SPILL_DIRECTORY = os.environ.get('TRANSFORM_SPILL_DIR')
+
+
+class SpillStore:
+    """Temporary Parquet files of partial headline DataFrames.
+
+    Each spill writes the DataFrames accumulated so far to a Parquet file,
+    index included, so they can be dropped from memory. The spills are
+    merged back at the end through Arrow, whose compact column buffers are
+    concatenated without copying, so only the final DataFrame is built in
+    pandas - not the partial DataFrames as well.
+
+    The spill files live in a directory of their own, removed by cleanup().
+
+    The pinned pyarrow (see requirements-optional.txt) merges the spills as
+    described. Older releases, lacking some of the Arrow functions used,
+    fall back to converting each spill to pandas and merging them there.
+
+    # Arguments:
+        :param spill_dir: directory the spill files are created in. Defaults
+            to SPILL_DIRECTORY.
+        :type spill_dir: str
+
+    # Raises:
+        ImportError: if pyarrow is not installed.
+    """
+
+    def __init__(self, spill_dir=None):
+        if pyarrow is None:
+            raise ImportError("spilling to disk needs pyarrow installed")
+
+        if not spill_dir:
+            spill_dir = SPILL_DIRECTORY
+
+        self.directory = tempfile.mkdtemp(prefix="transform_spill_",
+                                          dir=spill_dir)
+
+        # paths of the spill files, in the order they were written
+        self.paths = []
+
+    @classmethod
+    def available(cls) -> bool:
+        """Returns True if pyarrow is installed, so DataFrames can be
+        spilled."""
+        return pyarrow is not None
+
+    def spill(self, frames):
+        """Writes DataFrames out as one spill file.
+
+        # Arguments:
+            :param frames: the DataFrames, merged in the order given.
+            :type frames: list
+        """
+
+        frame = pd.concat(frames)
+        path = os.path.join(self.directory,
+                            "spill_{}.parquet".format(len(self.paths)))
+
+        pyarrow.parquet.write_table(
+            pyarrow.Table.from_pandas(frame, preserve_index=True), path)
+        self.paths.append(path)
+
+        log.info("{} headlines spilled to {}".format(len(frame), path))
+
+    def merge(self, frames=None) -> pd.DataFrame:
+        """Returns the spilled DataFrames merged into one, followed by any
+        DataFrames not spilled.
+
+        # Arguments:
+            :param frames: DataFrames still in memory, merged after the
+                spilled ones.
+            :type frames: list
+        """
+
+        tables = [pyarrow.parquet.read_table(path) for path in self.paths]
+        if frames:
+            tables.append(pyarrow.Table.from_pandas(pd.concat(frames),
+                                                    preserve_index=True))
+
+        # a column holding only missing values in one spill is typed as
+        # null, and takes the type the other spills give it
+        try:
+            schema = pyarrow.unify_schemas([table.schema
+                                            for table in tables])
+            table = pyarrow.concat_tables([table.cast(schema)
+                                           for table in tables])
+        except (AttributeError, pyarrow.ArrowException) as err:
+            log.info("pyarrow {} cannot merge the spills ({}), merging them "
+                     "in pandas".format(pyarrow.__version__, err))
+            return pd.concat([table.to_pandas() for table in tables])
+        del tables
+
+        # each column's Arrow buffers are released once it is converted,
+        # so the headlines are not held twice over
+        try:
+            return table.to_pandas(split_blocks=True, self_destruct=True)
+        except TypeError:
+            # older pyarrow has neither option
+            return table.to_pandas()
+
+    def cleanup(self):
+        """Removes the spill files."""
+        shutil.rmtree(self.directory, ignore_errors=True)
+        self.paths = []
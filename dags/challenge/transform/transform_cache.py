@@ -0,0 +1,195 @@
+"""Tempus challenge  - Operations and Functions: Transform Cache
+
+Describes the code definitions of a persistent cache of flattened headline
+files, used by the transform task of the DAG pipelines so that headline
+files identical to those of an earlier run are not flattened again.
+"""
+
+import hashlib
+import json
+import logging
+import os
+
+import pandas as pd
+
+import challenge as c
+
+# ensures that function outputs and any errors encountered
+# are logged to the Airflow console
+log = logging.getLogger(__name__)
+
+# whether the transform task caches the flattened headline files. Setting it
+# to 'off' turns the cache off.
+TRANSFORM_CACHE = os.environ.get('TRANSFORM_CACHE', 'on')
+
+# version of the flattened partial DataFrames. It is part of every content
+# hash, so changing how headline files are flattened (and bumping it)
+# leaves every earlier partial behind as a cache miss.
+PARTIAL_VERSION = "1"
+
+# bytes of a headline file hashed at a time
+HASH_CHUNK_BYTES = 1024 * 1024
+
+
+class TransformCache:
+    """Persistent cache of flattened headline files of a pipeline.
+
+    Each headline file is keyed by a hash of its content, so a file whose
+    news source returned the same payload as in an earlier run is a cache
+    hit whatever its name or date. Its flattened DataFrame - the partial -
+    is stored as a pickle named after the hash.
+
+    A manifest of the content hash of every headline file of the last run
+    is kept next to the partials. It tells which files changed from one
+    run to the next, and partials no longer in it are removed once a run
+    is done, so the cache does not grow past one run's worth of partials.
+
+    The cache lives in a 'transform_cache' folder of the pipeline's
+    'tempdata' directory, which is not one of the datastore folders that
+    are wiped at the start of every pipeline run.
+
+    # Arguments:
+        :param pipeline_name: name of the DAG pipeline.
+        :type pipeline_name: str
+        :param cache_dir: directory in which the partials and manifest are
+            stored. Defaults to the pipeline's 'transform_cache' folder.
+        :type cache_dir: str
+    """
+
+    manifest_name = "manifest.json"
+    partial_extension = ".pkl"
+
+    def __init__(self, pipeline_name, cache_dir=None):
+        if not cache_dir:
+            pipeline_dir = os.path.dirname(
+                c.FileStorage.get_csv_directory(pipeline_name))
+            cache_dir = os.path.join(pipeline_dir, 'transform_cache')
+
+        self.pipeline = pipeline_name
+        self.cache_dir = cache_dir
+
+        # content hashes of the headline files seen in this run, by name
+        self.digests = {}
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    @classmethod
+    def enabled(cls) -> bool:
+        """Returns True unless the cache is turned off by TRANSFORM_CACHE."""
+        return TRANSFORM_CACHE.lower() != 'off'
+
+    @classmethod
+    def file_hash(cls, json_file) -> str:
+        """Returns the content hash of a headline file.
+
+        # Arguments:
+            :param json_file: path to the headline file.
+            :type json_file: str
+        """
+
+        digest = hashlib.sha256(PARTIAL_VERSION.encode())
+
+        with open(json_file, "rb") as input_file:
+            for chunk in iter(lambda: input_file.read(HASH_CHUNK_BYTES), b""):
+                digest.update(chunk)
+
+        return digest.hexdigest()
+
+    def partial_path(self, digest) -> str:
+        """Returns the path of the partial of a content hash."""
+        return os.path.join(self.cache_dir, digest + self.partial_extension)
+
+    def get(self, json_file):
+        """Returns the content hash of a headline file, and its cached
+        partial - None if there is none. The hash is remembered for the
+        manifest.
+
+        # Arguments:
+            :param json_file: path to the headline file.
+            :type json_file: str
+        """
+
+        digest = self.file_hash(json_file)
+        self.digests[os.path.basename(json_file)] = digest
+
+        try:
+            frame = pd.read_pickle(self.partial_path(digest))
+        except Exception:
+            # missing or corrupt partials are cache misses
+            return digest, None
+
+        return digest, frame
+
+    def put(self, digest, frame):
+        """Stores the partial of a content hash.
+
+        # Arguments:
+            :param digest: content hash of the headline file.
+            :type digest: str
+            :param frame: the flattened DataFrame of the headline file.
+            :type frame: DataFrame
+        """
+
+        path = self.partial_path(digest)
+        partial_path = path + ".part"
+
+        # the partial only takes its name once fully written, so concurrent
+        # workers and interrupted runs never read half a partial
+        pd.to_pickle(frame, partial_path)
+        os.replace(partial_path, path)
+
+    def load_manifest(self) -> dict:
+        """Returns the manifest of the last run, empty if there is none."""
+
+        try:
+            with open(os.path.join(self.cache_dir, self.manifest_name)) \
+                    as manifest_file:
+                return json.load(manifest_file)
+        except (IOError, ValueError):
+            return {}
+
+    def save_manifest(self, json_files) -> dict:
+        """Records the content hashes of a run's headline files as the new
+        manifest, removes the partials of files no longer in it, and returns
+        a report of the files that changed since the last run.
+
+        # Arguments:
+            :param json_files: paths to the run's headline files.
+            :type json_files: list
+        """
+
+        log.info("Running save_manifest method")
+
+        previous = self.load_manifest()
+
+        manifest = {}
+        for json_file in json_files:
+            name = os.path.basename(json_file)
+            if name not in self.digests:
+                # e.g. files read by worker processes, or not read at all
+                self.digests[name] = self.file_hash(json_file)
+            manifest[name] = self.digests[name]
+
+        path = os.path.join(self.cache_dir, self.manifest_name)
+        with open(path + ".part", "w") as manifest_file:
+            json.dump(manifest, manifest_file, indent=4, sort_keys=True)
+        os.replace(path + ".part", path)
+
+        # only the partials of this run's files are kept
+        kept = {digest + self.partial_extension
+                for digest in manifest.values()}
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(self.partial_extension) and name not in kept:
+                os.remove(os.path.join(self.cache_dir, name))
+
+        previous_digests = set(previous.values())
+        changed = [name for name, digest in sorted(manifest.items())
+                   if digest not in previous_digests]
+
+        report = {'files': len(manifest),
+                  'changed': len(changed),
+                  'unchanged': len(manifest) - len(changed)}
+        log.info("{} of {} headline files changed since the last run".format(
+            report['changed'], report['files']))
+
+        return report
@@ -4,15 +4,26 @@ Describes the code definitions used in the Airflow task of transforming
 JSON news data in the DAG pipelines.
 """
 
+import csv
 import datetime
-import gc
+import heapq
 import logging
 import os
+import tempfile
 
 import pandas as pd
 
+from concurrent.futures import ProcessPoolExecutor
+
 import challenge as c
 
+# pyarrow is optional, it backs the text columns of the headline DataFrames
+# with Arrow string arrays when the 'pyarrow' string dtype is selected
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
 # ensures that function outputs and any errors encountered
 # are logged to the Airflow console
 log = logging.getLogger(__name__)
@@ -21,9 +32,88 @@ log = logging.getLogger(__name__)
 # airflow creates a home environment variable pointing to the location
 HOME_DIRECTORY = str(os.environ['HOME'])
 
-# final DataFrame that will be result from the entire merge of
-# transformed json new files
-merged_df = pd.DataFrame()
+# how the transformed headline json files are merged into one DataFrame:
+# - 'sequential' merges each file into the DataFrame merged so far
+# - 'concat' collects every file's DataFrame and merges them once
+# - 'tree' transforms chunks of files in a pool of worker processes and
+#   merges the partial DataFrames pairwise, across the workers
+MERGE_STRATEGIES = ['sequential', 'concat', 'tree']
+MERGE_STRATEGY = os.environ.get('TRANSFORM_MERGE_STRATEGY', 'concat')
+
+# number of worker processes of the 'tree' merge strategy. Defaults to the
+# number of cores of the Airflow worker.
+MERGE_WORKERS = int(os.environ.get('TRANSFORM_MERGE_WORKERS',
+                                   os.cpu_count() or 1))
+
+# number of worker processes the keyword headline files of the bonus
+# pipeline are flattened in, each file to its own csv file. The default of
+# one flattens them one after another in the task's own process.
+KEYWORD_WORKERS = int(os.environ.get('TRANSFORM_KEYWORD_WORKERS', 1))
+
+# memory budget, in megabytes, of the headline DataFrames the merger holds
+# before merging them. Once their approximate size exceeds it, they are
+# spilled to temporary Parquet files, see SpillStore. 0 sets no budget.
+MEMORY_BUDGET_MB = int(os.environ.get('TRANSFORM_MEMORY_BUDGET_MB', 0))
+
+# how headline json files are flattened into csv files:
+# - 'dataframe' builds a DataFrame of all the articles and writes it out
+# - 'stream' writes the articles out row by row, one json file at a time, so
+#   memory use is bounded by the largest file rather than the total input
+# - 'sorted' writes the articles out ordered by publication date, with an
+#   external sort of bounded memory use, see sorted_headlines_to_csv()
+TRANSFORM_MODES = ['dataframe', 'stream', 'sorted']
+TRANSFORM_MODE = os.environ.get('TRANSFORM_MODE', 'dataframe')
+
+# number of csv rows the 'stream' mode buffers before writing them out
+CSV_FLUSH_ROWS = int(os.environ.get('TRANSFORM_FLUSH_ROWS', 1000))
+
+# the 'sorted' mode holds at most SORT_RUN_ROWS articles in memory when
+# sorting them into a run, and merges at most SORT_FAN_IN runs at a time
+SORT_RUN_ROWS = int(os.environ.get('TRANSFORM_SORT_RUN_ROWS', 10000))
+SORT_FAN_IN = int(os.environ.get('TRANSFORM_SORT_FAN_IN', 64))
+
+# sort key of the articles in the 'sorted' mode - their publication date in
+# UTC, with microseconds so that the keys sort as text. Articles without a
+# valid publication date take a key that sorts after all dates.
+SORT_KEY_FORMAT = '%Y-%m-%dT%H:%M:%S.%f'
+UNDATED_SORT_KEY = '~'
+
+# columns of the flattened news headlines csv files
+CSV_FIELD_NAMES = ['news_source_id',
+                   'news_source_name',
+                   'news_author',
+                   'news_title',
+                   'news_description',
+                   'news_url',
+                   'news_image_url',
+                   'news_publication_date',
+                   'news_content']
+
+# dtypes the headline DataFrames are given in place of all-object columns.
+# The news sources repeat across the articles, so each is stored once as a
+# category, and the publication dates are parsed into UTC timestamps - when
+# they are all written back to csv as given, see apply_headline_schema().
+HEADLINE_DTYPES = {'news_source_id': 'category',
+                   'news_source_name': 'category',
+                   'news_publication_date': 'datetime64[ns, UTC]'}
+
+# how the remaining text columns of the headline DataFrames are stored:
+# - 'default' keeps the strings pandas constructs the columns with
+# - 'pyarrow' stores them in Arrow string arrays, needs pyarrow and pandas
+#   1.3 or newer installed, and falls back to 'default' otherwise
+STRING_DTYPES = ['default', 'pyarrow']
+STRING_DTYPE = os.environ.get('TRANSFORM_STRING_DTYPE', 'default')
+
+# dtype of the Arrow string arrays, None where they are not available.
+# pandas before 1.0 has no StringDtype, and before 1.3 no Arrow storage.
+try:
+    ARROW_STRING_DTYPE = pd.StringDtype('pyarrow') if pyarrow else None
+except (AttributeError, ImportError, TypeError):
+    ARROW_STRING_DTYPE = None
+
+# format the publication timestamps are written to the csv files in, the
+# one the News API gives them in
+CSV_DATE_FORMAT = '%Y-%m-%dT%H:%M:%SZ'
 
 
 class TransformOperations:
@@ -128,7 +218,9 @@ class TransformOperations:
     def helper_execute_keyword_json_transformation(cls,
                                                    directory,
                                                    timestamp=None,
-                                                   json_transfm_func=None):
+                                                   json_transfm_func=None,
+                                                   mode=None,
+                                                   max_workers=None):
         """Helper function which transforms news keyword json-headlines to csv.
 
         # Arguments:
@@ -138,10 +230,31 @@ class TransformOperations:
             :param timestamp: date of the pipeline execution that
                 should be appended to created csv files.
             :type timestamp: datetime object
+            :param mode: how the jsons are flattened, one of TRANSFORM_MODES.
+                Defaults to TRANSFORM_MODE.
+            :type mode: str
+            :param max_workers: number of worker processes the files are
+                flattened in. Defaults to KEYWORD_WORKERS.
+            :type max_workers: int
+
+        # Raises:
+            ValueError: if the transform mode is not one of TRANSFORM_MODES.
+            ValueError: if the 'stream' or 'sorted' mode is selected for a
+                pipeline with output formats other than csv.
         """
 
         log.info("Running helper_execute_keyword_json_transformation method")
 
+        if not mode:
+            mode = TRANSFORM_MODE
+        if mode not in TRANSFORM_MODES:
+            raise ValueError("{} not valid transform mode".format(mode))
+        if mode != 'dataframe':
+            cls.stream_mode_check("tempus_bonus_challenge_dag", mode)
+
+        if not max_workers:
+            max_workers = KEYWORD_WORKERS
+
         # function responsible for reading json files
         reader = c.FileStorage.json_to_dataframe_reader
 
@@ -176,12 +289,54 @@ class TransformOperations:
         # check existence of json files before beginning transformation
         if not files:
             raise FileNotFoundError("Directory has no json-headline files")
+
+        # keyword files unchanged since an earlier run are not flattened
+        # again, see TransformCache
+        cache = None
+        if mode == 'dataframe' and c.TransformCache.enabled():
+            cache = c.TransformCache("tempus_bonus_challenge_dag")
+
+        # every keyword file is flattened to its own csv file, independent
+        # of the others, so each is a separate job
+        jobs = []
+        for index, path in enumerate(filepath):
+            key = files[index].split("_")[1]
+            fname = str(timestamp) + "_" + key + "_top_headlines.csv"
+            if mode == 'stream':
+                jobs.append((cls.stream_headlines_to_csv,
+                             ([path], fname, "tempus_bonus_challenge_dag",
+                              reader),
+                             {}))
+            elif mode == 'sorted':
+                jobs.append((cls.sorted_headlines_to_csv,
+                             ([path], fname, "tempus_bonus_challenge_dag",
+                              reader),
+                             {}))
+            else:
+                jobs.append((json_transfm_func,
+                             (path, fname, reader),
+                             {'cache': cache}))
+
+        workers = min(max_workers, len(jobs))
+        if workers > 1:
+            # the jobs run in a pool of worker processes, so the
+            # transformation function must be picklable. The statuses are
+            # collected in the order of the files, and an error of any job
+            # is raised here as it would be when run one after another.
+            log.info("flattening {} keyword files in {} workers".format(
+                len(jobs), workers))
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = [executor.submit(func, *args, **kwargs)
+                           for func, args, kwargs in jobs]
+                results = [future.result() for future in futures]
         else:
-            for index, path in enumerate(filepath):
-                key = files[index].split("_")[1]
-                fname = str(timestamp) + "_" + key + "_top_headlines.csv"
-                stat, msg = json_transfm_func(path, fname, reader)
-                per_file_status.append(stat)
+            results = [func(*args, **kwargs) for func, args, kwargs in jobs]
+
+        for stat, msg in results:
+            per_file_status.append(stat)
+
+        if cache:
+            cache.save_manifest(filepath)
 
         # verify that ALL the files successfully were converted to csv
         if all(per_file_status):
@@ -198,7 +353,8 @@ class TransformOperations:
                                            timestamp=None,
                                            json_to_csv_func=None,
                                            jsons_to_df_func=None,
-                                           df_to_csv_func=None):
+                                           df_to_csv_func=None,
+                                           mode=None):
         """Helper function which transforms news json-headlines to csv.
 
 
@@ -248,6 +404,18 @@ class TransformOperations:
         than O(n logn). But, more efficient merge-method will be needed when
         dealing with larger file sizes.
 
+        The merge is therefore selectable, see MERGE_STRATEGY and
+        transform_jsons_to_dataframe_merger(): 'sequential' (the merge
+        described above), 'concat' (one merge of all the transformed files,
+        the default) and 'tree' (a merge-sort-style pairwise reduction of
+        partial DataFrames across a pool of worker processes).
+
+        For inputs larger than the memory of the Airflow worker, the 'stream'
+        transform mode skips DataFrames altogether and writes the csv row by
+        row, one json file at a time - see stream_headlines_to_csv(). The
+        'sorted' mode does the same with the rows ordered by publication
+        date, through an external merge sort - see sorted_headlines_to_csv().
+
         # Arguments:
             :param directory: directory having the jsons to
                 execute a transformation on.
@@ -264,10 +432,25 @@ class TransformOperations:
             :type jsons_to_df_func: function
             :param df_to_csv_func: function that transforms a single DataFrame
                 into a csv file.
+            :param mode: how the jsons are flattened, one of TRANSFORM_MODES.
+                Defaults to TRANSFORM_MODE.
+            :type mode: str
+
+        # Raises:
+            ValueError: if the transform mode is not one of TRANSFORM_MODES.
+            ValueError: if the 'stream' or 'sorted' mode is selected for a
+                pipeline with output formats other than csv.
         """
 
         log.info("Running helper_execute_json_transformation method")
 
+        if not mode:
+            mode = TRANSFORM_MODE
+        if mode not in TRANSFORM_MODES:
+            raise ValueError("{} not valid transform mode".format(mode))
+        if mode != 'dataframe':
+            cls.stream_mode_check("tempus_challenge_dag", mode)
+
         # Function Aliases
         # use an alias since the length of the real function call when used
         # is more than PEP-8's 79 line-character limit.
@@ -301,8 +484,10 @@ class TransformOperations:
         if not os.listdir(directory):
             raise FileNotFoundError("Directory is empty")
 
+        # files are taken in name order, so the rows of the csv come out in
+        # the same order on every run and in every transform mode
         if os.listdir(directory):
-            for file in os.listdir(directory):
+            for file in sorted(os.listdir(directory)):
                 if file.endswith('.json'):
                     files.append(os.path.join(directory, file))
 
@@ -310,15 +495,38 @@ class TransformOperations:
         if not files:
             raise FileNotFoundError("Directory has no json-headline files")
 
-        if len(files) == 1:
+        # headline files unchanged since an earlier run are not flattened
+        # again, see TransformCache
+        cache = None
+        if mode == 'dataframe' and c.TransformCache.enabled():
+            cache = c.TransformCache("tempus_challenge_dag")
+
+        if mode == 'stream':
+            # write the articles of every json file straight into the csv
+            status, msg = cls.stream_headlines_to_csv(files,
+                                                      filename,
+                                                      "tempus_challenge_dag",
+                                                      reader)
+        elif mode == 'sorted':
+            # write the articles of every json file into the csv, ordered by
+            # publication date
+            status, msg = cls.sorted_headlines_to_csv(files,
+                                                      filename,
+                                                      "tempus_challenge_dag",
+                                                      reader)
+        elif len(files) == 1:
             # a single json file exists, perform direct transformation on it.
-            status, msg = json_to_csv_func(files[0], filename, reader)
+            status, msg = json_to_csv_func(files[0], filename, reader,
+                                           cache=cache)
         else:
             # transform the json files into DataFrames and merge them into one.
-            merged_dataframe = jsons_to_df_func(files, reader)
+            merged_dataframe = jsons_to_df_func(files, reader, cache=cache)
             # transform the merged DataFrame into a csv
             status = df_to_csv_func(merged_dataframe, filename)
 
+        if cache:
+            cache.save_manifest(files)
+
         return status
 
     @classmethod
@@ -326,10 +534,27 @@ class TransformOperations:
                                             json_files,
                                             read_js_func=None,
                                             extract_func=None,
-                                            transform_func=None):
+                                            transform_func=None,
+                                            strategy=None,
+                                            max_workers=None,
+                                            cache=None,
+                                            memory_budget=None):
         """transforms a set of json files into a DataFrames and merges all of
         them into one.
 
+        With the 'tree' strategy the given functions are sent to worker
+        processes, so they need to be picklable (e.g. module-level functions
+        or classmethods).
+
+        The approximate memory size of the DataFrames held for the merge is
+        tracked. When it exceeds the memory budget, they are spilled to a
+        temporary Parquet file and dropped, and the spills are merged back
+        through Arrow once every file is transformed - so a spike in the
+        number of articles degrades into disk writes rather than running the
+        Airflow worker out of memory. Only the merged DataFrame itself then
+        needs to fit in memory. Spilling needs pyarrow; without it the
+        budget is not applied, and every DataFrame is held in memory.
+
         # Arguments:
             :param json_files: a list of json files to be processed.
             :type json_files: list
@@ -342,10 +567,56 @@ class TransformOperations:
             :param read_js_fnc: the function used to read-in and process the
                 json file. By Default is the Pandas read_json() function.
             :type read_js_func: function
+            :param strategy: how the transformed files are merged, one of
+                MERGE_STRATEGIES. Defaults to MERGE_STRATEGY.
+            :type strategy: str
+            :param max_workers: number of worker processes of the 'tree'
+                strategy. Defaults to MERGE_WORKERS.
+            :type max_workers: int
+            :param cache: cache of flattened headline files, only used
+                unless other extract and transform functions are given.
+            :type cache: TransformCache
+            :param memory_budget: bytes of DataFrames held before they are
+                spilled to disk. Defaults to MEMORY_BUDGET_MB megabytes; no
+                budget if 0.
+            :type memory_budget: int
+
+        # Raises:
+            ValueError: if the merge strategy is not one of MERGE_STRATEGIES.
         """
 
         log.info("Running transform_jsons_to_dataframe_merger method")
 
+        if not strategy:
+            strategy = MERGE_STRATEGY
+        if not max_workers:
+            max_workers = MERGE_WORKERS
+        if not memory_budget:
+            memory_budget = MEMORY_BUDGET_MB * 1024 * 1024
+
+        if strategy not in MERGE_STRATEGIES:
+            raise ValueError("{} not valid merge strategy".format(strategy))
+
+        if memory_budget and not c.SpillStore.available():
+            log.info("pyarrow is not installed, the memory budget of {} "
+                     "bytes is not applied".format(memory_budget))
+            memory_budget = 0
+
+        # a pool of workers only pays off with more than one file per worker.
+        # The functions are handed over as given, for the workers to pick
+        # the same defaults as below.
+        if strategy == 'tree' and max_workers > 1 and len(json_files) > 1:
+            return cls.tree_merge_jsons_to_dataframe(json_files,
+                                                     read_js_func,
+                                                     extract_func,
+                                                     transform_func,
+                                                     max_workers,
+                                                     cache)
+
+        # unless other extract and transform functions are given, each json
+        # file is read straight into its article DataFrame
+        direct_read = not extract_func and not transform_func
+
         # Function Aliases
         # use an alias since the length of the real function call when used
         # is more than PEP-8's 79 line-character limit.
@@ -353,63 +624,545 @@ class TransformOperations:
             extract_func = c.ExtractOperations.extract_news_data_from_dataframe
         if not transform_func:
             transform_func = cls.transform_data_to_dataframe
+        if not read_js_func and direct_read:
+            read_js_func = c.FileStorage.json_to_dataframe_reader
         if not read_js_func:
             read_js_func = pd.read_json
 
-        # perform pairwise transformation of the json files into DataFrames
-        # and their subsequent merging into a single DataFrame.
-        current_file_df = None
-
-        # To perform continous pairwise merging of the dataframe-transformed
-        # json files in the directory, we need a way to keep track of what has
-        # been merged so far. There needs to be a way to maintain state.
-        # This (empty) DataFrame is created for that purpose and is made into
-        # a global Python object within this module/python file.
+        # the transformed DataFrames of the json files, merged into a single
+        # DataFrame in one go once every file is transformed. Merging inside
+        # the loop copies everything merged so far again for each file, which
+        # grows quadratically with the number of headline files.
         #
-        # Use of global variables might not be the ideal way to handle this, as
-        # they are generally discouraged in several development
-        # environs/instances due to the kinds of unpredictable bugs they
-        # potentially create - most especially in multithreaded environments)
-        #
-        # Hence, our use of the `global` keyword here for this operation is
-        # ONLY time it will ever be used in this project.
-        #
-        # An alternative, to consider, might be to make use of Airflow's
-        # Variable class to store the state of object.
-        #
-        # Another alternative, to consider, asides global variables is the use
-        # of Python (function) closures to achieve state maintenance.
-        global merged_df
+        # The frames, and the merged DataFrame built from them, are local to
+        # this call. No state is kept at module or class level between calls,
+        # so a long-lived worker process can run the transform any number of
+        # times, and the two pipelines (or several backfill dates) can run it
+        # concurrently in threads, without one run seeing another's rows.
+        frames = []
+
+        # approximate bytes held in frames, and the spills of the frames
+        # once they exceed the memory budget
+        frames_bytes = 0
+        spill_store = None
+
+        try:
+            for index, file in enumerate(json_files):
+                # perform json to DataFrame transformations by
+                # function-chaining
+                log.info(json_files[index])
+
+                # read in the json file resulting in an intermediary
+                # DataFrame.
+                try:
+                    if direct_read:
+                        current_file_df = cls.headlines_json_to_dataframe(
+                            json_files[index], read_js_func, typed=False,
+                            cache=cache)
+                    else:
+                        json_data = read_js_func(json_files[index])
+
+                except ValueError as err:
+                    # if any errors are encountered during reading then skip
+                    # the file to the next, but log it to the console.
+                    error_message = str(err)
+                    log.info("Error Encountered: {}".format(error_message))
+                    continue
+
+                if not direct_read:
+                    # extract news data from the json and transform it into a
+                    # DataFrame
+                    json_data = pd.DataFrame([json_data])
+                    current_file_df = transform_func(extract_func(json_data))
+
+                # a json file without articles adds nothing to the merger
+                if current_file_df.empty:
+                    continue
+
+                if strategy == 'sequential':
+                    # merge each file into the DataFrame merged so far
+                    frames = [pd.concat(frames + [current_file_df])]
+                else:
+                    frames.append(current_file_df)
+
+                if not memory_budget:
+                    continue
+
+                frames_bytes += int(
+                    current_file_df.memory_usage(deep=True).sum())
+                if frames_bytes > memory_budget:
+                    log.info("{} bytes of headlines over the memory budget "
+                             "of {} bytes".format(frames_bytes,
+                                                  memory_budget))
+                    if not spill_store:
+                        spill_store = c.SpillStore()
+                    spill_store.spill(frames)
+                    frames = []
+                    frames_bytes = 0
+
+            if spill_store:
+                # merge the spills and the frames held since the last spill
+                merged_df = spill_store.merge(frames)
+                frames = []
+        finally:
+            if spill_store:
+                spill_store.cleanup()
+
+        # no json file could be read and transformed
+        if not spill_store and not frames:
+            return pd.DataFrame()
+
+        # perform the merger with a single allocation of the final DataFrame.
+        # No garbage collection is forced: the per-file intermediaries are
+        # freed by reference counting as soon as they are dropped.
+        if not spill_store:
+            merged_df = pd.concat(frames)
+
+        # the categories of the news sources are only known once every file
+        # is merged, so the dtypes are applied to the merged DataFrame
+        typed_df = cls.apply_headline_schema(merged_df)
+        cls.headline_memory_report(merged_df, typed_df)
+
+        # return a merged DataFrame of all the jsons
+        return typed_df
+
+    @classmethod
+    def tree_merge_jsons_to_dataframe(cls,
+                                      json_files,
+                                      read_js_func,
+                                      extract_func,
+                                      transform_func,
+                                      max_workers,
+                                      cache=None):
+        """transforms a set of json files into DataFrames across a pool of
+        worker processes, and merges them into one by pairwise reduction.
+
+        The files are split into one contiguous chunk per worker. Each worker
+        reads, flattens and merges its chunk into a partial DataFrame, and
+        neighbouring partial DataFrames are then merged two at a time, across
+        the workers, until one remains - as in the merge step of a Merge Sort.
+        The final DataFrame keeps the order of the given files.
+
+        # Arguments:
+            :param json_files: a list of json files to be processed.
+            :type json_files: list
+            :param read_js_func: the function used to read-in and process the
+                json file.
+            :type read_js_func: function
+            :param extract_func: the function used to extract news data
+                from a dataframe.
+            :type extract_func: function
+            :param transform_func: the function used to transform news
+                data into a dataframe.
+            :type transform_func: function
+            :param max_workers: number of worker processes.
+            :type max_workers: int
+            :param cache: cache of flattened headline files, shared by the
+                workers.
+            :type cache: TransformCache
+        """
+
+        log.info("Running tree_merge_jsons_to_dataframe method")
+
+        workers = min(max_workers, len(json_files))
+        chunk_size = -(-len(json_files) // workers)
+        chunks = [json_files[start:start + chunk_size]
+                  for start in range(0, len(json_files), chunk_size)]
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            # each worker transforms and merges its own chunk of files
+            futures = [executor.submit(cls.transform_jsons_to_dataframe_merger,
+                                       chunk,
+                                       read_js_func,
+                                       extract_func,
+                                       transform_func,
+                                       'concat',
+                                       cache=cache)
+                       for chunk in chunks]
+
+            # chunks of only unreadable files leave nothing to merge
+            partials = [future.result() for future in futures]
+            partials = [frame for frame in partials if not frame.empty]
+
+            # pairwise reduction of neighbouring partial DataFrames
+            while len(partials) > 1:
+                pairs = [partials[index:index + 2]
+                         for index in range(0, len(partials), 2)]
+                partials = list(executor.map(pd.concat, pairs))
+
+        if not partials:
+            return pd.DataFrame()
+
+        # merging partial DataFrames with different news source categories
+        # falls back to object columns, which are typed again
+        return cls.apply_headline_schema(partials[0])
+
+    @classmethod
+    def stream_mode_check(cls, pipeline_name, mode='stream'):
+        """Checks that the 'stream' or 'sorted' transform mode can write
+        every output format of a pipeline. They write csv rows only, the
+        other formats are written from a DataFrame - as are headlines
+        checked against the DedupIndex or clustered by NearDuplicates.
+
+        # Arguments:
+            :param pipeline_name: name of the DAG pipeline.
+            :type pipeline_name: str
+            :param mode: the transform mode checked.
+            :type mode: str
+
+        # Raises:
+            ValueError: if the pipeline has an output format other than csv.
+            ValueError: if deduplication or near-duplicate clustering is
+                turned on.
+        """
+
+        formats = c.OutputSinks.pipeline_formats(pipeline_name)
+        if formats != ['csv']:
+            raise ValueError("{} mode only writes csv, not {}".format(
+                mode, ", ".join(formats)))
 
-        for index, file in enumerate(json_files):
-            # perform json to DataFrame transformations by function-chaining
-            log.info(json_files[index])
+        if c.DedupIndex.enabled() or c.NearDuplicates.enabled():
+            raise ValueError("{} mode does not deduplicate headlines".format(
+                mode))
+
+    @classmethod
+    def stream_headlines_to_csv(cls,
+                                json_files,
+                                csv_filename,
+                                pipeline_name,
+                                reader_func=None,
+                                extract_func=None,
+                                flush_rows=None):
+        """Flattens the articles of a set of news json files into one csv,
+        streaming them row by row.
+
+        Unlike the DataFrame transformations, no more than one json file's
+        articles are held in memory at a time, and the csv rows are written
+        out every flush_rows rows. The csv has the same columns, index column
+        and formatting as the csv written from the merged DataFrame; its
+        index restarts at 0 for each json file, as in the merged DataFrame.
+
+        The csv is written to a temporary '.part' file that is only renamed
+        to its final name once complete, so a failed run leaves no partial
+        csv behind to be uploaded. If the json files hold no articles at all,
+        no csv file is created, as with the DataFrame transformations.
+
+        # Arguments:
+            :param json_files: paths to the news json files.
+            :type json_files: list
+            :param csv_filename: the filename of the transformed csv.
+            :type csv_filename: str
+            :param pipeline_name: the pipeline whose 'csv' datastore the
+                csv is saved in.
+            :type pipeline_name: str
+            :param reader_func: the function used to read-in a json file.
+                Defaults to FileStorage.json_to_dataframe_reader.
+            :type reader_func: function
+            :param extract_func: the function used to extract the news data
+                of a single article. Defaults to
+                ExtractOperations.extract_article_values.
+            :type extract_func: function
+            :param flush_rows: number of rows buffered before they are
+                written out. Defaults to CSV_FLUSH_ROWS.
+            :type flush_rows: int
+        """
+
+        log.info("Running stream_headlines_to_csv method")
+
+        if not reader_func:
+            reader_func = c.FileStorage.json_to_dataframe_reader
+        if not extract_func:
+            extract_func = c.ExtractOperations.extract_article_values
+        if not flush_rows:
+            flush_rows = CSV_FLUSH_ROWS
+
+        # the csv file takes the extension of its compression, if any
+        sink = c.CsvSink()
+        csv_dir = c.FileStorage.get_csv_directory(pipeline_name)
+        csv_save_path = os.path.splitext(os.path.join(csv_dir,
+                                                      csv_filename))[0]
+        csv_save_path += sink.extension
+        part_path = csv_save_path + ".part"
+
+        rows_written = 0
+        rows = []
+
+        try:
+            with sink.open(part_path) as output:
+                # match the dialect pandas' to_csv() writes with
+                writer = csv.writer(output, lineterminator="\n")
+                writer.writerow([""] + CSV_FIELD_NAMES)
+
+                for json_file in json_files:
+                    try:
+                        news_data = reader_func(json_file)
+                    except ValueError as err:
+                        # skip a file that cannot be read, but log it.
+                        log.info("Error Encountered: {}".format(str(err)))
+                        continue
+
+                    articles = news_data.get('articles') or []
+                    for index, article in enumerate(articles):
+                        rows.append((index,) + extract_func(article))
+
+                        if len(rows) >= flush_rows:
+                            writer.writerows(rows)
+                            rows_written += len(rows)
+                            rows = []
+
+                    # release the file's articles before reading the next
+                    del news_data, articles
+
+                writer.writerows(rows)
+                rows_written += len(rows)
+        except BaseException:
+            if os.path.exists(part_path):
+                os.remove(part_path)
+            raise
+
+        if not rows_written:
+            os.remove(part_path)
+            log.info("No News articles found, csv not created")
+            return True, "No News articles found, csv not created"
+
+        os.replace(part_path, csv_save_path)
+        log.info("{} headlines streamed to {}".format(rows_written,
+                                                      csv_save_path))
+
+        return True, "csv file successfully created"
+
+    @classmethod
+    def sorted_headlines_to_csv(cls,
+                                json_files,
+                                csv_filename,
+                                pipeline_name,
+                                reader_func=None,
+                                extract_func=None,
+                                run_rows=None,
+                                fan_in=None):
+        """Flattens the articles of a set of news json files into one csv,
+        ordered by their publication date, with an external merge sort.
+
+        The articles of each json file are sorted by publication date in
+        runs of at most run_rows articles, and each run is spilled to a
+        temporary csv file. The runs are then k-way merged with a heap,
+        streaming the articles into the csv in date order. When there are
+        more than fan_in runs, groups of fan_in runs are first merged into
+        longer runs, so no more than fan_in run files are open at a time.
+
+        Apart from their order, the csv rows are those written by
+        stream_headlines_to_csv() - each keeps the index of its article in
+        its json file. Articles of the same publication date keep the order
+        of their json files, and those without a valid date come last.
+
+        # Arguments:
+            :param json_files: paths to the news json files.
+            :type json_files: list
+            :param csv_filename: the filename of the transformed csv.
+            :type csv_filename: str
+            :param pipeline_name: the pipeline whose 'csv' datastore the
+                csv is saved in.
+            :type pipeline_name: str
+            :param reader_func: the function used to read-in a json file.
+                Defaults to FileStorage.json_to_dataframe_reader.
+            :type reader_func: function
+            :param extract_func: the function used to extract the news data
+                of a single article. Defaults to
+                ExtractOperations.extract_article_values.
+            :type extract_func: function
+            :param run_rows: most articles sorted in memory at a time.
+                Defaults to SORT_RUN_ROWS.
+            :type run_rows: int
+            :param fan_in: most runs merged at a time. Defaults to
+                SORT_FAN_IN.
+            :type fan_in: int
+
+        # Raises:
+            ValueError: if fan_in is less than 2.
+        """
+
+        log.info("Running sorted_headlines_to_csv method")
+
+        if not reader_func:
+            reader_func = c.FileStorage.json_to_dataframe_reader
+        if not extract_func:
+            extract_func = c.ExtractOperations.extract_article_values
+        if not run_rows:
+            run_rows = SORT_RUN_ROWS
+        if not fan_in:
+            fan_in = SORT_FAN_IN
+        if fan_in < 2:
+            raise ValueError("{} not valid sort fan-in".format(fan_in))
+
+        # the csv file takes the extension of its compression, if any
+        sink = c.CsvSink()
+        csv_dir = c.FileStorage.get_csv_directory(pipeline_name)
+        csv_save_path = os.path.splitext(os.path.join(csv_dir,
+                                                      csv_filename))[0]
+        csv_save_path += sink.extension
+        part_path = csv_save_path + ".part"
+
+        rows_written = 0
+
+        # the runs are spilled next to, not into, the 'csv' datastore, whose
+        # files are all uploaded
+        with tempfile.TemporaryDirectory(
+                prefix="sort_runs_", dir=os.path.dirname(csv_dir)) as run_dir:
+            runs = []
+            for json_file in json_files:
+                try:
+                    news_data = reader_func(json_file)
+                except ValueError as err:
+                    # skip a file that cannot be read, but log it.
+                    log.info("Error Encountered: {}".format(str(err)))
+                    continue
+
+                articles = news_data.get('articles') or []
+                for start in range(0, len(articles), run_rows):
+                    rows = [(index,) + extract_func(article)
+                            for index, article in enumerate(
+                                articles[start:start + run_rows], start)]
+                    runs.append(cls.spill_sorted_run(rows, run_dir,
+                                                     len(runs)))
+
+                # release the file's articles before reading the next
+                del news_data, articles
+
+            # merge groups of runs into longer runs until one pass is left
+            merge_pass = 0
+            while len(runs) > fan_in:
+                merge_pass += 1
+                merged_runs = []
+                for start in range(0, len(runs), fan_in):
+                    path = os.path.join(run_dir, "merge_{}_{}.csv".format(
+                        merge_pass, len(merged_runs)))
+                    with open(path, 'w', encoding='utf-8',
+                              newline='') as output:
+                        writer = csv.writer(output, lineterminator="\n")
+                        writer.writerows(cls.merge_sorted_runs(
+                            runs[start:start + fan_in]))
+                    merged_runs.append(path)
+                for path in runs:
+                    os.remove(path)
+                runs = merged_runs
 
-            # read in the json file resulting in an intermediary DataFrame.
             try:
-                json_data = read_js_func(json_files[index])
+                with sink.open(part_path) as output:
+                    # match the dialect pandas' to_csv() writes with
+                    writer = csv.writer(output, lineterminator="\n")
+                    writer.writerow([""] + CSV_FIELD_NAMES)
+
+                    # the sort key is only needed by the merge
+                    for row in cls.merge_sorted_runs(runs):
+                        writer.writerow(row[1:])
+                        rows_written += 1
+            except BaseException:
+                if os.path.exists(part_path):
+                    os.remove(part_path)
+                raise
+
+        if not rows_written:
+            os.remove(part_path)
+            log.info("No News articles found, csv not created")
+            return True, "No News articles found, csv not created"
+
+        os.replace(part_path, csv_save_path)
+        log.info("{} headlines sorted into {}".format(rows_written,
+                                                      csv_save_path))
+
+        return True, "csv file successfully created"
 
-            except ValueError as err:
-                # if any errors are encountered during reading then skip the
-                # file to the next, but log it to the console.
-                error_message = str(err)
-                log.info("Error Encountered: {}".format(error_message))
+    @classmethod
+    def spill_sorted_run(cls, rows, run_dir, run_number) -> str:
+        """Sorts csv rows of articles by publication date and writes them to
+        a run file, each led by its sort key. Returns the path of the run.
 
-            # extract news data from the json and transform it into a DataFrame
-            json_data = pd.DataFrame([json_data])
-            current_file_df = transform_func(extract_func(json_data))
+        # Arguments:
+            :param rows: the csv rows, the index of the article followed by
+                its values in the order of CSV_FIELD_NAMES.
+            :type rows: list
+            :param run_dir: directory the run is written to.
+            :type run_dir: str
+            :param run_number: number of the run, which names its file.
+            :type run_number: int
+        """
 
-            # perform sequential mergers while freeing up memory
-            # by clearing the previously transformed DataFrames
-            merged_df = pd.concat([merged_df, current_file_df])
-            del current_file_df
+        date_column = CSV_FIELD_NAMES.index('news_publication_date') + 1
+        keyed_rows = [(cls.publication_sort_key(row[date_column]),) + row
+                      for row in rows]
+        # a stable sort, so articles of the same date keep their file order
+        keyed_rows.sort(key=lambda row: row[0])
 
-            # force Python's Garbage Collector to clean up unused variables and
-            # free up memory manually
-            gc.collect()
+        path = os.path.join(run_dir, "run_{}.csv".format(run_number))
+        with open(path, 'w', encoding='utf-8', newline='') as output:
+            csv.writer(output, lineterminator="\n").writerows(keyed_rows)
 
-        # return a merged DataFrame of all the jsons
-        return merged_df
+        return path
+
+    @classmethod
+    def publication_sort_key(cls, published_at) -> str:
+        """Returns the sort key of a publication date - the date in UTC,
+        formatted with SORT_KEY_FORMAT, or UNDATED_SORT_KEY if it is missing
+        or not a valid date. Dates without a timezone are taken as UTC.
+
+        Each date is parsed on its own, as the news sources do not all write
+        their dates in the same ISO 8601 form.
+
+        # Arguments:
+            :param published_at: the publication date of an article.
+            :type published_at: str
+        """
+
+        stamp = cls.publication_timestamp(published_at)
+        if stamp is pd.NaT:
+            return UNDATED_SORT_KEY
+
+        return stamp.strftime(SORT_KEY_FORMAT)
+
+    @classmethod
+    def publication_timestamp(cls, published_at):
+        """Returns a publication date as a timestamp in UTC, or NaT if it is
+        missing or not a valid date. Dates without a timezone are taken as
+        UTC.
+
+        # Arguments:
+            :param published_at: the publication date of an article.
+            :type published_at: str
+        """
+
+        try:
+            stamp = pd.Timestamp(published_at)
+        except (TypeError, ValueError):
+            return pd.NaT
+
+        if stamp is pd.NaT:
+            return pd.NaT
+
+        if stamp.tzinfo is None:
+            return stamp.tz_localize('UTC')
+
+        return stamp.tz_convert('UTC')
+
+    @classmethod
+    def merge_sorted_runs(cls, runs):
+        """Yields the rows of sorted run files, k-way merged by their sort
+        key with a heap, holding one row of each run in memory.
+
+        # Arguments:
+            :param runs: paths to the run files, in the order rows of the
+                same sort key are yielded in.
+            :type runs: list
+        """
+
+        run_files = [open(path, encoding='utf-8', newline='')
+                     for path in runs]
+        try:
+            readers = [csv.reader(run_file) for run_file in run_files]
+            for row in heapq.merge(*readers, key=lambda row: row[0]):
+                yield row
+        finally:
+            for run_file in run_files:
+                run_file.close()
 
     @classmethod
     def transform_news_headlines_json_to_csv(cls,
@@ -417,7 +1170,8 @@ class TransformOperations:
                                              csv_filename=None,
                                              read_js_func=None,
                                              extract_func=None,
-                                             transform_func=None):
+                                             transform_func=None,
+                                             cache=None):
         """Transforms the contents of a given news json file into a csv.
 
         The function specifically operates on jsons in the 'headlines'
@@ -448,6 +1202,9 @@ class TransformOperations:
             :param read_js_fnc: the function used to read-in and process the
                 json file. By Default is the Pandas read_json() function.
             :type read_js_func: function
+            :param cache: cache of flattened headline files, only used
+                unless other extract and transform functions are given.
+            :type cache: TransformCache
         """
 
         log.info("Running transform_news_headlines_json_to_csv method")
@@ -462,16 +1219,26 @@ class TransformOperations:
         # Function Aliases
         # use an alias since the length of the real function call when used
         # is more than PEP-8's 79 line-character limit.
+        # unless other extract and transform functions are given, the json
+        # file is read straight into its article DataFrame
+        direct_read = not extract_func and not transform_func
+
         if not extract_func:
             extract_func = c.ExtractOperations.extract_news_data_from_dataframe
         if not transform_func:
             transform_func = cls.transform_data_to_dataframe
+        if not read_js_func and direct_read:
+            read_js_func = c.FileStorage.json_to_dataframe_reader
         if not read_js_func:
             read_js_func = pd.read_json
 
         # use Pandas to read in the json file
         try:
-            keyword_data = read_js_func(json_file)
+            if direct_read:
+                transformed_df = cls.headlines_json_to_dataframe(
+                    json_file, read_js_func, cache=cache)
+            else:
+                keyword_data = read_js_func(json_file)
         except ValueError as err:
             # if any errors are encountered during reading then skip the
             # file to the next, but log it to the console.
@@ -480,16 +1247,19 @@ class TransformOperations:
             # re-raise the error
             raise ValueError
 
-        # extraction and intermediate-transformation of the news json
-        keyword_data = pd.DataFrame([keyword_data])
-        extracted_data = extract_func(keyword_data)
+        if direct_read:
+            has_news_articles = not transformed_df.empty
+        else:
+            # extraction and intermediate-transformation of the news json
+            keyword_data = pd.DataFrame([keyword_data])
+            extracted_data = extract_func(keyword_data)
+            has_news_articles = bool(extracted_data)
 
         # if there are no headline articles then no csv file is
         # created for this news source. the function should not
         # continue processing, but rather log the absence of news
         # articles and move on to the next task in the pipeline
-        if not extracted_data:
-            has_news_articles = False
+        if not has_news_articles:
             status_msg = "No News articles found, csv not created"
             log.info("No News articles found, csv not created")
             op_status = True
@@ -497,7 +1267,8 @@ class TransformOperations:
 
         # function continues in the presence of news articles to process
         log.info("News Articles Present: {}".format(has_news_articles))
-        transformed_df = transform_func(extracted_data)
+        if not direct_read:
+            transformed_df = transform_func(extracted_data)
 
         # transform to csv and save in the 'csv' datastore
         csv_dir = c.FileStorage.get_csv_directory("tempus_challenge_dag")
@@ -505,11 +1276,18 @@ class TransformOperations:
             time = datetime.datetime.now().isoformat().split('T')[0]
             csv_filename = str(time) + "_sample.csv"
         csv_save_path = os.path.join(csv_dir, csv_filename)
-        transformed_df.to_csv(csv_save_path)
+        transformed_df = cls.deduplicate_headlines(transformed_df,
+                                                   "tempus_challenge_dag",
+                                                   csv_filename)
+        transformed_df = c.NearDuplicates.cluster_headlines(transformed_df)
+        formats = c.OutputSinks.pipeline_formats("tempus_challenge_dag")
+        saved_paths = c.OutputSinks.write_headlines(transformed_df,
+                                                    csv_save_path,
+                                                    formats)
 
         # ensure status of operation is communicated to caller function
         op_status = None
-        if os.listdir(csv_dir):
+        if all(os.path.isfile(path) for path in saved_paths):
             log.info("english news headlines csv saved in {}".format(csv_dir))
             op_status = True
             status_msg = "csv file successfully created"
@@ -543,11 +1321,18 @@ class TransformOperations:
             time = datetime.datetime.now().isoformat().split('T')[0]
             csv_filename = str(time) + "_sample.csv"
         csv_save_path = os.path.join(csv_dir, csv_filename)
-        transformed_df.to_csv(path_or_buf=csv_save_path)
+        transformed_df = cls.deduplicate_headlines(transformed_df,
+                                                   "tempus_challenge_dag",
+                                                   csv_filename)
+        transformed_df = c.NearDuplicates.cluster_headlines(transformed_df)
+        formats = c.OutputSinks.pipeline_formats("tempus_challenge_dag")
+        saved_paths = c.OutputSinks.write_headlines(transformed_df,
+                                                    csv_save_path,
+                                                    formats)
 
         # ensure status of operation is communicated to caller function
         op_status = None
-        if os.listdir(csv_dir):
+        if all(os.path.isfile(path) for path in saved_paths):
             log.info("english news headlines csv saved in {}".format(csv_dir))
             op_status = True
         else:
@@ -555,13 +1340,46 @@ class TransformOperations:
 
         return op_status
 
+    @classmethod
+    def deduplicate_headlines(cls, frame, pipeline_name, csv_filename):
+        """Returns a headline DataFrame without the articles the pipeline
+        wrote out in an earlier run, or with them flagged, as set by
+        DEDUP_MODE - see DedupIndex. The DataFrame is returned as-is when
+        deduplication is turned off.
+
+        The run is identified by the date its csv filename starts with, so
+        a retry of the run, and each keyword csv of the same run, writes out
+        the same articles.
+
+        # Arguments:
+            :param frame: the headline DataFrame.
+            :type frame: DataFrame
+            :param pipeline_name: name of the DAG pipeline.
+            :type pipeline_name: str
+            :param csv_filename: the filename of the transformed csv.
+            :type csv_filename: str
+        """
+
+        if not c.DedupIndex.enabled():
+            return frame
+
+        log.info("Running deduplicate_headlines method")
+
+        index = c.DedupIndex(pipeline_name)
+        deduplicated_df = index.deduplicate(frame,
+                                            csv_filename.split("_")[0])
+        index.compact()
+
+        return deduplicated_df
+
     @classmethod
     def transform_key_headlines_to_csv(cls,
                                        json_file,
                                        csv_filename=None,
                                        reader_func=None,
                                        extract_func=None,
-                                       transform_func=None):
+                                       transform_func=None,
+                                       cache=None):
         """Converts the contents of a given news keyword json into a csv.
 
         The function specifically operates on jsons in the 'headlines'
@@ -592,6 +1410,9 @@ class TransformOperations:
             :param reader_func: the function used to read-in and process the
                 json file. By Default is the Pandas read_json() function.
             :type reader_func: function
+            :param cache: cache of flattened headline files, only used
+                unless other extract and transform functions are given.
+            :type cache: TransformCache
         """
 
         log.info("Running transform_key_headlines_to_csv method")
@@ -606,17 +1427,27 @@ class TransformOperations:
         # Function Aliases
         # use an alias since the length of the real function call when used
         # is more than PEP-8's 79 line-character limit.
+        # unless other extract and transform functions are given, the json
+        # file is read straight into its article DataFrame
+        direct_read = not extract_func and not transform_func
+
         if not extract_func:
             extract_func = c.ExtractOperations.extract_news_data_from_dataframe
         if not transform_func:
             transform_func = cls.transform_data_to_dataframe
 
         # use Pandas to read in the json file
+        if not reader_func and direct_read:
+            reader_func = c.FileStorage.json_to_dataframe_reader
         if not reader_func:
             reader_func = pd.read_json
 
         try:
-            keyword_data = reader_func(str(json_file))
+            if direct_read:
+                transformed_df = cls.headlines_json_to_dataframe(
+                    str(json_file), reader_func, cache=cache)
+            else:
+                keyword_data = reader_func(str(json_file))
         except ValueError as err:
             # if any errors are encountered during reading then skip the
             # file to the next, but log it to the console.
@@ -624,16 +1455,19 @@ class TransformOperations:
             # re-raise the error
             raise ValueError
 
-        # extraction and intermediate-transformation of the news json
-        keyword_data = pd.DataFrame([keyword_data])
-        extracted_data = extract_func(keyword_data)
+        if direct_read:
+            has_news_articles = not transformed_df.empty
+        else:
+            # extraction and intermediate-transformation of the news json
+            keyword_data = pd.DataFrame([keyword_data])
+            extracted_data = extract_func(keyword_data)
+            has_news_articles = bool(extracted_data)
 
         # if there are no headline articles then no csv file is
         # created for this news keyword. the function should not
         # continue processing, but rather log the absence of news
         # articles and move on to the next task in the pipeline
-        if not extracted_data:
-            has_news_articles = False
+        if not has_news_articles:
             status_msg = "No News articles found, csv not created"
             log.info("No News articles found, csv not created")
             op_status = True
@@ -641,7 +1475,8 @@ class TransformOperations:
 
         # function continues in the presence of news articles to process
         log.info("News Articles is Present: {}".format(has_news_articles))
-        transformed_df = transform_func(extracted_data)
+        if not direct_read:
+            transformed_df = transform_func(extracted_data)
 
         # transform to csv and save in the 'csv' datastore
         csv_dir = c.FileStorage.get_csv_directory("tempus_bonus_challenge_dag")
@@ -649,11 +1484,17 @@ class TransformOperations:
             time = datetime.datetime.now().isoformat().split('T')[0]
             csv_filename = str(time) + "_" + "sample.csv"
         csv_save_path = os.path.join(csv_dir, csv_filename)
-        transformed_df.to_csv(csv_save_path)
+        transformed_df = cls.deduplicate_headlines(
+            transformed_df, "tempus_bonus_challenge_dag", csv_filename)
+        transformed_df = c.NearDuplicates.cluster_headlines(transformed_df)
+        formats = c.OutputSinks.pipeline_formats("tempus_bonus_challenge_dag")
+        saved_paths = c.OutputSinks.write_headlines(transformed_df,
+                                                    csv_save_path,
+                                                    formats)
 
         query_key = csv_filename.split("_")[1]
 
-        if os.path.isfile(csv_save_path):
+        if all(os.path.isfile(path) for path in saved_paths):
             log.info("{} headlines csv saved in {}".format(query_key, csv_dir))
             op_status = True
             status_msg = "csv file successfully created"
@@ -680,21 +1521,166 @@ class TransformOperations:
         if not news_data:
             raise ValueError("news data argument cannot be empty")
 
-        field_names = ['news_source_id',
-                       'news_source_name',
-                       'news_author',
-                       'news_title',
-                       'news_description',
-                       'news_url',
-                       'news_image_url',
-                       'news_publication_date',
-                       'news_content']
-
-        # craft the transformed dataframe
-        news_df = pd.DataFrame()
-
-        # populate the columns of the dataframe with news data
-        for index, field in enumerate(list(news_data.keys())):
-            news_df[field_names[index]] = news_data[field]
+        field_names = CSV_FIELD_NAMES
+
+        # craft the transformed dataframe, with the columns of the news data
+        # renamed to the field names, in one construction
+        columns = dict(zip(field_names, news_data.values()))
+        news_df = pd.DataFrame(columns, columns=list(columns.keys()))
+
+        return cls.apply_headline_schema(news_df)
+
+    @classmethod
+    def apply_headline_schema(cls, frame, string_dtype=None):
+        """Gives the columns of a headline DataFrame the dtypes of
+        HEADLINE_DTYPES, and the remaining text columns the string dtype.
+
+        The publication dates are only parsed into timestamps if every one
+        of them is written back to csv exactly as it was given, in
+        CSV_DATE_FORMAT - the form the News API gives most dates in. A
+        column holding a date of any other form, e.g. with fractional
+        seconds or another UTC offset, or one that cannot be parsed at all,
+        keeps its strings, so the csv holds the same dates as the one the
+        'stream' mode writes. Columns not in HEADLINE_DTYPES, and DataFrames
+        of other columns, are left as they are.
+
+        # Arguments:
+            :param frame: the headline DataFrame.
+            :type frame: DataFrame
+            :param string_dtype: how the remaining text columns are stored,
+                one of STRING_DTYPES. Defaults to STRING_DTYPE.
+            :type string_dtype: str
+
+        # Raises:
+            ValueError: if the string dtype is not one of STRING_DTYPES.
+        """
+
+        log.info("Running apply_headline_schema method")
+
+        if not string_dtype:
+            string_dtype = STRING_DTYPE
+
+        if string_dtype not in STRING_DTYPES:
+            raise ValueError("{} not valid string dtype".format(string_dtype))
+
+        if string_dtype == 'pyarrow' and ARROW_STRING_DTYPE is None:
+            log.info("Arrow strings need pyarrow and pandas 1.3 or newer, "
+                     "text columns left as is")
+            string_dtype = 'default'
+
+        typed_columns = {}
+        for column in frame.columns:
+            dtype = HEADLINE_DTYPES.get(column)
+
+            if dtype == 'category':
+                typed_columns[column] = frame[column].astype('category')
+            elif dtype and not pd.api.types.is_datetime64_any_dtype(
+                    frame[column]):
+                dates = pd.to_datetime(frame[column], errors='coerce',
+                                       utc=True)
+
+                # every given date must come back out of the csv writer as
+                # it went in, missing dates staying missing
+                given = frame[column].notnull().values
+                written = dates[given].dt.strftime(CSV_DATE_FORMAT).values
+                if (written == frame[column][given].values).all():
+                    typed_columns[column] = dates
+                else:
+                    log.info("{} has dates not of the csv form, kept as "
+                             "text".format(column))
+            elif string_dtype == 'pyarrow' and \
+                    (pd.api.types.is_object_dtype(frame[column]) or
+                     pd.api.types.is_string_dtype(frame[column])):
+                typed_columns[column] = frame[column].astype(
+                    ARROW_STRING_DTYPE)
+
+        return frame.assign(**typed_columns)
+
+    @classmethod
+    def headline_memory_report(cls, frame, typed_frame) -> dict:
+        """Logs, and returns, the memory a headline DataFrame takes before
+        and after its dtypes are applied.
+
+        # Arguments:
+            :param frame: the headline DataFrame before apply_headline_schema.
+            :type frame: DataFrame
+            :param typed_frame: the headline DataFrame after it.
+            :type typed_frame: DataFrame
+        """
+
+        object_bytes = int(frame.memory_usage(index=True, deep=True).sum())
+        typed_bytes = int(typed_frame.memory_usage(index=True,
+                                                   deep=True).sum())
+
+        report = {'rows': len(typed_frame),
+                  'object_bytes': object_bytes,
+                  'typed_bytes': typed_bytes,
+                  'saved_bytes': object_bytes - typed_bytes,
+                  'ratio': object_bytes / max(typed_bytes, 1)}
+
+        log.info("Headline DataFrame memory of {} rows: {} bytes, {} bytes "
+                 "typed ({:.1f}x smaller)".format(report['rows'],
+                                                  object_bytes,
+                                                  typed_bytes,
+                                                  report['ratio']))
+
+        return report
+
+    @classmethod
+    def headlines_json_to_dataframe(cls, json_file, reader_func=None,
+                                    typed=True, cache=None):
+        """Reads a news json file straight into a DataFrame of its articles.
+
+        The DataFrame is built in one construction from the rows of the
+        articles, with the same columns transform_data_to_dataframe() gives
+        the extracted news data - without the one-row DataFrame wrapping
+        the json data, the extracted lists and the column by column inserts
+        of the extract-then-transform path. A json file without articles
+        gives an empty DataFrame.
+
+        # Arguments:
+            :param json_file: path to the news json file.
+            :type json_file: str
+            :param reader_func: the function used to read-in the json file.
+                Defaults to FileStorage.json_to_dataframe_reader.
+            :type reader_func: function
+            :param typed: whether the DataFrame is given the dtypes of
+                apply_headline_schema(). DataFrames that are merged later
+                are typed once after the merge instead.
+            :type typed: bool
+            :param cache: cache of flattened headline files, the DataFrame
+                is taken from it if the file is unchanged since an earlier
+                run. Not used if None.
+            :type cache: TransformCache
+
+        # Raises:
+            ValueError: if the json file cannot be read.
+        """
+
+        log.info("Running headlines_json_to_dataframe method")
+
+        if not reader_func:
+            reader_func = c.FileStorage.json_to_dataframe_reader
+
+        news_df = None
+        if cache:
+            digest, news_df = cache.get(json_file)
+
+        if news_df is None:
+            news_data = reader_func(json_file)
+            articles = news_data.get('articles') or []
+
+            # one row of news data per article
+            extract_func = c.ExtractOperations.extract_article_values
+            rows = [extract_func(article) for article in articles]
+
+            news_df = pd.DataFrame.from_records(rows,
+                                                columns=CSV_FIELD_NAMES)
+
+            if cache:
+                cache.put(digest, news_df)
+
+        if typed:
+            news_df = cls.apply_headline_schema(news_df)
 
         return news_df
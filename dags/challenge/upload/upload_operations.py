@@ -15,6 +15,19 @@ import challenge as c
 # are logged to the Airflow console
 log = logging.getLogger(__name__)
 
+# content metadata the headline files are stored with in S3, by extension -
+# one per output format, and csv compression, the transform task writes.
+# Compressed csv files keep their codec suffix in their key, and declare
+# it as their Content-Encoding.
+UPLOAD_CONTENT_METADATA = {
+    '.csv': {'ContentType': 'text/csv'},
+    '.csv.gz': {'ContentType': 'text/csv', 'ContentEncoding': 'gzip'},
+    '.csv.zst': {'ContentType': 'text/csv', 'ContentEncoding': 'zstd'},
+    '.parquet': {'ContentType': 'application/vnd.apache.parquet'}}
+
+# extensions of the headline files uploaded from the 'csv' directory
+UPLOAD_EXTENSIONS = tuple(UPLOAD_CONTENT_METADATA.keys())
+
 
 class UploadOperations:
     """Handles functionality for uploading flattened CSVs in a directory.
@@ -35,6 +48,9 @@ class UploadOperations:
     def upload_directory_check(cls, csv_dir):
         """performs file checks in a given csv directory.
 
+        Headline files of every output format, see UPLOAD_EXTENSIONS, count
+        as csv-headline files.
+
         # Arguments:
             :param csv_dir: path to the directory containing
                 all the csv headline files.
@@ -63,7 +79,7 @@ class UploadOperations:
 
         if os.listdir(csv_dir):
             csv_files = [file for file in os.listdir(csv_dir)
-                         if file.endswith('.csv')]
+                         if file.endswith(UPLOAD_EXTENSIONS)]
 
         # a directory with non-csv files is valid
         if not csv_files:
@@ -76,6 +92,22 @@ class UploadOperations:
             message = "CSV files present"
             return status, message, csv_files
 
+    @classmethod
+    def upload_file_metadata(cls, filename) -> dict:
+        """Returns the S3 content metadata of a headline file, from its
+        extension - see UPLOAD_CONTENT_METADATA.
+
+        # Arguments:
+            :param filename: name of the headline file.
+            :type filename: str
+        """
+
+        for extension, metadata in UPLOAD_CONTENT_METADATA.items():
+            if filename.endswith(extension):
+                return dict(metadata)
+
+        return {}
+
     @classmethod
     def upload_csv_to_s3(cls,
                          csv_directory=None,
@@ -165,7 +197,9 @@ class UploadOperations:
         # iterate through the files in the directory and upload them to s3
         for file in files:
             file_path = os.path.join(pipeline_csv_dir, file)
-            aws_service_client.upload_file(file_path, bucket_name, file)
+            aws_service_client.upload_file(
+                file_path, bucket_name, file,
+                ExtraArgs=cls.upload_file_metadata(file))
 
         # file upload successful if it reached this point without any errors
         status = True
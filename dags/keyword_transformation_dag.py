@@ -25,6 +25,8 @@ from airflow.operators.dummy_operator import DummyOperator
 from airflow.operators.http_operator import SimpleHttpOperator
 from airflow.operators.python_operator import PythonOperator
 
+from challenge.network.network_operations import HTTP_TIMEOUT
+from challenge.network.network_operations import NEWS_API_BASE_URL
 from challenge.network.network_operations import NetworkOperations
 from challenge.transform.transform_operations import TransformOperations
 from challenge.upload.upload_operations import UploadOperations
@@ -58,7 +60,7 @@ API_KEY = os.environ["NEWS_API_KEY"]
 # Connection object for the News API endpoints
 conn_news_api = Connection(conn_id="newsapi",
                            conn_type="HTTP",
-                           host="https://newsapi.org")
+                           host=NEWS_API_BASE_URL)
 
 # Connection object for local filesystem access
 conn_filesystem = Connection(conn_id="filesys",
@@ -103,6 +105,7 @@ news_kw1_task = SimpleHttpOperator(endpoint='/v2/top-headlines?',
                                    data={'q': 'Tempus Labs',
                                          'apiKey': API_KEY},
                                    response_check=headlines_func_alias,
+                                   extra_options={'timeout': HTTP_TIMEOUT},
                                    http_conn_id='newsapi',
                                    task_id='get_headlines_first_kw_task',
                                    dag=dag,
@@ -114,6 +117,7 @@ news_kw2_task = SimpleHttpOperator(endpoint='/v2/top-headlines?',
                                    data={'q': 'Eric Lefkofsky',
                                          'apiKey': API_KEY},
                                    response_check=headlines_func_alias,
+                                   extra_options={'timeout': HTTP_TIMEOUT},
                                    http_conn_id='newsapi',
                                    task_id='get_headlines_second_kw_task',
                                    dag=dag,
@@ -125,6 +129,7 @@ news_kw3_task = SimpleHttpOperator(endpoint='/v2/top-headlines?',
                                    data={'q': 'Cancer',
                                          'apiKey': API_KEY},
                                    response_check=headlines_func_alias,
+                                   extra_options={'timeout': HTTP_TIMEOUT},
                                    http_conn_id='newsapi',
                                    task_id='get_headlines_third_kw_task',
                                    dag=dag,
@@ -136,6 +141,7 @@ news_kw4_task = SimpleHttpOperator(endpoint='/v2/top-headlines?',
                                    data={'q': 'Immunotherapy',
                                          'apiKey': API_KEY},
                                    response_check=headlines_func_alias,
+                                   extra_options={'timeout': HTTP_TIMEOUT},
                                    http_conn_id='newsapi',
                                    task_id='get_headlines_fourth_kw_task',
                                    dag=dag,
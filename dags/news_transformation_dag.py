@@ -24,6 +24,8 @@ from airflow.operators.dummy_operator import DummyOperator
 from airflow.operators.http_operator import SimpleHttpOperator
 from airflow.operators.python_operator import PythonOperator
 
+from challenge.network.network_operations import HTTP_TIMEOUT
+from challenge.network.network_operations import NEWS_API_BASE_URL
 from challenge.network.network_operations import NetworkOperations
 from challenge.transform.transform_operations import TransformOperations
 from challenge.upload.upload_operations import UploadOperations
@@ -58,7 +60,7 @@ API_KEY = os.environ["NEWS_API_KEY"]
 # Connection object for the News API endpoints
 conn_news_api = Connection(conn_id="newsapi",
                            conn_type="HTTP",
-                           host="https://newsapi.org")
+                           host=NEWS_API_BASE_URL)
 
 # Connection object for local filesystem access
 conn_filesystem = Connection(conn_id="filesys",
@@ -107,6 +109,7 @@ get_news_task = SimpleHttpOperator(endpoint='/v2/sources?',
                                    data={'language': 'en',
                                          'apiKey': API_KEY},
                                    response_check=news_func_alias,
+                                   extra_options={'timeout': HTTP_TIMEOUT},
                                    http_conn_id='newsapi',
                                    task_id='get_news_sources_task',
                                    dag=dag,
@@ -22,5 +22,6 @@ setup(
     url='https://www.tempus.com/',
     packages=['dags'],
     install_requires=read('requirements.txt'),
+    extras_require={'optional': read('requirements-optional.txt')},
     setup_requires=read('requirements-setup.txt'),
 )
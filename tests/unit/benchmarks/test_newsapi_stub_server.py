@@ -0,0 +1,172 @@
+"""Tempus Data Engineer Challenge  - Unit Tests.
+
+Defines unit tests for the local News API stand-in server used to exercise
+and benchmark the DAG pipelines offline.
+"""
+
+import pytest
+import requests
+
+from benchmarks import newsapi_stub_server as stub
+
+from dags import challenge as c
+
+
+@pytest.mark.benchmarktests
+class TestNewsAPIStubServer:
+    """tests the endpoints and fault injection of the stand-in server."""
+
+    @pytest.fixture
+    def data(self) -> stub.NewsAPIData:
+        """returns a pytest resource - a small generated data set."""
+        return stub.NewsAPIData.generate(num_sources=3,
+                                         articles_per_source=25,
+                                         seed=1)
+
+    @pytest.fixture
+    def server(self, data) -> stub.NewsAPIStubServer:
+        """returns a pytest resource - a running stand-in server."""
+        server = stub.NewsAPIStubServer(data=data)
+        server.start()
+        yield server
+        server.stop()
+
+    def test_sources_endpoint_lists_sources_succeeds(self, server, data):
+        """the /v2/sources endpoint lists every english source."""
+
+        # Arrange
+        url = server.base_url + "/v2/sources?language=en&apiKey=key"
+
+        # Act
+        response = requests.get(url, timeout=5)
+
+        # Assert
+        assert response.status_code == requests.codes.ok
+        assert response.json()['sources'] == data.sources
+
+    def test_top_headlines_pages_articles_succeeds(self, server):
+        """top-headlines filters by source and pages with pageSize."""
+
+        # Arrange
+        url = server.base_url + "/v2/top-headlines?sources=source-0" \
+            "&pageSize=10&page={}&apiKey=key"
+
+        # Act
+        pages = [requests.get(url.format(page), timeout=5).json()
+                 for page in (1, 2, 3)]
+
+        # Assert
+        assert [len(page['articles']) for page in pages] == [10, 10, 5]
+        assert all(page['totalResults'] == 25 for page in pages)
+        assert {article['source']['id'] for page in pages
+                for article in page['articles']} == {'source-0'}
+
+    def test_top_headlines_keyword_query_succeeds(self, server, data):
+        """the 'q' parameter filters articles by title and description."""
+
+        # Arrange
+        keyword = data.articles[0]['title'].split()[0].lower()
+        url = server.base_url + \
+            "/v2/top-headlines?q={}&pageSize=100&apiKey=key".format(keyword)
+
+        # Act
+        articles = requests.get(url, timeout=5).json()['articles']
+
+        # Assert
+        assert articles
+        assert all(keyword in article['title'].lower() or
+                   keyword in article['description'].lower()
+                   for article in articles)
+
+    def test_missing_api_key_fails(self, server):
+        """requests without an api key are rejected as by the News API."""
+
+        # Arrange
+        url = server.base_url + "/v2/sources?language=en"
+
+        # Act
+        response = requests.get(url, timeout=5)
+
+        # Assert
+        assert response.status_code == 401
+        assert response.json()['code'] == 'apiKeyMissing'
+
+    def test_etag_revalidation_returns_not_modified_succeeds(self, server):
+        """a request carrying the ETag of the current body gets a 304."""
+
+        # Arrange
+        url = server.base_url + "/v2/sources?language=en&apiKey=key"
+        etag = requests.get(url, timeout=5).headers['ETag']
+
+        # Act
+        response = requests.get(url, timeout=5,
+                                headers={'If-None-Match': etag})
+
+        # Assert
+        assert response.status_code == 304
+
+    def test_injected_throttling_sends_retry_after_succeeds(self, data):
+        """a 429 injection rate of 1 throttles every request."""
+
+        # Arrange
+        server = stub.NewsAPIStubServer(data=data, rate_429=1.0,
+                                        retry_after=7)
+        server.start()
+
+        # Act
+        try:
+            response = requests.get(server.base_url + "/v2/sources?apiKey=k",
+                                    timeout=5)
+        finally:
+            server.stop()
+
+        # Assert
+        assert response.status_code == 429
+        assert response.headers['Retry-After'] == "7"
+
+    def test_slow_drip_body_is_complete_succeeds(self, data):
+        """a body dripped in small chunks still arrives whole."""
+
+        # Arrange
+        server = stub.NewsAPIStubServer(data=data, drip_bytes=512,
+                                        drip_interval=0)
+        server.start()
+
+        # Act
+        try:
+            response = requests.get(server.base_url +
+                                    "/v2/sources?language=en&apiKey=key",
+                                    timeout=5)
+        finally:
+            server.stop()
+
+        # Assert
+        assert response.json()['sources'] == data.sources
+
+    def test_latency_model_invalid_spec_fails(self):
+        """unknown distributions or wrong parameter counts are rejected."""
+
+        # Assert
+        with pytest.raises(ValueError):
+            stub.LatencyModel("gaussian:1")
+
+        with pytest.raises(ValueError):
+            stub.LatencyModel("uniform:1")
+
+    def test_iter_headline_articles_against_server_succeeds(self, server):
+        """the pipeline's paginated fetch walks every page of the server."""
+
+        # Arrange
+        endpoint = server.base_url + "/v2/top-headlines?"
+
+        # Act
+        articles = list(c.NetworkOperations.iter_headline_articles(
+            "key",
+            sources='source-1',
+            page_size=10,
+            url_endpoint=endpoint,
+            http_method=requests.get))
+
+        # Assert
+        assert len(articles) == 25
+        assert server.request_count == 3
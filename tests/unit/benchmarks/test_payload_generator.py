@@ -0,0 +1,157 @@
+"""Tempus Data Engineer Challenge  - Unit Tests.
+
+Defines unit tests for the synthetic News API payload generator that the
+performance benchmarks draw their data from.
+"""
+
+import json
+import os
+import pytest
+
+from benchmarks.payload_generator import PayloadGenerator
+
+from dags import challenge as c
+
+from pyfakefs.fake_filesystem_unittest import Patcher
+
+
+@pytest.mark.benchmarktests
+class TestPayloadGenerator:
+    """tests the determinism, tuning and file layout of the generator."""
+
+    def test_same_seed_generates_same_payloads_succeeds(self):
+        """two generators with the same seed produce identical payloads."""
+
+        # Arrange
+        first = PayloadGenerator(seed=7, null_rate=0.2, unicode_rate=0.3,
+                                 duplicate_rate=0.1)
+        second = PayloadGenerator(seed=7, null_rate=0.2, unicode_rate=0.3,
+                                  duplicate_rate=0.1)
+
+        # Act
+        first_payload = first.headlines_payload(first.source(0), 50)
+        second_payload = second.headlines_payload(second.source(0), 50)
+
+        # Assert
+        assert first_payload == second_payload
+
+    def test_null_rate_nulls_nullable_fields_succeeds(self):
+        """a null rate of 1 nulls every nullable field and nothing else."""
+
+        # Arrange
+        generator = PayloadGenerator(null_rate=1.0)
+
+        # Act
+        articles = generator.articles(generator.source(0), 10)
+
+        # Assert
+        assert all(article['author'] is None and
+                   article['description'] is None and
+                   article['urlToImage'] is None and
+                   article['content'] is None for article in articles)
+        assert all(article['title'] and article['url']
+                   for article in articles)
+
+    def test_unicode_rate_generates_non_ascii_text_succeeds(self):
+        """a unicode rate of 1 makes every title non-ascii."""
+
+        # Arrange
+        generator = PayloadGenerator(unicode_rate=1.0)
+
+        # Act
+        articles = generator.articles(generator.source(0), 10)
+
+        # Assert
+        assert all(any(ord(char) > 127 for char in article['title'])
+                   for article in articles)
+
+    def test_duplicate_rate_repeats_articles_succeeds(self):
+        """a duplicate rate of 1 copies the first article everywhere."""
+
+        # Arrange
+        generator = PayloadGenerator(duplicate_rate=1.0)
+
+        # Act
+        articles = generator.articles(generator.source(0), 10)
+
+        # Assert
+        assert len({article['url'] for article in articles}) == 1
+
+    def test_invalid_rate_fails(self):
+        """rates outside of 0 to 1 are rejected."""
+
+        # Assert
+        with pytest.raises(ValueError):
+            PayloadGenerator(null_rate=1.5)
+
+    def test_write_pipeline_headlines_layout_succeeds(self):
+        """payloads land where the pipeline reads them from."""
+
+        # Arrange
+        generator = PayloadGenerator(seed=1, unicode_rate=0.5)
+
+        with Patcher() as patcher:
+            # setup pyfakefs - the fake filesystem
+            patcher.setUp()
+
+            # Act
+            summary = generator.write_pipeline('tempus_challenge_dag',
+                                               num_sources=3,
+                                               articles_per_source=4,
+                                               create_date="2018-10-01")
+
+            news_dir = c.FileStorage.get_news_directory(
+                'tempus_challenge_dag')
+            headlines_dir = c.FileStorage.get_headlines_directory(
+                'tempus_challenge_dag')
+            news_files = sorted(os.listdir(news_dir))
+            headline_files = sorted(os.listdir(headlines_dir))
+            with open(os.path.join(headlines_dir, headline_files[0]),
+                      encoding='utf-8') as headline_file:
+                headlines = json.load(headline_file)
+
+            # clean up and remove the fake filesystem
+            patcher.tearDown()
+
+        # Assert
+        assert summary == {'news_files': 1, 'headline_files': 3,
+                           'articles': 12}
+        assert news_files == ["2018-10-01_english_news_sources.json"]
+        assert headline_files == ["2018-10-01_source-0_headlines.json",
+                                  "2018-10-01_source-1_headlines.json",
+                                  "2018-10-01_source-2_headlines.json"]
+        assert headlines['totalResults'] == len(headlines['articles']) == 4
+
+    def test_write_pipeline_keyword_layout_succeeds(self):
+        """the bonus pipeline gets one headline file per keyword."""
+
+        # Arrange
+        generator = PayloadGenerator()
+
+        with Patcher() as patcher:
+            # setup pyfakefs - the fake filesystem
+            patcher.setUp()
+
+            # Act
+            generator.write_pipeline('tempus_bonus_challenge_dag',
+                                     articles_per_source=5,
+                                     keywords=['tempus', 'cancer'],
+                                     create_date="2018-10-01")
+
+            headlines_dir = c.FileStorage.get_headlines_directory(
+                'tempus_bonus_challenge_dag')
+            headline_files = sorted(os.listdir(headlines_dir))
+
+            # clean up and remove the fake filesystem
+            patcher.tearDown()
+
+        # Assert
+        assert headline_files == ["2018-10-01_cancer_headlines.json",
+                                  "2018-10-01_tempus_headlines.json"]
+
+    def test_write_pipeline_invalid_dag_fails(self):
+        """only the two DAG pipelines can be generated for."""
+
+        # Assert
+        with pytest.raises(ValueError):
+            PayloadGenerator().write_pipeline('unknown_dag')
@@ -0,0 +1,67 @@
+"""Tempus Data Engineer Challenge  - Unit Tests.
+
+Defines unit tests for the benchmark suite of the extract, transform,
+storage and upload hot paths.
+"""
+
+import pytest
+
+from benchmarks import run_benchmarks as bench
+
+
+@pytest.mark.benchmarktests
+class TestRunBenchmarks:
+    """tests the benchmark runner and the comparison of its results."""
+
+    def make_results(self, seconds, peak) -> dict:
+        """returns benchmark results of a single benchmark."""
+        return {'meta': {},
+                'results': [{'benchmark': 'write_json_to_file',
+                             'tier': 'small',
+                             'seconds_median': seconds,
+                             'peak_memory_bytes': peak}]}
+
+    def test_run_benchmarks_reports_every_benchmark_succeeds(self):
+        """every requested benchmark and tier gets a result."""
+
+        # Arrange
+        names = ['extract_news_data_from_dataframe',
+                 'transform_jsons_to_dataframe_merger',
+                 'write_json_to_file']
+
+        # Act
+        results = bench.run_benchmarks(['tiny'], names, repeat=1)
+
+        # Assert
+        assert [result['benchmark'] for result in results['results']] == \
+            names
+        assert all(result['articles'] == 15 and
+                   result['files'] == 3 and
+                   result['seconds_median'] > 0 and
+                   result['peak_memory_bytes'] > 0
+                   for result in results['results'])
+        assert 'pandas' in results['meta']
+
+    def test_run_benchmarks_unknown_tier_fails(self):
+        """only the defined data size tiers can be run."""
+
+        # Assert
+        with pytest.raises(ValueError):
+            bench.run_benchmarks(['enormous'])
+
+    def test_compare_results_flags_regression_succeeds(self):
+        """a slower run beyond the threshold is flagged as a regression."""
+
+        # Arrange
+        baseline = self.make_results(1.0, 1000)
+        slower = self.make_results(1.5, 1000)
+        similar = self.make_results(1.05, 1000)
+
+        # Act
+        slower_rows = bench.compare_results(slower, baseline, 0.1)
+        similar_rows = bench.compare_results(similar, baseline, 0.1)
+
+        # Assert
+        assert slower_rows[0]['regression']
+        assert slower_rows[0]['time_ratio'] == pytest.approx(1.5)
+        assert not similar_rows[0]['regression']
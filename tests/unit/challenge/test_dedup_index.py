@@ -0,0 +1,140 @@
+"""Tempus Data Engineer Challenge  - Unit Tests.
+
+Defines unit tests for the index of news articles already written out, used
+to deduplicate the headlines of the transform task performed in the DAGs.
+"""
+
+import pandas as pd
+import pytest
+import tempfile
+
+from unittest.mock import patch
+
+from dags import challenge as c
+
+
+@pytest.mark.dedupindextests
+class TestDedupIndex:
+    """test the canonical urls, runs and expiry of the dedup index."""
+
+    @pytest.fixture(scope='function')
+    def index_dir_res(self) -> str:
+        """returns a pytest resource - a scratch directory for an index,
+        removed after the test. SQLite writes to the real filesystem, so
+        pyfakefs is not used."""
+
+        with tempfile.TemporaryDirectory() as index_dir:
+            yield index_dir
+
+    @pytest.mark.parametrize('url,expected', [
+        ("https://www.example.com/news/story/",
+         "https://example.com/news/story"),
+        ("http://Example.com/news/story#comments",
+         "https://example.com/news/story"),
+        ("https://example.com/story?utm_source=x&b=2&a=1&fbclid=y",
+         "https://example.com/story?a=1&b=2"),
+        ("https://example.com/Story", "https://example.com/Story"),
+        (None, ""),
+        ("  ", "")])
+    def test_canonical_url_succeeds(self, url, expected):
+        """urls of the same article share their canonical form."""
+
+        # Act
+        canonical = c.DedupIndex.canonical_url(url)
+
+        # Assert
+        assert canonical == expected
+
+    def test_seen_before_across_runs_succeeds(self, index_dir_res):
+        """an article is seen before if an earlier run wrote it out, or an
+        earlier article of the same run has its url, but not on a retry of
+        the run that first wrote it out."""
+
+        # Arrange
+        index = c.DedupIndex("tempus_challenge_dag", index_dir_res)
+        first_urls = ["https://example.com/a", "https://example.com/b",
+                      "http://www.example.com/a/", None]
+        second_urls = ["https://example.com/b?utm_medium=rss",
+                       "https://example.com/c", None]
+
+        # Act
+        first_run = index.seen_before(first_urls, "2018-10-01")
+        retried_run = index.seen_before(first_urls, "2018-10-01")
+        second_run = index.seen_before(second_urls, "2018-10-02")
+
+        # Assert
+        assert first_run == [False, False, True, False]
+        assert retried_run == first_run
+        assert second_run == [True, False, False]
+        assert index.size() == 3
+
+    @pytest.mark.parametrize('mode', ['drop', 'flag'])
+    def test_deduplicate_modes_succeeds(self, index_dir_res, mode):
+        """articles seen before are dropped, or flagged, and the other
+        articles kept as they are."""
+
+        # Arrange
+        index = c.DedupIndex("tempus_challenge_dag", index_dir_res)
+        index.seen_before(["https://example.com/a"], "2018-10-01")
+        frame = pd.DataFrame({'news_title': ["A", "B"],
+                              'news_url': ["https://example.com/a",
+                                           "https://example.com/b"]})
+
+        # Act
+        result = index.deduplicate(frame, "2018-10-02", mode)
+
+        # Assert
+        if mode == 'drop':
+            assert list(result['news_title']) == ["B"]
+            assert list(result.index) == [1]
+        else:
+            assert list(result['news_title']) == ["A", "B"]
+            assert list(result[c.SEEN_COLUMN]) == [True, False]
+
+    def test_deduplicate_bad_mode_fails(self, index_dir_res):
+        """only the known dedup modes can be selected."""
+
+        # Arrange
+        index = c.DedupIndex("tempus_challenge_dag", index_dir_res)
+        frame = pd.DataFrame({'news_url': ["https://example.com/a"]})
+
+        # Assert
+        with pytest.raises(ValueError) as err:
+            index.deduplicate(frame, "2018-10-01", mode='merge')
+
+        assert "not valid dedup mode" in str(err.value)
+
+    def test_compact_expires_unseen_articles_succeeds(self, index_dir_res):
+        """articles not seen for the TTL are removed, and are no longer seen
+        before once they come back."""
+
+        # Arrange
+        day = 24 * 60 * 60
+        index = c.DedupIndex("tempus_challenge_dag", index_dir_res,
+                             ttl_days=2)
+        index.seen_before(["https://example.com/old",
+                           "https://example.com/kept"], "run-1", now=0)
+        index.seen_before(["https://example.com/kept"], "run-2", now=day)
+
+        # Act
+        removed = index.compact(now=2.5 * day)
+        seen = index.seen_before(["https://example.com/old",
+                                  "https://example.com/kept"], "run-3",
+                                 now=3 * day)
+
+        # Assert
+        assert removed == 1
+        assert seen == [False, True]
+
+    def test_enabled_turned_on_succeeds(self):
+        """the index is only consulted once a dedup mode is selected."""
+
+        # Act
+        with patch.object(c.dedup.dedup_index, 'DEDUP_MODE', 'off'):
+            turned_off = c.DedupIndex.enabled()
+        with patch.object(c.dedup.dedup_index, 'DEDUP_MODE', 'drop'):
+            turned_on = c.DedupIndex.enabled()
+
+        # Assert
+        assert turned_off is False
+        assert turned_on is True
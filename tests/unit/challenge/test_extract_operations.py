@@ -509,3 +509,74 @@ class TestExtractOperations:
         # Assert
         actual_message = str(err.value)
         assert "Query param not found in URL" in actual_message
+
+    def test_extract_article_values_succeeds(self):
+        """the news data of one article is extracted in column order."""
+
+        # Arrange
+        article = {'source': {'id': 'abc-news', 'name': 'ABC News'},
+                   'author': 'Author',
+                   'title': 'Title',
+                   'description': 'Description',
+                   'url': 'https://abcnews.go.com/1',
+                   'urlToImage': 'https://abcnews.go.com/1.jpg',
+                   'publishedAt': '2018-10-01T00:00:00Z',
+                   'content': 'Content'}
+
+        # Act
+        values = c.ExtractOperations.extract_article_values(article)
+
+        # Assert
+        assert values == ('abc-news', 'ABC News', 'Author', 'Title',
+                          'Description', 'https://abcnews.go.com/1',
+                          'https://abcnews.go.com/1.jpg',
+                          '2018-10-01T00:00:00Z', 'Content')
+
+    def test_extract_article_values_missing_fields_succeeds(self):
+        """fields missing from an article are extracted as None."""
+
+        # Arrange
+        article = {'source': None, 'title': 'Title'}
+
+        # Act
+        values = c.ExtractOperations.extract_article_values(article)
+
+        # Assert
+        assert values == (None, None, None, 'Title', None, None, None, None,
+                          None)
+
+    def test_extract_news_data_from_dataframe_columns_succeeds(self):
+        """every article's news data is extracted into the columns, even
+        when some articles miss fields or only a page of the results was
+        retrieved."""
+
+        # Arrange
+        articles = [{'source': {'id': 'wired', 'name': 'Wired'},
+                     'author': 'Klint Finley',
+                     'title': 'Microsoft Calls a Truce',
+                     'description': 'The software giant',
+                     'url': 'https://www.wired.com/story/1',
+                     'urlToImage': None,
+                     'publishedAt': '2018-10-11T23:33:03Z',
+                     'content': 'Microsoft is calling for a truce'},
+                    {'source': {'id': None, 'name': 'Blog'},
+                     'title': 'Untitled'}]
+
+        # 'totalResults' counts articles on pages not retrieved too
+        data = pd.DataFrame([{'status': 'ok',
+                              'totalResults': 40,
+                              'articles': articles}])
+
+        # Act
+        result = c.ExtractOperations.extract_news_data_from_dataframe(data)
+
+        # Assert
+        assert list(result.keys()) == ['source_id', 'source_name', 'author',
+                                       'title', 'description', 'url',
+                                       'url_to_image', 'published_at',
+                                       'content']
+        assert result['source_id'] == ['wired', None]
+        assert result['source_name'] == ['Wired', 'Blog']
+        assert result['author'] == ['Klint Finley', None]
+        assert result['title'] == ['Microsoft Calls a Truce', 'Untitled']
+        assert result['content'] == ['Microsoft is calling for a truce', None]
@@ -525,3 +525,372 @@ class TestFileStorageOperations:
         with pytest.raises(ValueError) as err:
             c.FileStorage.get_csv_directory("wrong_name_dag")
         assert "No directory path for given pipeline name" in str(err.value)
+
+    def test_write_source_headlines_to_file_concurrently_succeeds(self):
+        """concurrent fetches write one headline file per source and skip
+        sources whose request was not successful.
+        """
+
+        # Arrange
+        ids = ['abc-news', 'bbc-news', 'cnn', 'bad-source']
+        names = ['ABC News', 'BBC News', 'CNN', 'Bad Source']
+        hd_dir = '/tempdata/headlines'
+
+        def headline_func(source_id, api_key=None, page_size=None):
+            response = MagicMock()
+            if source_id == 'bad-source':
+                response.status_code = 400
+            else:
+                response.status_code = 200
+                response.iter_content.return_value = iter(
+                    [b'{"status": "ok", "totalResults": 0, "articles": []}'])
+            return response
+
+        with Patcher() as patcher:
+            # setup pyfakefs - the fake filesystem
+            patcher.setUp()
+
+            # create a fake filesystem directory to test the method
+            patcher.fs.create_dir(hd_dir)
+
+            # Act
+            result = c.FileStorage.write_source_headlines_to_file(
+                ids, names, hd_dir, 'key', headline_func, max_workers=3)
+            files = sorted(os.listdir(hd_dir))
+
+            # clean up and remove the fake filesystem
+            patcher.tearDown()
+
+        # Assert
+        assert result is True
+        assert len(files) == 3
+        assert [f.split("_", 1)[1] for f in files] == [
+            'abc-news_headlines.json',
+            'bbc-news_headlines.json',
+            'cnn_headlines.json']
+
+    def test_write_source_headlines_to_file_concurrently_raises_error(self):
+        """an error raised while fetching one source is re-raised."""
+
+        # Arrange
+        ids = ['abc-news', 'bbc-news']
+        names = ['ABC News', 'BBC News']
+        hd_dir = '/tempdata/headlines'
+
+        def headline_func(source_id, api_key=None, page_size=None):
+            raise IOError("connection reset")
+
+        with Patcher() as patcher:
+            # setup pyfakefs - the fake filesystem
+            patcher.setUp()
+
+            # create a fake filesystem directory to test the method
+            patcher.fs.create_dir(hd_dir)
+
+            # Act
+            with pytest.raises(IOError) as err:
+                c.FileStorage.write_source_headlines_to_file(
+                    ids, names, hd_dir, 'key', headline_func, max_workers=2)
+
+            # clean up and remove the fake filesystem
+            patcher.tearDown()
+
+        # Assert
+        assert "connection reset" in str(err.value)
+
+    def test_write_source_headlines_to_file_batched_splits_per_source(self):
+        """batched requests are split back into one headline file per source,
+        including sources without any articles.
+        """
+
+        # Arrange
+        ids = ['abc-news', 'bbc-news', 'cnn']
+        names = ['ABC News', 'BBC News', 'CNN']
+        hd_dir = '/tempdata/headlines'
+        requested = []
+
+        def article(source_id, title):
+            return {'source': {'id': source_id, 'name': source_id},
+                    'title': title}
+
+        def headline_func(source_ids, api_key=None, page_size=None):
+            requested.append(source_ids)
+            articles = [article(source_id, "title")
+                        for source_id in source_ids.split(",")
+                        if source_id != 'cnn']
+            response = MagicMock()
+            response.status_code = 200
+            response.json.return_value = {'status': 'ok',
+                                          'totalResults': len(articles),
+                                          'articles': articles}
+            return response
+
+        with Patcher() as patcher:
+            # setup pyfakefs - the fake filesystem
+            patcher.setUp()
+
+            # create a fake filesystem directory to test the method
+            patcher.fs.create_dir(hd_dir)
+
+            # Act
+            result = c.FileStorage.write_source_headlines_to_file(
+                ids, names, hd_dir, 'key', headline_func, batch_size=2)
+            contents = {}
+            for fname in os.listdir(hd_dir):
+                with open(os.path.join(hd_dir, fname)) as json_file:
+                    contents[fname.split("_", 1)[1]] = json.load(json_file)
+
+            # clean up and remove the fake filesystem
+            patcher.tearDown()
+
+        # Assert
+        assert result is True
+        assert requested == ['abc-news,bbc-news', 'cnn']
+        assert contents['abc-news_headlines.json']['totalResults'] == 1
+        assert contents['bbc-news_headlines.json']['articles'] == [
+            article('bbc-news', "title")]
+        assert contents['cnn_headlines.json']['articles'] == []
+
+    @patch('challenge.NetworkOperations.http_get')
+    def test_write_batched_source_headlines_pages_through_batch(self,
+                                                                http_get):
+        """a batch with more articles than fit in one page has its remaining
+        pages fetched and streamed into each source's file.
+        """
+
+        # Arrange
+        ids = ['abc-news', 'bbc-news']
+        hd_dir = '/tempdata/headlines'
+
+        def page(*source_ids):
+            articles = [{'source': {'id': source_id}, 'title': source_id}
+                        for source_id in source_ids]
+            response = MagicMock()
+            response.status_code = 200
+            response.json.return_value = {'status': 'ok',
+                                          'totalResults': 3,
+                                          'articles': articles}
+            return response
+
+        def headline_func(source_ids, api_key=None, page_size=None):
+            return page('abc-news', 'bbc-news')
+
+        http_get.side_effect = lambda url: page('abc-news')
+
+        with Patcher() as patcher:
+            # setup pyfakefs - the fake filesystem
+            patcher.setUp()
+
+            # create a fake filesystem directory to test the method
+            patcher.fs.create_dir(hd_dir)
+
+            # Act
+            result = c.FileStorage.write_batched_source_headlines(
+                ids, hd_dir, 'key', headline_func, page_size=2)
+            contents = {}
+            for fname in os.listdir(hd_dir):
+                with open(os.path.join(hd_dir, fname)) as json_file:
+                    contents[fname.split("_", 1)[1]] = json.load(json_file)
+
+            # clean up and remove the fake filesystem
+            patcher.tearDown()
+
+        # Assert
+        assert result is True
+        assert "page=2" in http_get.call_args[0][0]
+        assert contents['abc-news_headlines.json']['totalResults'] == 2
+        assert contents['bbc-news_headlines.json']['totalResults'] == 1
+
+    @patch('challenge.NetworkOperations.http_get')
+    def test_write_batched_source_headlines_batch_over_page_cap(self,
+                                                                http_get):
+        """a batch with more articles than max_pages can page through has
+        its sources fetched one at a time, so each source's file holds all
+        of its articles.
+        """
+
+        # Arrange
+        ids = ['abc-news', 'bbc-news', 'cnn']
+        hd_dir = '/tempdata/headlines'
+
+        # every source has 3 articles, served 2 to a page
+        def page(sources, page_number):
+            source_ids = sources.split(",")
+            articles = [{'source': {'id': source_id},
+                         'title': "{} {}".format(source_id, index)}
+                        for source_id in source_ids for index in range(3)]
+            body = {'status': 'ok',
+                    'totalResults': len(articles),
+                    'articles': articles[(page_number - 1) * 2:
+                                         page_number * 2]}
+            response = MagicMock()
+            response.status_code = 200
+            response.json.return_value = body
+            response.iter_content.side_effect = lambda chunk_size: iter(
+                [json.dumps(body).encode('utf-8')])
+            return response
+
+        def headline_func(sources, api_key=None, page_size=None):
+            return page(sources, 1)
+
+        def get_page(url):
+            params = dict(param.split("=") for param in url.split("&"))
+            return page(params['sources'], int(params['page']))
+
+        http_get.side_effect = lambda url: get_page(url.split("?")[-1])
+
+        with Patcher() as patcher:
+            # setup pyfakefs - the fake filesystem
+            patcher.setUp()
+
+            # create a fake filesystem directory to test the method
+            patcher.fs.create_dir(hd_dir)
+
+            # Act
+            result = c.FileStorage.write_batched_source_headlines(
+                ids, hd_dir, 'key', headline_func, page_size=2, max_pages=2)
+            contents = {}
+            for fname in os.listdir(hd_dir):
+                with open(os.path.join(hd_dir, fname)) as json_file:
+                    contents[fname.split("_", 1)[1]] = json.load(json_file)
+
+            # clean up and remove the fake filesystem
+            patcher.tearDown()
+
+        # Assert
+        assert result is True
+        assert sorted(contents) == ['abc-news_headlines.json',
+                                    'bbc-news_headlines.json',
+                                    'cnn_headlines.json']
+        for source_id in ids:
+            headlines = contents[source_id + '_headlines.json']
+            assert headlines['totalResults'] == 3
+            assert [article['title'] for article in headlines['articles']] \
+                == ["{} {}".format(source_id, index) for index in range(3)]
+
+    def test_write_articles_to_file_streams_articles(self):
+        """articles from an iterable are written as a single headlines json
+        whose totalResults counts the written articles.
+        """
+
+        # Arrange
+        hd_dir = '/tempdata/headlines'
+        articles = ({'title': "headline {}".format(index)}
+                    for index in range(3))
+
+        with Patcher() as patcher:
+            # setup pyfakefs - the fake filesystem
+            patcher.setUp()
+
+            # create a fake filesystem directory to test the method
+            patcher.fs.create_dir(hd_dir)
+
+            # Act
+            result = c.FileStorage.write_articles_to_file(articles,
+                                                          hd_dir,
+                                                          "cnn_headlines")
+            files = os.listdir(hd_dir)
+            with open(os.path.join(hd_dir, files[0])) as json_file:
+                content = json.load(json_file)
+
+            # clean up and remove the fake filesystem
+            patcher.tearDown()
+
+        # Assert
+        assert result is True
+        assert len(files) == 1
+        assert files[0].endswith("_cnn_headlines.json")
+        assert content['totalResults'] == 3
+        assert content['articles'][2] == {'title': "headline 2"}
+
+    def test_write_articles_to_file_bad_article_leaves_no_file(self):
+        """an article that is not valid json aborts the write without
+        leaving a partial file behind.
+        """
+
+        # Arrange
+        hd_dir = '/tempdata/headlines'
+        articles = [{'title': "headline"}, {'title': object()}]
+
+        with Patcher() as patcher:
+            # setup pyfakefs - the fake filesystem
+            patcher.setUp()
+
+            # create a fake filesystem directory to test the method
+            patcher.fs.create_dir(hd_dir)
+
+            # Act
+            with pytest.raises(ValueError) as err:
+                c.FileStorage.write_articles_to_file(articles,
+                                                     hd_dir,
+                                                     "cnn_headlines")
+            files = os.listdir(hd_dir)
+
+            # clean up and remove the fake filesystem
+            patcher.tearDown()
+
+        # Assert
+        assert "not Valid JSON" in str(err.value)
+        assert files == []
+
+    def test_write_response_to_file_writes_raw_body(self):
+        """the response body is written unchanged and its json returned."""
+
+        # Arrange
+        news_dir = '/tempdata/news'
+        body = [b'{"status": "ok", ', b'"sources": [{"id": "caf\xc3\xa9"}]}']
+        response = MagicMock()
+        response.iter_content.return_value = iter(body)
+
+        with Patcher() as patcher:
+            # setup pyfakefs - the fake filesystem
+            patcher.setUp()
+
+            # create a fake filesystem directory to test the method
+            patcher.fs.create_dir(news_dir)
+
+            # Act
+            result = c.FileStorage.write_response_to_file(response,
+                                                          news_dir,
+                                                          "news")
+            files = os.listdir(news_dir)
+            with open(os.path.join(news_dir, files[0]), 'rb') as json_file:
+                content = json_file.read()
+
+            # clean up and remove the fake filesystem
+            patcher.tearDown()
+
+        # Assert
+        assert result == {"status": "ok", "sources": [{"id": "café"}]}
+        assert len(files) == 1
+        assert files[0].endswith("_news.json")
+        assert content == b"".join(body)
+
+    def test_write_response_to_file_fails_with_bad_data(self):
+        """a response body that is not json is rejected and not kept."""
+
+        # Arrange
+        news_dir = '/tempdata/news'
+        response = MagicMock()
+        response.iter_content.return_value = iter([b'<html>error</html>'])
+
+        with Patcher() as patcher:
+            # setup pyfakefs - the fake filesystem
+            patcher.setUp()
+
+            # create a fake filesystem directory to test the method
+            patcher.fs.create_dir(news_dir)
+
+            # Act
+            with pytest.raises(ValueError) as err:
+                c.FileStorage.write_response_to_file(response,
+                                                     news_dir,
+                                                     "news")
+            files = os.listdir(news_dir)
+
+            # clean up and remove the fake filesystem
+            patcher.tearDown()
+
+        # Assert
+        assert "Data is not Valid JSON" in str(err.value)
+        assert files == []
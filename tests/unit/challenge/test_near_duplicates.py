@@ -0,0 +1,126 @@
+"""Tempus Data Engineer Challenge  - Unit Tests.
+
+Defines unit tests for the clustering of near-duplicate news articles in
+the transform task performed in the DAGs.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from unittest.mock import patch
+
+from dags import challenge as c
+
+
+@pytest.mark.nearduplicatetests
+class TestNearDuplicates:
+    """test the MinHash signatures and LSH clusters of news articles."""
+
+    @pytest.fixture(scope='function')
+    def headlines_frame(self) -> pd.DataFrame:
+        """returns a pytest resource - headlines holding a story syndicated
+        by three news sources, and two other stories."""
+
+        story = ("Stocks rally as central bank holds interest rates steady "
+                 "amid signs that inflation is cooling across the economy")
+        return pd.DataFrame({
+            'news_title': ["Stocks rally as rates held",
+                           "Football club signs new striker",
+                           "Stocks rally as rates held - Reuters",
+                           None,
+                           "Stocks Rally As Rates Held!",
+                           "Volcano erupts on remote island"],
+            'news_description': [story,
+                                 "The club confirmed the transfer fee "
+                                 "on Tuesday after a medical.",
+                                 story + " and markets",
+                                 None,
+                                 story,
+                                 "Residents were evacuated as ash fell "
+                                 "over nearby villages."]},
+            index=[0, 1, 0, 1, 2, 0])
+
+    def test_shingle_hashes_succeeds(self):
+        """shingles ignore case and punctuation, a short text is one
+        shingle, and a text without words has none."""
+
+        # Arrange
+        texts = ["Stocks, rally: as RATES held", "stocks rally as rates held",
+                 "Breaking", " - "]
+        words = [c.NearDuplicates.words(text) for text in texts]
+        lengths = np.array([len(text_words) for text_words in words])
+        flat_hashes = c.NearDuplicates.word_hashes(
+            [word for text_words in words for word in text_words])
+
+        # Act
+        shingles, counts = c.NearDuplicates.shingle_hashes(flat_hashes,
+                                                           lengths)
+
+        # Assert
+        assert list(counts) == [3, 3, 1, 0]
+        assert list(shingles[:3]) == list(shingles[3:6])
+        assert len(set(shingles[:3])) == 3
+        assert shingles[6] not in shingles[:3]
+
+    def test_signatures_estimate_similarity_succeeds(self):
+        """identical texts share their signature, and unrelated texts share
+        almost none of it."""
+
+        # Arrange
+        texts = ["the quick brown fox jumps over the lazy dog",
+                 "The quick brown fox jumps over the lazy dog.",
+                 "an entirely different sentence about markets and rates"]
+
+        # Act
+        signatures, has_words = c.NearDuplicates.signatures(texts)
+
+        # Assert
+        assert (signatures[0] == signatures[1]).all()
+        assert (signatures[0] == signatures[2]).mean() < 0.2
+        assert has_words.all()
+
+    def test_cluster_headlines_cluster_succeeds(self, headlines_frame):
+        """near-duplicates share a cluster id, numbered in the order of
+        their first article, and articles without text have their own."""
+
+        # Act
+        clustered = c.NearDuplicates.cluster_headlines(headlines_frame,
+                                                       'cluster')
+
+        # Assert
+        assert list(clustered[c.CLUSTER_COLUMN]) == [0, 1, 0, 2, 0, 3]
+        assert list(clustered.index) == list(headlines_frame.index)
+
+    def test_cluster_headlines_collapse_succeeds(self, headlines_frame):
+        """only the first article of each cluster is kept."""
+
+        # Act
+        collapsed = c.NearDuplicates.cluster_headlines(headlines_frame,
+                                                       'collapse')
+
+        # Assert
+        assert list(collapsed['news_title'].fillna("")) == [
+            "Stocks rally as rates held", "Football club signs new striker",
+            "", "Volcano erupts on remote island"]
+
+    def test_cluster_headlines_turned_off_succeeds(self, headlines_frame):
+        """with clustering turned off the headlines are returned as they
+        are."""
+
+        # Act
+        with patch.object(c.dedup.near_duplicates, 'NEAR_DUPLICATE_MODE',
+                          'off'):
+            result = c.NearDuplicates.cluster_headlines(headlines_frame)
+
+        # Assert
+        assert result is headlines_frame
+
+    def test_cluster_headlines_bad_mode_fails(self, headlines_frame):
+        """only the known near-duplicate modes can be selected."""
+
+        # Assert
+        with pytest.raises(ValueError) as err:
+            c.NearDuplicates.cluster_headlines(headlines_frame, 'merge')
+
+        assert "not valid near-duplicate mode" in str(err.value)
@@ -5,6 +5,8 @@ task to call remote News APIs methods performs in the DAGs.
 """
 
 import datetime
+import json
+import os
 import pytest
 import requests
 
@@ -46,8 +48,9 @@ class TestNetworkOperations:
         # Arrange
         # response object returns an OK status code
         response_obj.status_code = requests.codes.ok
-        # configure call to the Response object's json() to return dummy data
-        response_obj.json.side_effect = lambda: {"key": "value"}
+        # configure the Response object's body to be dummy json data
+        response_obj.iter_content.side_effect = lambda chunk_size: iter(
+            [b'{"key": ', b'"value"}'])
         # configure Response object 'encoding' attribute
         response_obj.encoding = "utf-8"
         # retrieve the path to the folder the json file is saved to
@@ -76,6 +79,47 @@ class TestNetworkOperations:
         # Assert
         assert result[0] is True
 
+    @pytest.mark.parametrize("body", [
+        [b'<html><body>', b'Bad Gateway</body></html>'],
+        [b'{"status": "ok", "sources": [', b'{"id": "cnn"']
+    ])
+    @patch('requests.Response', autospec=True)
+    def test_get_news_invalid_json_body_fails(self, response_obj, body):
+        """an OK response whose body is not valid json, e.g. an error page or
+        a truncated body, raises an error and leaves no sources file."""
+
+        # Arrange
+        # response object returns an OK status code
+        response_obj.status_code = requests.codes.ok
+        # configure the Response object's body to be invalid json data
+        response_obj.iter_content.side_effect = lambda chunk_size: iter(body)
+        response_obj.encoding = "utf-8"
+        # retrieve the path to the folder the json file is saved to
+        path = c.FileStorage.get_news_directory("tempus_challenge_dag")
+        os_environ_variable = "tempus_challenge_dag"
+
+        with Patcher() as patcher:
+            # setup pyfakefs - the fake filesystem
+            patcher.setUp()
+
+            # create a fake filesystem directory to test the method
+            patcher.fs.create_dir(path)
+
+        # Act
+            with pytest.raises(ValueError) as err:
+                c.NetworkOperations.get_news(response_obj,
+                                             news_dir=path,
+                                             gb_var=os_environ_variable)
+            files = os.listdir(path)
+
+            # clean up and remove the fake filesystem
+            patcher.tearDown()
+
+        # Assert
+        actual_message = str(err.value)
+        assert "Data is not Valid JSON" in actual_message
+        assert files == []
+
     @patch('requests.PreparedRequest', autospec=True)
     @patch('requests.Response', autospec=True)
     def test_get_news_keyword_headlines_succeeds(self,
@@ -94,9 +138,9 @@ class TestNetworkOperations:
         # response object returns an OK status code
         response.status_code = requests.codes.ok
 
-        # configure call to the Response object's json() to return dummy data
-        response.json.side_effect = lambda: {"headline":
-                                             "Tempus solves Cancer"}
+        # configure the Response object's body to be dummy json data
+        response.iter_content.side_effect = lambda chunk_size: iter(
+            [b'{"headline": "Tempus solves Cancer"}'])
 
         # configure Response object 'encoding' attribute
         response.encoding = "utf-8"
@@ -312,3 +356,208 @@ class TestNetworkOperations:
         # Assert
         actual_message = str(err.value)
         assert "No News API Key found" in actual_message
+
+    def test_get_http_session_reuses_pooled_session(self):
+        """repeated calls return the same keep-alive session and its
+        connection pool is sized as requested."""
+
+        # Act
+        first_session = c.NetworkOperations.get_http_session(pool_size=4)
+        second_session = c.NetworkOperations.get_http_session(pool_size=4)
+        adapter = first_session.get_adapter("https://newsapi.org")
+
+        # Assert
+        assert first_session is second_session
+        assert adapter._pool_maxsize == 4
+
+    def test_get_http_session_resized_on_new_pool_size(self):
+        """asking for a different pool size replaces the shared session."""
+
+        # Act
+        first_session = c.NetworkOperations.get_http_session(pool_size=2)
+        second_session = c.NetworkOperations.get_http_session(pool_size=3)
+
+        # Assert
+        assert first_session is not second_session
+        assert c.NetworkOperations.http_session is second_session
+
+    @patch('dags.challenge.NetworkOperations.get_response_cache',
+           return_value=None)
+    @patch('requests.Session.get', autospec=True)
+    def test_get_source_headlines_uses_shared_session(self,
+                                                      session_get,
+                                                      get_cache):
+        """without an explicit http method the request goes over the shared
+        session with a timeout set."""
+
+        # Arrange
+        response_obj = MagicMock(spec=requests.Response)
+        response_obj.status_code = requests.codes.ok
+        session_get.return_value = response_obj
+
+        # Act
+        result = c.NetworkOperations.get_source_headlines("abc-news",
+                                                          api_key="key")
+
+        # Assert
+        assert result.status_code == requests.codes.ok
+        session, url = session_get.call_args[0]
+        assert session is c.NetworkOperations.get_http_session()
+        assert url.endswith("sources=abc-news&apiKey=key")
+        assert session_get.call_args[1]['timeout'] is not None
+
+    @patch('requests.get', autospec=True)
+    def test_get_source_headlines_multiple_sources_with_page_size(self,
+                                                                  request):
+        """several comma-separated source ids and a page size are sent in a
+        single request.
+        """
+
+        # Arrange
+        header = "https://newsapi.org/v2/top-headlines?"
+        expected_call = "".join([header,
+                                 "sources=abc-news,bbc-news&pageSize=100",
+                                 "&apiKey=key"])
+
+        # Act
+        c.NetworkOperations.get_source_headlines("abc-news,bbc-news",
+                                                 header,
+                                                 request,
+                                                 "key",
+                                                 page_size=100)
+
+        # Assert
+        request.assert_called_with(expected_call)
+
+    def test_iter_headline_articles_walks_all_pages(self):
+        """articles of every page are yielded until totalResults is reached
+        """
+
+        # Arrange
+        requested_urls = []
+
+        def http_method(url):
+            requested_urls.append(url)
+            page = int(url.split("page=")[1].split("&")[0])
+            count = 2 if page < 3 else 1
+            response = MagicMock(spec=requests.Response)
+            response.status_code = requests.codes.ok
+            response.json.return_value = {
+                'status': 'ok',
+                'totalResults': 5,
+                'articles': [{'title': (page, index)}
+                             for index in range(count)]}
+            return response
+
+        # Act
+        articles = list(c.NetworkOperations.iter_headline_articles(
+            "key", sources="cnn", page_size=2, http_method=http_method))
+
+        # Assert
+        assert len(articles) == 5
+        assert len(requested_urls) == 3
+        assert "sources=cnn&pageSize=2&page=3&apiKey=key" in requested_urls[2]
+
+    def test_iter_headline_articles_stops_at_max_pages(self):
+        """no more than max_pages pages are requested."""
+
+        # Arrange
+        response = MagicMock(spec=requests.Response)
+        response.status_code = requests.codes.ok
+        response.json.return_value = {'status': 'ok',
+                                      'totalResults': 1000,
+                                      'articles': [{'title': 'a'}]}
+        http_method = MagicMock(return_value=response)
+
+        # Act
+        articles = list(c.NetworkOperations.iter_headline_articles(
+            "key", query="cancer", page_size=1, max_pages=4,
+            http_method=http_method))
+
+        # Assert
+        assert len(articles) == 4
+        assert http_method.call_count == 4
+        assert "q=cancer" in http_method.call_args[0][0]
+
+    def test_iter_headline_articles_stops_on_failed_page(self):
+        """paging stops quietly when a page request fails."""
+
+        # Arrange
+        first_page = {'status': 'ok',
+                      'totalResults': 10,
+                      'articles': [{'title': 'a'}, {'title': 'b'}]}
+        response = MagicMock(spec=requests.Response)
+        response.status_code = requests.codes.too_many_requests
+        http_method = MagicMock(return_value=response)
+
+        # Act
+        articles = list(c.NetworkOperations.iter_headline_articles(
+            "key", sources="cnn", page_size=2, first_page=first_page,
+            http_method=http_method))
+
+        # Assert
+        assert articles == first_page['articles']
+        assert http_method.call_count == 1
+
+    def test_iter_headline_articles_no_sources_or_query_fails(self):
+        """either news sources or a query keyword are required."""
+
+        # Act
+        with pytest.raises(ValueError) as err:
+            list(c.NetworkOperations.iter_headline_articles("key"))
+
+        # Assert
+        assert "Either 'sources' or 'query'" in str(err.value)
+
+    @patch.dict('os.environ', {'NEWS_API_KEY': 'key'})
+    @patch('dags.challenge.NetworkOperations.http_get')
+    @patch('requests.PreparedRequest', autospec=True)
+    @patch('requests.Response', autospec=True)
+    def test_get_news_keyword_headlines_fetches_remaining_pages(self,
+                                                                response,
+                                                                request,
+                                                                http_get):
+        """a truncated keyword response has its remaining pages fetched and
+        all articles written to the keyword's headline file."""
+
+        # Arrange
+        response.status_code = requests.codes.ok
+        response.iter_content.side_effect = lambda chunk_size: iter(
+            [b'{"status": "ok", "totalResults": 3, ',
+             b'"articles": [{"title": "a"}, {"title": "b"}]}'])
+        request.path_url = "/v2/top-headlines?q=cancer&apiKey=543"
+        request.url = "https://newsapi.org/v2/top-headlines?q=cancer"
+        response.request = request
+
+        next_page = MagicMock()
+        next_page.status_code = requests.codes.ok
+        next_page.json.return_value = {'status': 'ok',
+                                       'totalResults': 3,
+                                       'articles': [{'title': 'c'}]}
+        http_get.return_value = next_page
+
+        path = c.FileStorage.get_headlines_directory(
+            "tempus_bonus_challenge_dag")
+
+        with Patcher() as patcher:
+            # setup pyfakefs - the fake filesystem
+            patcher.setUp()
+
+            # create a fake filesystem directory to test the method
+            patcher.fs.create_dir(path)
+
+            # Act
+            result = c.NetworkOperations.get_news_keyword_headlines(
+                response, headlines_dir=path)
+            files = os.listdir(path)
+            with open(os.path.join(path, files[0])) as json_file:
+                content = json.load(json_file)
+
+            # return to the real filesystem and clear pyfakefs resources
+            patcher.tearDown()
+
+        # Assert
+        assert result is True
+        assert "q=cancer&pageSize=2&page=2" in http_get.call_args[0][0]
+        assert content['totalResults'] == 3
+        assert [a['title'] for a in content['articles']] == ['a', 'b', 'c']
@@ -0,0 +1,199 @@
+"""Tempus Data Engineer Challenge  - Unit Tests.
+
+Defines unit tests for the output sinks the transformed news headlines
+are written out with in the DAGs.
+"""
+
+import gzip
+import os
+import pandas as pd
+import pytest
+import tempfile
+
+from unittest.mock import patch
+
+from dags import challenge as c
+
+
+@pytest.mark.outputsinktests
+class TestOutputSinks:
+    """test the output formats of the transformed headlines."""
+
+    @pytest.fixture(scope='function')
+    def headlines_frame(self) -> pd.DataFrame:
+        """returns a pytest resource - a typed headline DataFrame."""
+
+        sources = ["wired", "bbc-news", "wired", "wired"]
+        frame = pd.DataFrame({
+            'news_source_id': sources,
+            'news_source_name': [source.upper() for source in sources],
+            'news_author': ["Author", None, "Author", None],
+            'news_title': ["Title {}".format(index) for index in range(4)],
+            'news_description': ["line one\nline two"] * 4,
+            'news_url': ["https://example.com/{}".format(index)
+                         for index in range(4)],
+            'news_image_url': [None] * 4,
+            'news_publication_date': ["2018-10-0{}T00:00:00Z".format(day)
+                                      for day in range(1, 5)],
+            'news_content': ["content"] * 4}, dtype=object)
+
+        return c.TransformOperations.apply_headline_schema(frame)
+
+    def test_pipeline_formats_default_csv_succeeds(self):
+        """pipelines write csv files unless configured otherwise."""
+
+        # Arrange
+        pipeline_name = "tempus_challenge_dag"
+
+        # Act
+        with patch.dict(os.environ, {}, clear=False):
+            os.environ.pop('TEMPUS_CHALLENGE_DAG_OUTPUT_FORMATS', None)
+            formats = c.OutputSinks.pipeline_formats(pipeline_name)
+
+        # Assert
+        assert formats == ['csv']
+
+    def test_pipeline_formats_per_pipeline_succeeds(self):
+        """each pipeline reads its own output formats setting."""
+
+        # Arrange
+        settings = {'TEMPUS_BONUS_CHALLENGE_DAG_OUTPUT_FORMATS':
+                    "parquet, CSV"}
+
+        # Act
+        with patch.dict(os.environ, settings):
+            bonus_formats = c.OutputSinks.pipeline_formats(
+                "tempus_bonus_challenge_dag")
+            info_formats = c.NewsInfoDTO(
+                "tempus_bonus_challenge_dag").output_formats
+
+        # Assert
+        assert bonus_formats == info_formats == ['parquet', 'csv']
+
+    @pytest.mark.parametrize('setting', ["xml", ",", "csv,excel"])
+    def test_pipeline_formats_invalid_fails(self, setting):
+        """unknown or missing output formats are rejected."""
+
+        # Arrange
+        settings = {'TEMPUS_CHALLENGE_DAG_OUTPUT_FORMATS': setting}
+
+        # Assert
+        with patch.dict(os.environ, settings):
+            with pytest.raises(ValueError):
+                c.OutputSinks.pipeline_formats("tempus_challenge_dag")
+
+    def test_write_headlines_csv_and_parquet_succeeds(self, headlines_frame):
+        """one file per format is written, next to the csv file path, and
+        the Parquet file holds the same headlines."""
+
+        # Arrange
+        parquet = pytest.importorskip('pyarrow.parquet')
+
+        with tempfile.TemporaryDirectory() as csv_dir:
+            csv_path = os.path.join(csv_dir, "2018-10-01_top_headlines.csv")
+
+            # Act
+            paths = c.OutputSinks.write_headlines(headlines_frame, csv_path,
+                                                  ['csv', 'parquet'])
+            files = sorted(os.listdir(csv_dir))
+            parquet_frame = parquet.read_table(paths[1]).to_pandas()
+            csv_frame = pd.read_csv(paths[0], index_col=0)
+
+        # Assert
+        assert files == ["2018-10-01_top_headlines.csv",
+                         "2018-10-01_top_headlines.parquet"]
+        assert list(parquet_frame.columns) == list(headlines_frame.columns)
+        assert list(parquet_frame['news_title']) == \
+            list(headlines_frame['news_title'])
+        assert list(csv_frame['news_publication_date']) == \
+            ["2018-10-0{}T00:00:00Z".format(day) for day in range(1, 5)]
+
+    def test_parquet_sink_encoding_and_statistics_succeeds(self,
+                                                           headlines_frame):
+        """the source columns are dictionary-encoded, the row groups are
+        bounded and carry statistics, and the codec is applied."""
+
+        # Arrange
+        parquet = pytest.importorskip('pyarrow.parquet')
+        sink = c.ParquetSink(compression='zstd', row_group_rows=2)
+
+        with tempfile.TemporaryDirectory() as output_dir:
+            path = os.path.join(output_dir, "headlines.parquet")
+
+            # Act
+            sink.write(headlines_frame, path)
+            metadata = parquet.ParquetFile(path).metadata
+
+        # Assert
+        schema = [metadata.schema.column(index).name
+                  for index in range(metadata.num_columns)]
+        source_column = metadata.row_group(0).column(
+            schema.index('news_source_id'))
+        date_column = metadata.row_group(0).column(
+            schema.index('news_publication_date'))
+
+        assert metadata.num_rows == 4
+        assert metadata.num_row_groups == 2
+        assert any('DICTIONARY' in encoding
+                   for encoding in source_column.encodings)
+        assert source_column.compression == 'ZSTD'
+        assert date_column.statistics.has_min_max
+
+    def test_parquet_sink_bad_compression_fails(self):
+        """only the known compression codecs can be selected."""
+
+        # Arrange
+        pytest.importorskip('pyarrow')
+
+        # Assert
+        with pytest.raises(ValueError) as err:
+            c.ParquetSink(compression='lzma')
+
+        assert "not valid parquet compression" in str(err.value)
+
+    @pytest.mark.parametrize('compression,extension', [('none', '.csv'),
+                                                       ('gzip', '.csv.gz'),
+                                                       ('zstd', '.csv.zst')])
+    def test_csv_sink_compression_round_trip_succeeds(self,
+                                                      headlines_frame,
+                                                      compression,
+                                                      extension):
+        """compressed csv files take the suffix of their codec and hold the
+        same csv as an uncompressed one."""
+
+        # Arrange
+        if compression == 'zstd':
+            zstandard = pytest.importorskip('zstandard')
+
+        with tempfile.TemporaryDirectory() as csv_dir:
+            plain_path = os.path.join(csv_dir, "plain.csv")
+            c.CsvSink(compression='none').write(headlines_frame, plain_path)
+            with open(plain_path, 'rb') as plain_file:
+                expected = plain_file.read()
+
+            # Act
+            sink = c.CsvSink(compression=compression, level=5)
+            path = os.path.join(csv_dir, "out" + sink.extension)
+            sink.write(headlines_frame, path)
+
+            with open(path, 'rb') as output_file:
+                content = output_file.read()
+
+        # Assert
+        if compression == 'gzip':
+            content = gzip.decompress(content)
+        elif compression == 'zstd':
+            content = zstandard.ZstdDecompressor().decompressobj().\
+                decompress(content)
+
+        assert sink.extension == extension
+        assert content == expected
+
+    def test_csv_sink_bad_compression_fails(self):
+        """only the known csv compression codecs can be selected."""
+
+        # Assert
+        with pytest.raises(ValueError) as err:
+            c.CsvSink(compression='bzip2')
+
+        assert "not valid csv compression" in str(err.value)
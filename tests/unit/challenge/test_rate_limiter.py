@@ -0,0 +1,169 @@
+"""Tempus Data Engineer Challenge  - Unit Tests.
+
+Defines unit tests for the request throttling shared by the remote calls
+to the News API the DAGs make.
+"""
+
+import pytest
+import requests
+
+from unittest.mock import MagicMock
+
+from dags import challenge as c
+
+
+class FakeClock:
+    """clock whose time only moves when something sleeps on it."""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def time(self) -> float:
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.mark.networktests
+class TestRateLimiter:
+    """tests the token bucket and AIMD concurrency controller."""
+
+    @pytest.fixture
+    def clock(self) -> FakeClock:
+        """returns a pytest resource - a controllable clock."""
+        return FakeClock()
+
+    def make_response(self, status_code, headers=None):
+        """returns a real requests.Response with the given status."""
+
+        response = requests.Response()
+        response.status_code = status_code
+        response.headers.update(headers or {})
+
+        return response
+
+    def test_token_bucket_allows_burst_then_waits(self, clock):
+        """a full bucket lets a burst through, then paces at its rate."""
+
+        # Arrange
+        bucket = c.TokenBucket(rate=2, capacity=3,
+                               clock=clock.time, sleep=clock.sleep)
+
+        # Act
+        for _ in range(3):
+            bucket.acquire()
+        burst_sleeps = list(clock.sleeps)
+        bucket.acquire()
+
+        # Assert
+        assert burst_sleeps == []
+        assert clock.sleeps == [0.5]
+
+    def test_token_bucket_pause_holds_back_callers(self, clock):
+        """after a pause no token is handed out before it is over."""
+
+        # Arrange
+        bucket = c.TokenBucket(rate=10, capacity=10,
+                               clock=clock.time, sleep=clock.sleep)
+
+        # Act
+        bucket.pause(30)
+        bucket.acquire()
+
+        # Assert
+        assert clock.now >= 30
+
+    def test_aimd_controller_increases_when_healthy(self, clock):
+        """fast successful requests grow the concurrency limit."""
+
+        # Arrange
+        controller = c.AIMDController(initial=2, maximum=4,
+                                      latency_target=1.0, clock=clock.time)
+
+        # Act
+        for _ in range(20):
+            controller.record(0.1, True)
+
+        # Assert
+        assert controller.limit == 4
+
+    def test_aimd_controller_decreases_once_per_period(self, clock):
+        """a burst of failures cuts the limit once; later ones cut again."""
+
+        # Arrange
+        controller = c.AIMDController(initial=8, maximum=8,
+                                      latency_target=1.0, clock=clock.time)
+
+        # Act
+        controller.record(0.1, False)
+        controller.record(0.1, False)
+        limit_after_burst = controller.limit
+        clock.sleep(1.0)
+        controller.record(5.0, True)
+
+        # Assert
+        assert limit_after_burst == 4
+        assert controller.limit == 2
+
+    def test_retry_after_seconds_parses_header(self):
+        """Retry-After given in seconds is returned; a missing one gives the
+        default."""
+
+        # Arrange
+        throttled = self.make_response(429, {'Retry-After': '7'})
+        plain = self.make_response(429)
+
+        # Act
+        wait = c.NetworkOperations.retry_after_seconds(throttled)
+        default_wait = c.NetworkOperations.retry_after_seconds(plain, 3)
+
+        # Assert
+        assert wait == 7
+        assert default_wait == 3
+
+    def test_send_throttled_retries_after_too_many_requests(self, clock):
+        """a 429 response pauses the limiter for Retry-After and is
+        retried."""
+
+        # Arrange
+        session = MagicMock()
+        session.get.side_effect = [
+            self.make_response(429, {'Retry-After': '12'}),
+            self.make_response(200)]
+        bucket = c.TokenBucket(rate=10, capacity=10,
+                               clock=clock.time, sleep=clock.sleep)
+        controller = c.AIMDController(initial=2, clock=clock.time)
+
+        # Act
+        response = c.NetworkOperations.send_throttled(
+            session, "https://newsapi.org/v2/sources", (1, 1),
+            limiter=bucket, controller=controller)
+
+        # Assert
+        assert response.status_code == 200
+        assert session.get.call_count == 2
+        assert clock.now >= 12
+        assert controller.in_flight == 0
+
+    def test_send_throttled_gives_up_after_max_retries(self, clock):
+        """a request failing every time returns its last response."""
+
+        # Arrange
+        session = MagicMock()
+        session.get.return_value = self.make_response(503)
+        bucket = c.TokenBucket(rate=10, capacity=10,
+                               clock=clock.time, sleep=clock.sleep)
+        controller = c.AIMDController(initial=2, clock=clock.time)
+
+        # Act
+        response = c.NetworkOperations.send_throttled(
+            session, "https://newsapi.org/v2/sources", (1, 1),
+            limiter=bucket, controller=controller, max_retries=2)
+
+        # Assert
+        assert response.status_code == 503
+        assert session.get.call_count == 3
+        assert clock.sleeps == [1, 2]
@@ -0,0 +1,342 @@
+"""Tempus Data Engineer Challenge  - Unit Tests.
+
+Defines unit tests for the on-disk cache of News API responses used by
+the remote calls the DAGs make.
+"""
+
+import io
+import os
+import pytest
+import requests
+import tempfile
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock
+from unittest.mock import patch
+from urllib3.response import HTTPResponse
+
+from dags import challenge as c
+
+from pyfakefs.fake_filesystem_unittest import Patcher
+
+
+@pytest.mark.networktests
+class TestResponseCache:
+    """tests the persistent News API response cache."""
+
+    @pytest.fixture(scope='class')
+    def cache_dir_res(self) -> str:
+        """returns a pytest resource - path to a cache directory."""
+        return "/tempdata/http_cache"
+
+    def make_response(self, content, status_code=200, headers=None):
+        """returns a real requests.Response carrying the given content."""
+
+        response = requests.Response()
+        response.status_code = status_code
+        response._content = content
+        response.encoding = "utf-8"
+        response.headers.update(headers or {})
+
+        return response
+
+    def make_streamed_response(self, content):
+        """returns a real requests.Response whose body is not read yet, as
+        sent with stream=True."""
+
+        response = requests.Response()
+        response.status_code = 200
+        response.encoding = "utf-8"
+        response.raw = HTTPResponse(body=io.BytesIO(content),
+                                    preload_content=False)
+
+        return response
+
+    def test_normalize_url_strips_api_key_and_sorts_params(self):
+        """urls differing only in key and parameter order normalize alike."""
+
+        # Arrange
+        first_url = "https://NewsAPI.org/v2/top-headlines?sources=cnn&page=2" \
+                    "&apiKey=abc"
+        second_url = "https://newsapi.org/v2/top-headlines?apiKey=xyz&page=2" \
+                     "&sources=cnn"
+
+        # Act
+        first = c.ResponseCache.normalize_url(first_url)
+        second = c.ResponseCache.normalize_url(second_url)
+
+        # Assert
+        assert first == second
+        assert "abc" not in first
+        assert first == "https://newsapi.org/v2/top-headlines?page=2" \
+                        "&sources=cnn"
+
+    def test_put_then_get_returns_fresh_entry(self, cache_dir_res):
+        """a stored response is returned fresh and rebuilt as a Response."""
+
+        # Arrange
+        url = "https://newsapi.org/v2/top-headlines?sources=cnn&apiKey=abc"
+        response = self.make_response(b'{"status": "ok"}')
+
+        with Patcher() as patcher:
+            # setup pyfakefs - the fake filesystem
+            patcher.setUp()
+            cache = c.ResponseCache(cache_dir=cache_dir_res, ttl=60)
+
+            # Act
+            stored = cache.put(url, response)
+            entry = cache.get(url.replace("abc", "another-key"))
+            cached_response = cache.to_response(entry, url)
+
+            # clean up and remove the fake filesystem
+            patcher.tearDown()
+
+        # Assert
+        assert stored is True
+        assert cache.is_fresh(entry) is True
+        assert cached_response.status_code == requests.codes.ok
+        assert cached_response.json() == {"status": "ok"}
+
+    def test_put_skips_failed_responses(self, cache_dir_res):
+        """responses without an OK status are never cached."""
+
+        # Arrange
+        url = "https://newsapi.org/v2/top-headlines?sources=cnn"
+        response = self.make_response(b'{"status": "error"}', 429)
+
+        with Patcher() as patcher:
+            # setup pyfakefs - the fake filesystem
+            patcher.setUp()
+            cache = c.ResponseCache(cache_dir=cache_dir_res, ttl=60)
+
+            # Act
+            stored = cache.put(url, response)
+            entry = cache.get(url)
+
+            # clean up and remove the fake filesystem
+            patcher.tearDown()
+
+        # Assert
+        assert stored is False
+        assert entry is None
+
+    def test_stale_entry_has_conditional_headers(self, cache_dir_res):
+        """a stale entry is revalidated with its ETag and Last-Modified."""
+
+        # Arrange
+        url = "https://newsapi.org/v2/sources?language=en"
+        headers = {'ETag': '"abc"',
+                   'Last-Modified': 'Mon, 22 Oct 2018 00:00:00 GMT'}
+        response = self.make_response(b'{}', headers=headers)
+
+        with Patcher() as patcher:
+            # setup pyfakefs - the fake filesystem
+            patcher.setUp()
+            cache = c.ResponseCache(cache_dir=cache_dir_res, ttl=0.01)
+            cache.put(url, response)
+            time.sleep(0.02)
+
+            # Act
+            entry = cache.get(url)
+            conditional = cache.conditional_headers(entry)
+
+            # clean up and remove the fake filesystem
+            patcher.tearDown()
+
+        # Assert
+        assert cache.is_fresh(entry) is False
+        assert conditional == {
+            'If-None-Match': '"abc"',
+            'If-Modified-Since': 'Mon, 22 Oct 2018 00:00:00 GMT'}
+
+    def test_evict_removes_least_recently_used(self, cache_dir_res):
+        """once over its size bound, the least recently used entries go."""
+
+        # Arrange
+        urls = ["https://newsapi.org/v2/top-headlines?sources={}".format(name)
+                for name in ['a', 'b', 'c']]
+        body = b'x' * 1000
+
+        with Patcher() as patcher:
+            # setup pyfakefs - the fake filesystem
+            patcher.setUp()
+            cache = c.ResponseCache(cache_dir=cache_dir_res,
+                                    ttl=60,
+                                    max_bytes=2600)
+            cache.put(urls[0], self.make_response(body))
+            cache.put(urls[1], self.make_response(body))
+
+            # use the first entry, making the second the least recent
+            _, meta_path = cache.paths(urls[1])
+            os.utime(meta_path, (0, 0))
+            cache.get(urls[0])
+
+            # Act
+            cache.put(urls[2], self.make_response(body))
+            remaining = [cache.get(url) is not None for url in urls]
+            size = cache.size()
+
+            # clean up and remove the fake filesystem
+            patcher.tearDown()
+
+        # Assert
+        assert remaining == [True, False, True]
+        assert size <= 2600
+
+    def test_http_get_serves_fresh_entry_without_request(self,
+                                                         cache_dir_res):
+        """a fresh cached response means no remote call is made."""
+
+        # Arrange
+        url = "https://newsapi.org/v2/top-headlines?sources=cnn&apiKey=abc"
+        session = MagicMock()
+        session.get.return_value = self.make_response(b'{"articles": []}')
+
+        with Patcher() as patcher:
+            # setup pyfakefs - the fake filesystem
+            patcher.setUp()
+            cache = c.ResponseCache(cache_dir=cache_dir_res, ttl=60)
+
+            # Act
+            first = c.NetworkOperations.http_get(url, session, cache=cache)
+            second = c.NetworkOperations.http_get(url, session, cache=cache)
+
+            # clean up and remove the fake filesystem
+            patcher.tearDown()
+
+        # Assert
+        assert session.get.call_count == 1
+        assert first.json() == second.json() == {"articles": []}
+
+    def test_http_get_revalidates_stale_entry(self, cache_dir_res):
+        """a stale entry confirmed by a 304 is served from the cache."""
+
+        # Arrange
+        url = "https://newsapi.org/v2/top-headlines?sources=cnn&apiKey=abc"
+        session = MagicMock()
+        session.get.side_effect = [
+            self.make_response(b'{"articles": []}', headers={'ETag': '"v1"'}),
+            self.make_response(b'', 304)]
+
+        with Patcher() as patcher:
+            # setup pyfakefs - the fake filesystem
+            patcher.setUp()
+            cache = c.ResponseCache(cache_dir=cache_dir_res, ttl=0.01)
+            c.NetworkOperations.http_get(url, session, cache=cache)
+            time.sleep(0.02)
+
+            # Act
+            response = c.NetworkOperations.http_get(url, session, cache=cache)
+            refreshed = cache.is_fresh(cache.get(url))
+
+            # clean up and remove the fake filesystem
+            patcher.tearDown()
+
+        # Assert
+        assert session.get.call_args[1]['headers'] == {'If-None-Match': '"v1"'}
+        assert response.status_code == requests.codes.ok
+        assert response.json() == {"articles": []}
+        assert refreshed is True
+
+    def test_http_get_streams_body_to_file_and_cache(self, cache_dir_res):
+        """a streamed body is cached as the caller writes it to file, and
+        the request holds its concurrency slot till then."""
+
+        # Arrange
+        url = "https://newsapi.org/v2/top-headlines?sources=cnn&apiKey=abc"
+        news_dir = "/tempdata/news"
+        body = b'{"status": "ok", "articles": []}'
+        session = MagicMock()
+        session.get.return_value = self.make_streamed_response(body)
+        controller = c.AIMDController(initial=2)
+
+        with Patcher() as patcher, \
+                patch.object(c.NetworkOperations, 'concurrency_controller',
+                             controller):
+            # setup pyfakefs - the fake filesystem
+            patcher.setUp()
+            patcher.fs.create_dir(news_dir)
+            cache = c.ResponseCache(cache_dir=cache_dir_res, ttl=60)
+
+            # Act
+            response = c.NetworkOperations.http_get(url, session, cache=cache)
+            cached_before = cache.get(url)
+            in_flight_before = controller.in_flight
+
+            result = c.FileStorage.write_response_to_file(response,
+                                                          news_dir,
+                                                          "cnn")
+            entry = cache.get(url)
+            files = os.listdir(news_dir)
+            with open(os.path.join(news_dir, files[0]), 'rb') as json_file:
+                content = json_file.read()
+
+            # clean up and remove the fake filesystem
+            patcher.tearDown()
+
+        # Assert
+        assert session.get.call_args[1]['stream'] is True
+        assert cached_before is None
+        assert in_flight_before == 1
+        assert result == {"status": "ok", "articles": []}
+        assert content == body
+        assert entry['content'] == body
+        assert controller.in_flight == 0
+
+    def test_put_drops_streamed_body_closed_unread(self, cache_dir_res):
+        """a streamed body closed before it was read through is not
+        cached."""
+
+        # Arrange
+        url = "https://newsapi.org/v2/top-headlines?sources=cnn"
+        response = self.make_streamed_response(b'{"status": "ok"}')
+
+        with Patcher() as patcher:
+            # setup pyfakefs - the fake filesystem
+            patcher.setUp()
+            cache = c.ResponseCache(cache_dir=cache_dir_res, ttl=60)
+
+            # Act
+            stored = cache.put(url, response)
+            response.close()
+            entry = cache.get(url)
+            files = os.listdir(cache_dir_res)
+
+            # clean up and remove the fake filesystem
+            patcher.tearDown()
+
+        # Assert
+        assert stored is True
+        assert entry is None
+        assert files == []
+
+    def test_put_streamed_bodies_concurrently_succeeds(self):
+        """streamed bodies stored and evicted from several threads at once
+        never fail on the files the other threads write or remove."""
+
+        # Arrange
+        body = b'{"status": "ok", "articles": []}' * 20
+        urls = ["https://newsapi.org/v2/top-headlines?sources=source-{}"
+                .format(number) for number in range(200)]
+
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cache = c.ResponseCache(cache_dir=cache_dir, ttl=60,
+                                    max_bytes=len(body) * 5)
+
+            def put_and_read(url):
+                response = self.make_streamed_response(body)
+                cache.put(url, response)
+                return response.content
+
+            # Act
+            with ThreadPoolExecutor(max_workers=8) as executor:
+                contents = list(executor.map(put_and_read, urls))
+            size = cache.size()
+            leftover_files = [name for name in os.listdir(cache_dir)
+                              if name.endswith(".tmp")]
+
+        # Assert
+        assert contents == [body] * len(urls)
+        assert size <= len(body) * 5 + 1000
+        assert leftover_files == []
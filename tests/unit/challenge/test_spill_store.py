@@ -0,0 +1,88 @@
+"""Tempus Data Engineer Challenge  - Unit Tests.
+
+Defines unit tests for the temporary columnar files partial headline
+DataFrames are spilled to by the transform task performed in the DAGs.
+"""
+
+import os
+import pandas as pd
+import pytest
+import tempfile
+
+from unittest.mock import patch
+
+from dags import challenge as c
+
+
+@pytest.mark.spillstoretests
+class TestSpillStore:
+    """test the spills of partial headline DataFrames."""
+
+    @pytest.fixture(scope='function')
+    def partial_frames(self) -> list:
+        """returns a pytest resource - partial headline DataFrames, each
+        indexed by the position of the article in its json file."""
+
+        return [pd.DataFrame({'news_author': ["Author", None],
+                              'news_title': ["Title 0", "Title 1"]}),
+                pd.DataFrame({'news_author': [None],
+                              'news_title': ["Title 2"]}),
+                pd.DataFrame({'news_author': ["Other", "Author", None],
+                              'news_title': ["Title 3", "Title 4",
+                                             "Title 5"]})]
+
+    def test_spill_and_merge_succeeds(self, partial_frames):
+        """spilled and held DataFrames are merged back in order, with their
+        index and missing values."""
+
+        # Arrange
+        pytest.importorskip('pyarrow')
+
+        with tempfile.TemporaryDirectory() as spill_dir:
+            store = c.SpillStore(spill_dir)
+
+            # Act
+            store.spill(partial_frames[:1])
+            # the only author of this spill is missing
+            store.spill(partial_frames[1:2])
+            merged = store.merge(partial_frames[2:])
+            spill_files = sorted(os.listdir(store.directory))
+
+            store.cleanup()
+            leftover_files = os.listdir(spill_dir)
+
+        # Assert
+        expected = pd.concat(partial_frames)
+        assert spill_files == ["spill_0.parquet", "spill_1.parquet"]
+        assert list(merged.index) == [0, 1, 0, 0, 1, 2]
+        assert list(merged['news_title']) == list(expected['news_title'])
+        assert list(merged['news_author'].isnull()) == \
+            list(expected['news_author'].isnull())
+        assert leftover_files == []
+
+    def test_merge_without_unify_schemas_succeeds(self, partial_frames):
+        """a pyarrow release without unify_schemas merges the spills in
+        pandas instead."""
+
+        # Arrange
+        pyarrow = pytest.importorskip('pyarrow')
+        missing = AttributeError("module 'pyarrow' has no attribute "
+                                 "'unify_schemas'")
+
+        with tempfile.TemporaryDirectory() as spill_dir:
+            store = c.SpillStore(spill_dir)
+            store.spill(partial_frames[:1])
+            store.spill(partial_frames[1:2])
+
+            # Act
+            with patch.object(pyarrow, 'unify_schemas', side_effect=missing):
+                merged = store.merge(partial_frames[2:])
+
+            store.cleanup()
+
+        # Assert
+        expected = pd.concat(partial_frames)
+        assert list(merged.index) == [0, 1, 0, 0, 1, 2]
+        assert list(merged['news_title']) == list(expected['news_title'])
+        assert list(merged['news_author'].isnull()) == \
+            list(expected['news_author'].isnull())
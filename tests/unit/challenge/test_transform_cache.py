@@ -0,0 +1,162 @@
+"""Tempus Data Engineer Challenge  - Unit Tests.
+
+Defines unit tests for the cache of flattened headline files used by the
+transform task performed in the DAGs.
+"""
+
+import os
+import pandas as pd
+import pytest
+
+from unittest.mock import patch
+
+from dags import challenge as c
+
+from pyfakefs.fake_filesystem_unittest import Patcher
+
+
+@pytest.mark.transformcachetests
+class TestTransformCache:
+    """test the partials and manifest of the transform cache."""
+
+    @pytest.fixture(scope='class')
+    def cache_dir_res(self) -> str:
+        """returns a pytest resource - path to a transform cache."""
+        return os.path.join('tempdata', 'tempus_challenge_dag',
+                            'transform_cache')
+
+    def test_file_hash_follows_content_succeeds(self):
+        """files of the same content share a hash, whatever their name."""
+
+        # Arrange
+        with Patcher() as patcher:
+            # setup pyfakefs - the fake filesystem
+            patcher.setUp()
+
+            patcher.fs.create_file("a_headlines.json", contents='{"a": 1}')
+            patcher.fs.create_file("b_headlines.json", contents='{"a": 1}')
+            patcher.fs.create_file("c_headlines.json", contents='{"a": 2}')
+
+            # Act
+            hashes = [c.TransformCache.file_hash(name)
+                      for name in ["a_headlines.json", "b_headlines.json",
+                                   "c_headlines.json"]]
+
+            # clean up and remove the fake filesystem
+            patcher.tearDown()
+
+        # Assert
+        assert hashes[0] == hashes[1]
+        assert hashes[0] != hashes[2]
+
+    def test_get_put_partial_succeeds(self, cache_dir_res):
+        """a stored partial is returned for a file of the same content."""
+
+        # Arrange
+        frame = pd.DataFrame({'news_title': ["one", "two"]})
+
+        with Patcher() as patcher:
+            # setup pyfakefs - the fake filesystem
+            patcher.setUp()
+
+            patcher.fs.create_file("a_headlines.json", contents='{"a": 1}')
+            patcher.fs.create_file("b_headlines.json", contents='{"a": 1}')
+            cache = c.TransformCache("tempus_challenge_dag", cache_dir_res)
+
+            # Act
+            digest, missed = cache.get("a_headlines.json")
+            cache.put(digest, frame)
+            hit_digest, hit = cache.get("b_headlines.json")
+            cached_files = os.listdir(cache_dir_res)
+
+            # clean up and remove the fake filesystem
+            patcher.tearDown()
+
+        # Assert
+        assert missed is None
+        assert hit_digest == digest
+        pd.testing.assert_frame_equal(hit, frame)
+        assert cached_files == [digest + ".pkl"]
+
+    def test_get_corrupt_partial_is_miss_succeeds(self, cache_dir_res):
+        """a partial that cannot be read is a cache miss."""
+
+        # Arrange
+        with Patcher() as patcher:
+            # setup pyfakefs - the fake filesystem
+            patcher.setUp()
+
+            patcher.fs.create_file("a_headlines.json", contents='{"a": 1}')
+            cache = c.TransformCache("tempus_challenge_dag", cache_dir_res)
+            digest = cache.file_hash("a_headlines.json")
+            patcher.fs.create_file(cache.partial_path(digest),
+                                   contents="not a pickle")
+
+            # Act
+            _, frame = cache.get("a_headlines.json")
+
+            # clean up and remove the fake filesystem
+            patcher.tearDown()
+
+        # Assert
+        assert frame is None
+
+    def test_save_manifest_reports_and_prunes_succeeds(self, cache_dir_res):
+        """the manifest reports the changed files and only the partials of
+        the run's files are kept."""
+
+        # Arrange
+        frame = pd.DataFrame({'news_title': ["one"]})
+
+        with Patcher() as patcher:
+            # setup pyfakefs - the fake filesystem
+            patcher.setUp()
+
+            patcher.fs.create_file("a_headlines.json", contents='{"a": 1}')
+            patcher.fs.create_file("b_headlines.json", contents='{"b": 1}')
+            first_run = c.TransformCache("tempus_challenge_dag",
+                                         cache_dir_res)
+            for name in ["a_headlines.json", "b_headlines.json"]:
+                digest, _ = first_run.get(name)
+                first_run.put(digest, frame)
+            first_report = first_run.save_manifest(["a_headlines.json",
+                                                    "b_headlines.json"])
+            stale_partial = first_run.partial_path(
+                first_run.digests["b_headlines.json"])
+
+            # the next run's 'b' source returned new headlines
+            with open("b_headlines.json", "w") as headline_file:
+                headline_file.write('{"b": 2}')
+            second_run = c.TransformCache("tempus_challenge_dag",
+                                          cache_dir_res)
+
+            # Act
+            _, unchanged = second_run.get("a_headlines.json")
+            digest, changed = second_run.get("b_headlines.json")
+            second_run.put(digest, frame)
+            second_report = second_run.save_manifest(["a_headlines.json",
+                                                      "b_headlines.json"])
+            stale_kept = os.path.exists(stale_partial)
+            manifest = second_run.load_manifest()
+
+            # clean up and remove the fake filesystem
+            patcher.tearDown()
+
+        # Assert
+        assert first_report == {'files': 2, 'changed': 2, 'unchanged': 0}
+        assert second_report == {'files': 2, 'changed': 1, 'unchanged': 1}
+        assert unchanged is not None
+        assert changed is None
+        assert stale_kept is False
+        assert manifest["b_headlines.json"] == digest
+
+    def test_enabled_turned_off_succeeds(self):
+        """the cache can be turned off."""
+
+        # Act
+        with patch.object(c.transform.transform_cache, 'TRANSFORM_CACHE',
+                          'off'):
+            enabled = c.TransformCache.enabled()
+
+        # Assert
+        assert enabled is False
@@ -5,11 +5,15 @@ the transforming the extracted of news data task performed in the DAGs.
 """
 
 import datetime
+import gzip
+import json
 import pandas as pd
 import pandas
 import os
 import pytest
+import tempfile
 
+from concurrent.futures import ThreadPoolExecutor
 from unittest.mock import MagicMock
 from unittest.mock import patch
 
@@ -20,6 +24,36 @@ from dags import challenge as c
 from pyfakefs.fake_filesystem_unittest import Patcher
 
 
+def merge_reader(path) -> dict:
+    """reads a dummy json file, named '<run>_<index>.json', for the merge
+    tests. Defined at module level so worker processes can unpickle it."""
+
+    if path.startswith('bad'):
+        raise ValueError("Error Decoding - Data is not Valid JSON")
+    return {'file': path}
+
+
+def merge_extract(data) -> dict:
+    """dummy news data extraction for the merge tests."""
+    return data
+
+
+def merge_transform(data) -> pd.DataFrame:
+    """dummy news data transformation for the merge tests."""
+    run, index = data['file'][0].split('.')[0].split('_')
+    return pd.DataFrame({'run': [int(run)], 'index': [int(index)]})
+
+
+def keyword_transform(json_file, csv_filename, reader, cache=None) -> tuple:
+    """dummy keyword file transformation for the parallel tests, failing
+    the 'bad' keyword files. Defined at module level so worker processes can
+    unpickle it."""
+
+    if 'error' in os.path.basename(json_file):
+        raise ValueError("Error Decoding - Data is not Valid JSON")
+    return 'bad' not in csv_filename, os.getpid()
+
+
 @pytest.mark.transformtests
 class TestTransformOperations:
     """test the functions for task to transform json headlines to csv."""
@@ -124,7 +158,8 @@ class TestTransformOperations:
 
             # calling the transformed DataFrame's to_csv() creates a new
             # csv file in the fake directory
-            transform_data_df.to_csv.side_effect = patcher.fs.create_file
+            transform_data_df.to_csv.side_effect = \
+                lambda path, **kwargs: patcher.fs.create_file(path)
 
         # Act
             result = tf_func(dummy_json_file,
@@ -190,6 +225,171 @@ class TestTransformOperations:
         expected_dataframe = pd.concat([data_df1, data_df2])
         assert expected_dataframe.equals(result)
 
+    def test_transform_jsons_to_dataframe_merger_skips_bad_json_succeeds(self):
+        """a json file that cannot be read is skipped, not merged twice."""
+
+        # Arrange
+
+        # Function Aliases
+        # use an alias since the length of the real function call when used
+        # is more than PEP-8's 79 line-character limit.
+        tf_func = c.TransformOperations.transform_jsons_to_dataframe_merger
+
+        json_files = ['file1.json', 'bad.json', 'file3.json']
+        data_df1 = pd.DataFrame({'A': ['A0', 'A1'], 'B': ['B0', 'B1'],
+                                 'C': ['C0', 'C1'], 'D': ['D0', 'D1']},
+                                index=[0, 1])
+        data_df3 = pd.DataFrame({'A': ['A2', 'A3'], 'B': ['B2', 'B3'],
+                                 'C': ['C2', 'C3'], 'D': ['D2', 'D3']},
+                                index=[2, 3])
+
+        def reader(path):
+            if path == 'bad.json':
+                raise ValueError("Error Decoding - Data is not Valid JSON")
+            return path
+
+        # setup a Mock of the extract and transform function dependencies
+        extract_func_mock = MagicMock(side_effect=lambda data: data)
+        tf_func_mock = MagicMock(side_effect=[data_df1, data_df3])
+
+        # Act
+        result = tf_func(json_files,
+                         reader,
+                         extract_func_mock,
+                         tf_func_mock)
+
+        # Assert
+        expected_dataframe = pd.concat([data_df1, data_df3])
+        assert tf_func_mock.call_count == 2
+        assert expected_dataframe.equals(result)
+
+    def test_transform_jsons_to_dataframe_merger_runs_twice_succeeds(self):
+        """a second run in the same process does not carry over the rows of
+        the first run."""
+
+        # Arrange
+
+        # Function Aliases
+        # use an alias since the length of the real function call when used
+        # is more than PEP-8's 79 line-character limit.
+        tf_func = c.TransformOperations.transform_jsons_to_dataframe_merger
+
+        data_df = pd.DataFrame({'A': ['A0', 'A1']}, index=[0, 1])
+
+        # setup a Mock of the extract and transform function dependencies
+        extract_func_mock = MagicMock(side_effect=lambda data: data)
+        tf_func_mock = MagicMock(side_effect=lambda data: data_df)
+
+        # Act
+        first = tf_func(['file1.json'], str, extract_func_mock, tf_func_mock)
+        second = tf_func(['file1.json'], str, extract_func_mock, tf_func_mock)
+
+        # Assert
+        assert data_df.equals(first)
+        assert data_df.equals(second)
+
+    def test_transform_jsons_to_dataframe_merger_in_threads_succeeds(self):
+        """concurrent runs in threads each merge only their own files."""
+
+        # Arrange
+
+        # Function Aliases
+        # use an alias since the length of the real function call when used
+        # is more than PEP-8's 79 line-character limit.
+        tf_func = c.TransformOperations.transform_jsons_to_dataframe_merger
+
+        # each run merges 50 files holding its own run number
+        runs = list(range(8))
+        files = {run: ["{}_{}.json".format(run, index)
+                       for index in range(50)] for run in runs}
+
+        def transform(data):
+            run, index = data['file'][0].split('.')[0].split('_')
+            return pd.DataFrame({'run': [int(run)], 'index': [int(index)]})
+
+        def merge(run):
+            return tf_func(files[run],
+                           lambda path: {'file': path},
+                           lambda data: data,
+                           transform)
+
+        # Act
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(merge, runs))
+
+        # Assert
+        for run, result in zip(runs, results):
+            assert list(result['run']) == [run] * 50
+            assert list(result['index']) == list(range(50))
+
+    @pytest.mark.parametrize('strategy', ['sequential', 'concat', 'tree'])
+    def test_transform_jsons_to_dataframe_merger_strategies_succeed(self,
+                                                                    strategy):
+        """every merge strategy merges the files in the order given."""
+
+        # Arrange
+        tf_func = c.TransformOperations.transform_jsons_to_dataframe_merger
+        json_files = ["1_{}.json".format(index) for index in range(9)]
+        json_files.insert(4, "bad_file.json")
+
+        # Act
+        result = tf_func(json_files,
+                         merge_reader,
+                         merge_extract,
+                         merge_transform,
+                         strategy=strategy,
+                         max_workers=3)
+
+        # Assert
+        assert list(result['index']) == list(range(9))
+        assert list(result['run']) == [1] * 9
+
+    def test_transform_jsons_to_dataframe_merger_tree_no_readable_json(self):
+        """a tree merge of only unreadable files returns an empty
+        DataFrame."""
+
+        # Arrange
+        tf_func = c.TransformOperations.transform_jsons_to_dataframe_merger
+
+        # Act
+        result = tf_func(["bad_1.json", "bad_2.json"],
+                         merge_reader,
+                         merge_extract,
+                         merge_transform,
+                         strategy='tree',
+                         max_workers=2)
+
+        # Assert
+        assert result.empty
+
+    def test_transform_jsons_to_dataframe_merger_bad_strategy_fails(self):
+        """only the known merge strategies can be selected."""
+
+        # Arrange
+        tf_func = c.TransformOperations.transform_jsons_to_dataframe_merger
+
+        # Assert
+        with pytest.raises(ValueError) as err:
+            tf_func(["1_0.json"], merge_reader, strategy='bubble')
+
+        assert "not valid merge strategy" in str(err.value)
+
+    def test_transform_jsons_to_dataframe_merger_no_readable_json_succeeds(
+            self):
+        """merging only unreadable json files returns an empty DataFrame."""
+
+        # Arrange
+        tf_func = c.TransformOperations.transform_jsons_to_dataframe_merger
+
+        def reader(path):
+            raise ValueError("Error Decoding - Data is not Valid JSON")
+
+        # Act
+        result = tf_func(['bad.json'], reader, MagicMock(), MagicMock())
+
+        # Assert
+        assert result.empty
+
     def test_helper_execute_json_transformation_for_one_json_succeeds(self):
         """transforming a set of jsons in a valid directory succeeds"""
 
@@ -210,8 +410,8 @@ class TestTransformOperations:
         # Mock out the behavior of the function under test, returns True
         # indicating the single json file passed in was successfully
         # converted to a csv
-        json_csv_func.side_effect = lambda files, name, reader: (True,
-                                                                 "success")
+        json_csv_func.side_effect = \
+            lambda files, name, reader, **kwargs: (True, "success")
 
         # setup pipeline information
         pipeline_name = "tempus_challenge_dag"
@@ -267,8 +467,10 @@ class TestTransformOperations:
         # Mock out the behavior of the function under test, returns True
         # indicating the single json file passed in was successfully
         # converted to a csv
-        json_csv_func.side_effect = lambda files, name, reader: True, "success"
-        jsons_df_func.side_effect = lambda files, reader: pd.DataFrame()
+        json_csv_func.side_effect = \
+            lambda files, name, reader, **kwargs: True, "success"
+        jsons_df_func.side_effect = \
+            lambda files, reader, **kwargs: pd.DataFrame()
         df_csv_func.side_effect = lambda dataframe, filename: True
 
         # setup pipeline information
@@ -581,7 +783,8 @@ class TestTransformOperations:
 
             # calling the transformed DataFrame's to_csv() creates a new
             # csv file in the fake directory
-            transformed_data_df.to_csv.side_effect = patcher.fs.create_file
+            transformed_data_df.to_csv.side_effect = \
+                lambda path, **kwargs: patcher.fs.create_file(path)
 
         # Act
             result = trnsfm_fnc(file_path,
@@ -635,7 +838,8 @@ class TestTransformOperations:
 
             # calling the transformed DataFrame's to_csv() fails and
             # doesn't created a new file in the fake directory
-            transformed_data_df.to_csv.side_effect = lambda *args: None
+            transformed_data_df.to_csv.side_effect = \
+                lambda *args, **kwargs: None
 
         # Act
             result = trnsfm_fnc(file_path,
@@ -685,7 +889,8 @@ class TestTransformOperations:
 
         # calling the transformed DataFrame's to_csv() creates a new
         # csv file in the fake directory
-        transform_data_df.to_csv.side_effect = lambda filepath: "no file"
+        transform_data_df.to_csv.side_effect = \
+            lambda filepath, **kwargs: "no file"
 
         # name and path to the file that will be created after transformation
         filename = str(datetime.datetime.now()) + "_" + "sample.csv"
@@ -756,7 +961,8 @@ class TestTransformOperations:
 
         # calling the transformed DataFrame's to_csv() creates a new
         # csv file in the fake directory
-        transform_data_df.to_csv.side_effect = lambda filepath: "no file"
+        transform_data_df.to_csv.side_effect = \
+            lambda filepath, **kwargs: "no file"
 
         # name and path to the file that will be created after transformation
         filename = str(datetime.datetime.now()) + "_" + "sample.csv"
@@ -843,7 +1049,8 @@ class TestTransformOperations:
 
             # calling the transformed DataFrame's to_csv() creates a new
             # csv file in the fake directory
-            transform_data_df.to_csv.side_effect = lambda filepath: "no file"
+            transform_data_df.to_csv.side_effect = \
+                lambda filepath, **kwargs: "no file"
 
         # Act
             result = tf_func(dummy_json_file,
@@ -1119,6 +1326,58 @@ class TestTransformOperations:
         # transformed to csv
         assert result is False
 
+    @pytest.mark.parametrize('keywords,expected', [
+        (['stuff1', 'stuff2', 'stuff3'], True),
+        (['stuff1', 'bad', 'stuff3'], False)])
+    def test_helper_execute_keyword_json_transformation_parallel(self,
+                                                                 keywords,
+                                                                 expected):
+        """keyword files flattened in a pool of worker processes give the
+        status of all the files."""
+
+        # Arrange
+        tfnc = c.TransformOperations.helper_execute_keyword_json_transformation
+
+        with tempfile.TemporaryDirectory() as headline_dir:
+            for keyword in keywords:
+                open(os.path.join(headline_dir,
+                                  'my_' + keyword + '_headlines.json'),
+                     'w').close()
+
+            # Act
+            with patch('challenge.transform.transform_cache.TRANSFORM_CACHE',
+                       'off'):
+                result = tfnc(directory=headline_dir,
+                              json_transfm_func=keyword_transform,
+                              max_workers=2)
+
+        # Assert
+        assert result is expected
+
+    def test_helper_execute_keyword_json_transformation_parallel_fails(self):
+        """an error flattening one keyword file in a worker process is
+        raised by the helper."""
+
+        # Arrange
+        tfnc = c.TransformOperations.helper_execute_keyword_json_transformation
+
+        with tempfile.TemporaryDirectory() as headline_dir:
+            for keyword in ['stuff1', 'error']:
+                open(os.path.join(headline_dir,
+                                  'my_' + keyword + '_headlines.json'),
+                     'w').close()
+
+            # Act
+            with patch('challenge.transform.transform_cache.TRANSFORM_CACHE',
+                       'off'):
+                with pytest.raises(ValueError) as err:
+                    tfnc(directory=headline_dir,
+                         json_transfm_func=keyword_transform,
+                         max_workers=2)
+
+        # Assert
+        assert "Data is not Valid JSON" in str(err.value)
+
     def test_transform_data_to_dataframe_fails(self):
         """conversion of a dictionary of news data into
         a Pandas Dataframe fails"""
@@ -1140,3 +1399,812 @@ class TestTransformOperations:
         # Assert
         actual_message = str(err.value)
         assert "news data argument cannot be empty" in actual_message
+
+    def write_headline_files(self, patcher, headline_dir, articles_per_file,
+                             published_at="2018-10-01T00:00:00Z"):
+        """creates headline json files in the fake filesystem, one per entry
+        of articles_per_file, of articles published at published_at, and
+        returns their paths."""
+
+        paths = []
+        for number, count in enumerate(articles_per_file):
+            articles = [{'source': {'id': "src-{}".format(number),
+                                    'name': "Source, {}".format(number)},
+                         'author': None if index % 2 else "Author",
+                         'title': 'Title "{}" – ünïcode'.format(index),
+                         'description': "line one\nline two",
+                         'url': "https://example.com/{}".format(index),
+                         'urlToImage': None,
+                         'publishedAt': published_at,
+                         'content': "content {}".format(index)}
+                        for index in range(count)]
+            path = os.path.join(headline_dir,
+                                "src-{}_headlines.json".format(number))
+            patcher.fs.create_file(path, contents=json.dumps(
+                {'status': 'ok', 'totalResults': count,
+                 'articles': articles}))
+            paths.append(path)
+
+        return paths
+
+    @pytest.mark.parametrize('articles_per_file', [[3], [3, 5, 4]])
+    def test_stream_mode_matches_dataframe_mode_succeeds(self,
+                                                         articles_per_file):
+        """the streamed csv is identical to the csv written from the merged
+        DataFrame."""
+
+        # Arrange
+        transfm_fnc = c.TransformOperations.helper_execute_json_transformation
+        pipeline_name = "tempus_challenge_dag"
+
+        with Patcher() as patcher:
+            # setup pyfakefs - the fake filesystem
+            patcher.setUp()
+
+            headline_dir = c.FileStorage.get_headlines_directory(pipeline_name)
+            csv_dir = c.FileStorage.get_csv_directory(pipeline_name)
+            patcher.fs.create_dir(csv_dir)
+            self.write_headline_files(patcher, headline_dir,
+                                      articles_per_file)
+            csv_path = os.path.join(csv_dir, "2018-10-01_top_headlines.csv")
+
+            # Act
+            transfm_fnc(headline_dir, "2018-10-01", mode='dataframe')
+            with open(csv_path, encoding="utf-8") as csv_file:
+                dataframe_csv = csv_file.read()
+            os.remove(csv_path)
+
+            transfm_fnc(headline_dir, "2018-10-01", mode='stream')
+            with open(csv_path, encoding="utf-8") as csv_file:
+                stream_csv = csv_file.read()
+            csv_files = os.listdir(csv_dir)
+
+            # clean up and remove the fake filesystem
+            patcher.tearDown()
+
+        # Assert
+        assert stream_csv == dataframe_csv
+        assert csv_files == ["2018-10-01_top_headlines.csv"]
+
+    @pytest.mark.parametrize('published_at', [
+        "2018-10-12T14:05:00.123456+02:00", "2018-10-12 09:00"])
+    def test_dataframe_mode_keeps_publication_dates_succeeds(self,
+                                                             published_at):
+        """dates of other forms than the News API's usual one are written
+        by the dataframe mode as given, as the stream mode writes them."""
+
+        # Arrange
+        transfm_fnc = c.TransformOperations.helper_execute_json_transformation
+        pipeline_name = "tempus_challenge_dag"
+
+        with Patcher() as patcher:
+            # setup pyfakefs - the fake filesystem
+            patcher.setUp()
+
+            headline_dir = c.FileStorage.get_headlines_directory(pipeline_name)
+            csv_dir = c.FileStorage.get_csv_directory(pipeline_name)
+            patcher.fs.create_dir(csv_dir)
+            self.write_headline_files(patcher, headline_dir, [2, 1],
+                                      published_at)
+            csv_path = os.path.join(csv_dir, "2018-10-01_top_headlines.csv")
+
+            # Act
+            transfm_fnc(headline_dir, "2018-10-01", mode='dataframe')
+            with open(csv_path, encoding="utf-8") as csv_file:
+                dataframe_csv = csv_file.read()
+            os.remove(csv_path)
+
+            transfm_fnc(headline_dir, "2018-10-01", mode='stream')
+            with open(csv_path, encoding="utf-8") as csv_file:
+                stream_csv = csv_file.read()
+
+            # clean up and remove the fake filesystem
+            patcher.tearDown()
+
+        # Assert
+        assert dataframe_csv == stream_csv
+        assert dataframe_csv.count(published_at) == 3
+
+    def test_stream_headlines_to_csv_flush_size_succeeds(self):
+        """the flush size changes when rows are written, not what is
+        written."""
+
+        # Arrange
+        tf_func = c.TransformOperations.stream_headlines_to_csv
+        pipeline_name = "tempus_challenge_dag"
+
+        with Patcher() as patcher:
+            # setup pyfakefs - the fake filesystem
+            patcher.setUp()
+
+            headline_dir = c.FileStorage.get_headlines_directory(pipeline_name)
+            csv_dir = c.FileStorage.get_csv_directory(pipeline_name)
+            patcher.fs.create_dir(csv_dir)
+            paths = self.write_headline_files(patcher, headline_dir, [7, 3])
+
+            # Act
+            outputs = []
+            for flush_rows in [1, 2, 1000]:
+                status, msg = tf_func(paths, "out.csv", pipeline_name,
+                                      flush_rows=flush_rows)
+                with open(os.path.join(csv_dir, "out.csv"),
+                          encoding="utf-8") as csv_file:
+                    outputs.append(csv_file.read())
+
+            # clean up and remove the fake filesystem
+            patcher.tearDown()
+
+        # Assert
+        assert status is True
+        assert outputs[0] == outputs[1] == outputs[2]
+        assert len(outputs[0].split("\n")) > 10
+
+    def test_stream_headlines_to_csv_no_articles_succeeds(self):
+        """json files without articles create no csv file."""
+
+        # Arrange
+        tf_func = c.TransformOperations.stream_headlines_to_csv
+        pipeline_name = "tempus_bonus_challenge_dag"
+
+        with Patcher() as patcher:
+            # setup pyfakefs - the fake filesystem
+            patcher.setUp()
+
+            headline_dir = c.FileStorage.get_headlines_directory(pipeline_name)
+            csv_dir = c.FileStorage.get_csv_directory(pipeline_name)
+            patcher.fs.create_dir(csv_dir)
+            paths = self.write_headline_files(patcher, headline_dir, [0])
+            bad_path = os.path.join(headline_dir, "bad_headlines.json")
+            patcher.fs.create_file(bad_path, contents="{not json")
+
+            # Act
+            status, msg = tf_func([bad_path] + paths, "out.csv",
+                                  pipeline_name)
+            csv_files = os.listdir(csv_dir)
+
+            # clean up and remove the fake filesystem
+            patcher.tearDown()
+
+        # Assert
+        assert status is True
+        assert "No News articles found" in msg
+        assert csv_files == []
+
+    def test_helper_execute_json_transformation_bad_mode_fails(self):
+        """only the known transform modes can be selected."""
+
+        # Arrange
+        transfm_fnc = c.TransformOperations.helper_execute_json_transformation
+
+        # Assert
+        with pytest.raises(ValueError) as err:
+            transfm_fnc("/dummy/dir/headlines", mode='magic')
+
+        assert "not valid transform mode" in str(err.value)
+
+    def test_headlines_json_to_dataframe_matches_extract_transform_succeeds(
+            self):
+        """the direct read gives the frame the extract-then-transform path
+        gives."""
+
+        # Arrange
+        tf_func = c.TransformOperations.headlines_json_to_dataframe
+        extract_func = c.ExtractOperations.extract_news_data_from_dataframe
+        transform_func = c.TransformOperations.transform_data_to_dataframe
+        pipeline_name = "tempus_challenge_dag"
+
+        with Patcher() as patcher:
+            # setup pyfakefs - the fake filesystem
+            patcher.setUp()
+
+            headline_dir = c.FileStorage.get_headlines_directory(pipeline_name)
+            path = self.write_headline_files(patcher, headline_dir, [4])[0]
+            news_data = c.FileStorage.json_to_dataframe_reader(path)
+
+            # Act
+            direct_df = tf_func(path)
+            expected_df = transform_func(extract_func(
+                pd.DataFrame([news_data])))
+
+            # clean up and remove the fake filesystem
+            patcher.tearDown()
+
+        # Assert
+        pandas.testing.assert_frame_equal(direct_df, expected_df)
+
+    def test_headlines_json_to_dataframe_no_articles_succeeds(self):
+        """a json file without articles gives an empty frame with the csv
+        columns."""
+
+        # Arrange
+        tf_func = c.TransformOperations.headlines_json_to_dataframe
+
+        def reader(path):
+            return {'status': 'ok', 'totalResults': 0}
+
+        # Act
+        result_df = tf_func("/dummy/headlines.json", reader)
+
+        # Assert
+        assert result_df.empty
+        assert list(result_df.columns) == c.transform.transform_operations.\
+            CSV_FIELD_NAMES
+
+    def test_transform_jsons_to_dataframe_merger_direct_read_succeeds(self):
+        """without extract and transform functions, the merger reads the
+        json files directly into the frame the extract-then-transform path
+        merges, and skips json files without articles."""
+
+        # Arrange
+        merge_func = c.TransformOperations.transform_jsons_to_dataframe_merger
+        extract_func = c.ExtractOperations.extract_news_data_from_dataframe
+        transform_func = c.TransformOperations.transform_data_to_dataframe
+        reader = c.FileStorage.json_to_dataframe_reader
+        pipeline_name = "tempus_challenge_dag"
+
+        with Patcher() as patcher:
+            # setup pyfakefs - the fake filesystem
+            patcher.setUp()
+
+            headline_dir = c.FileStorage.get_headlines_directory(pipeline_name)
+            paths = self.write_headline_files(patcher, headline_dir,
+                                              [3, 0, 5])
+
+            # Act
+            direct_df = merge_func(paths)
+            expected_df = merge_func([paths[0], paths[2]], reader,
+                                     extract_func, transform_func)
+
+            # clean up and remove the fake filesystem
+            patcher.tearDown()
+
+        # Assert
+        assert len(direct_df) == 8
+        pandas.testing.assert_frame_equal(direct_df, expected_df)
+
+    def test_apply_headline_schema_dtypes_succeeds(self):
+        """the news sources become categories and the publication dates
+        timestamps."""
+
+        # Arrange
+        tf_func = c.TransformOperations.apply_headline_schema
+        frame = pd.DataFrame({'news_source_id': ["wired", "wired", None],
+                              'news_source_name': ["Wired", "Wired", None],
+                              'news_title': ["one", "two", "three"],
+                              'news_publication_date': [
+                                  "2018-10-11T23:33:03Z", None,
+                                  "2018-10-12T01:00:00Z"]},
+                             dtype=object)
+
+        # Act
+        result_df = tf_func(frame)
+
+        # Assert
+        assert result_df['news_source_id'].dtype.name == 'category'
+        assert result_df['news_source_name'].dtype.name == 'category'
+        assert pandas.api.types.is_datetime64_any_dtype(
+            result_df['news_publication_date'])
+        assert result_df['news_publication_date'].isnull().sum() == 1
+        assert list(result_df['news_title']) == ["one", "two", "three"]
+
+    def test_apply_headline_schema_unparsable_dates_kept_succeeds(self):
+        """publication dates that are not timestamps are kept as text."""
+
+        # Arrange
+        tf_func = c.TransformOperations.apply_headline_schema
+        frame = pd.DataFrame({'news_publication_date': [
+            "2018-10-11T23:33:03Z", "yesterday"]}, dtype=object)
+
+        # Act
+        result_df = tf_func(frame)
+
+        # Assert
+        assert list(result_df['news_publication_date']) == [
+            "2018-10-11T23:33:03Z", "yesterday"]
+
+    def test_apply_headline_schema_other_date_forms_kept_succeeds(self):
+        """publication dates not all of the form the csv is written in are
+        kept as text, so none is rewritten."""
+
+        # Arrange
+        tf_func = c.TransformOperations.apply_headline_schema
+        dates = ["2018-10-11T23:33:03Z",
+                 "2018-10-12T14:05:00.123456+02:00",
+                 "2018-10-12 09:00",
+                 None]
+        frame = pd.DataFrame({'news_publication_date': dates}, dtype=object)
+
+        # Act
+        result_df = tf_func(frame)
+
+        # Assert
+        assert list(result_df['news_publication_date']) == dates
+
+    def test_apply_headline_schema_pyarrow_strings_succeeds(self):
+        """the 'pyarrow' string dtype stores the text columns in Arrow
+        string arrays."""
+
+        # Arrange
+        if c.transform.transform_operations.ARROW_STRING_DTYPE is None:
+            pytest.skip("Arrow strings need pyarrow and pandas 1.3 or newer")
+        tf_func = c.TransformOperations.apply_headline_schema
+        frame = pd.DataFrame({'news_title': ["one", None]}, dtype=object)
+
+        # Act
+        result_df = tf_func(frame, string_dtype='pyarrow')
+
+        # Assert
+        assert result_df['news_title'].dtype == 'string[pyarrow]'
+        assert result_df['news_title'][0] == "one"
+
+    @patch.object(c.transform.transform_operations, 'ARROW_STRING_DTYPE',
+                  None)
+    def test_apply_headline_schema_pyarrow_strings_unavailable(self):
+        """without Arrow strings, the 'pyarrow' string dtype leaves the text
+        columns as they are."""
+
+        # Arrange
+        tf_func = c.TransformOperations.apply_headline_schema
+        frame = pd.DataFrame({'news_title': ["one", None]}, dtype=object)
+
+        # Act
+        result_df = tf_func(frame, string_dtype='pyarrow')
+
+        # Assert
+        assert result_df['news_title'].dtype == object
+        assert result_df['news_title'][0] == "one"
+
+    def test_apply_headline_schema_bad_string_dtype_fails(self):
+        """only the known string dtypes can be selected."""
+
+        # Arrange
+        tf_func = c.TransformOperations.apply_headline_schema
+
+        # Assert
+        with pytest.raises(ValueError) as err:
+            tf_func(pd.DataFrame(), string_dtype='magic')
+
+        assert "not valid string dtype" in str(err.value)
+
+    def test_headline_memory_report_succeeds(self):
+        """the report compares the memory of the untyped and typed frames."""
+
+        # Arrange
+        tf_func = c.TransformOperations.headline_memory_report
+        frame = pd.DataFrame({'news_source_id': ["a-long-source-id"] * 500},
+                             dtype=object)
+        typed_frame = c.TransformOperations.apply_headline_schema(frame)
+
+        # Act
+        report = tf_func(frame, typed_frame)
+
+        # Assert
+        assert report['rows'] == 500
+        assert report['saved_bytes'] == report['object_bytes'] - \
+            report['typed_bytes']
+        assert report['ratio'] > 2
+
+    def test_transform_news_headlines_json_to_csv_date_format_succeeds(self):
+        """the publication dates are written in the format of the News API
+        even though they are held as timestamps."""
+
+        # Arrange
+        trnsfm_fnc = c.TransformOperations.transform_news_headlines_json_to_csv
+        pipeline_name = "tempus_challenge_dag"
+
+        with Patcher() as patcher:
+            # setup pyfakefs - the fake filesystem
+            patcher.setUp()
+
+            headline_dir = c.FileStorage.get_headlines_directory(pipeline_name)
+            csv_dir = c.FileStorage.get_csv_directory(pipeline_name)
+            patcher.fs.create_dir(csv_dir)
+            path = self.write_headline_files(patcher, headline_dir, [2])[0]
+
+            # Act
+            status, msg = trnsfm_fnc(path, "out.csv")
+            csv_frame = pd.read_csv(os.path.join(csv_dir, "out.csv"))
+
+            # clean up and remove the fake filesystem
+            patcher.tearDown()
+
+        # Assert
+        assert status is True
+        assert list(csv_frame['news_publication_date']) == [
+            "2018-10-01T00:00:00Z", "2018-10-01T00:00:00Z"]
+
+    def test_helper_execute_json_transformation_stream_parquet_fails(self):
+        """the 'stream' mode cannot write the Parquet output format."""
+
+        # Arrange
+        transfm_fnc = c.TransformOperations.helper_execute_json_transformation
+        settings = {'TEMPUS_CHALLENGE_DAG_OUTPUT_FORMATS': "csv,parquet"}
+
+        # Assert
+        with patch.dict(os.environ, settings):
+            with pytest.raises(ValueError) as err:
+                transfm_fnc("/dummy/dir/headlines", mode='stream')
+
+        assert "stream mode only writes csv" in str(err.value)
+
+    def test_stream_headlines_to_csv_gzip_succeeds(self):
+        """with csv compression selected, the streamed csv is compressed and
+        takes the suffix of its codec."""
+
+        # Arrange
+        tf_func = c.TransformOperations.stream_headlines_to_csv
+        pipeline_name = "tempus_challenge_dag"
+
+        with Patcher() as patcher:
+            # setup pyfakefs - the fake filesystem
+            patcher.setUp()
+
+            headline_dir = c.FileStorage.get_headlines_directory(pipeline_name)
+            csv_dir = c.FileStorage.get_csv_directory(pipeline_name)
+            patcher.fs.create_dir(csv_dir)
+            paths = self.write_headline_files(patcher, headline_dir, [3, 2])
+
+            # Act
+            tf_func(paths, "plain.csv", pipeline_name)
+            with patch('challenge.transform.output_sinks.CSV_COMPRESSION',
+                       'gzip'):
+                status, msg = tf_func(paths, "out.csv", pipeline_name)
+
+            csv_files = sorted(os.listdir(csv_dir))
+            with open(os.path.join(csv_dir, "plain.csv"), 'rb') as csv_file:
+                expected = csv_file.read()
+            with gzip.open(os.path.join(csv_dir, "out.csv.gz")) as csv_file:
+                content = csv_file.read()
+
+            # clean up and remove the fake filesystem
+            patcher.tearDown()
+
+        # Assert
+        assert status is True
+        assert csv_files == ["out.csv.gz", "plain.csv"]
+        assert content == expected
+
+    def test_helper_execute_json_transformation_reuses_cache_succeeds(self):
+        """a second run only flattens the headline files that changed, and
+        writes the same csv as a run without the cache."""
+
+        # Arrange
+        transfm_fnc = c.TransformOperations.helper_execute_json_transformation
+        pipeline_name = "tempus_challenge_dag"
+        extract_func = c.ExtractOperations.extract_article_values
+
+        with Patcher() as patcher:
+            # setup pyfakefs - the fake filesystem
+            patcher.setUp()
+
+            headline_dir = c.FileStorage.get_headlines_directory(pipeline_name)
+            csv_dir = c.FileStorage.get_csv_directory(pipeline_name)
+            patcher.fs.create_dir(csv_dir)
+            paths = self.write_headline_files(patcher, headline_dir,
+                                              [3, 4, 5])
+            csv_path = os.path.join(csv_dir, "2018-10-01_top_headlines.csv")
+
+            with patch('challenge.ExtractOperations.extract_article_values',
+                       side_effect=extract_func) as first_extract:
+                transfm_fnc(headline_dir, "2018-10-01")
+
+            # the next run's first source returned new headlines
+            os.remove(paths[0])
+            self.write_headline_files(patcher, headline_dir, [2])
+            os.remove(csv_path)
+
+            # Act
+            with patch('challenge.ExtractOperations.extract_article_values',
+                       side_effect=extract_func) as second_extract:
+                transfm_fnc(headline_dir, "2018-10-01")
+            with open(csv_path, encoding="utf-8") as csv_file:
+                cached_csv = csv_file.read()
+            os.remove(csv_path)
+
+            with patch('challenge.transform.transform_cache.TRANSFORM_CACHE',
+                       'off'):
+                transfm_fnc(headline_dir, "2018-10-01")
+            with open(csv_path, encoding="utf-8") as csv_file:
+                uncached_csv = csv_file.read()
+
+            # clean up and remove the fake filesystem
+            patcher.tearDown()
+
+        # Assert
+        assert first_extract.call_count == 12
+        assert second_extract.call_count == 2
+        assert cached_csv == uncached_csv
+        assert cached_csv.count("https://example.com/") == 2 + 4 + 5
+
+    def write_dated_headline_files(self, patcher, headline_dir, dates):
+        """creates headline json files in the fake filesystem, one per entry
+        of dates holding an article of each of its publication dates, and
+        returns their paths."""
+
+        paths = []
+        for number, file_dates in enumerate(dates):
+            articles = [{'source': {'id': "src-{}".format(number),
+                                    'name': "Source {}".format(number)},
+                         'author': "Author",
+                         'title': "Title {}-{}".format(number, index),
+                         'description': "line one\nline two",
+                         'url': "https://example.com/{}/{}".format(number,
+                                                                   index),
+                         'urlToImage': None,
+                         'publishedAt': date,
+                         'content': "content"}
+                        for index, date in enumerate(file_dates)]
+            path = os.path.join(headline_dir,
+                                "src-{}_headlines.json".format(number))
+            patcher.fs.create_file(path, contents=json.dumps(
+                {'status': 'ok', 'totalResults': len(articles),
+                 'articles': articles}))
+            paths.append(path)
+
+        return paths
+
+    @pytest.mark.parametrize('run_rows,fan_in', [(None, None), (1, 2),
+                                                 (2, 3)])
+    def test_sorted_headlines_to_csv_orders_by_date_succeeds(self,
+                                                             run_rows,
+                                                             fan_in):
+        """the csv holds the streamed rows ordered by publication date in
+        UTC, undated articles last, whatever the runs and merge passes."""
+
+        # Arrange
+        tf_func = c.TransformOperations.sorted_headlines_to_csv
+        pipeline_name = "tempus_challenge_dag"
+        dates = [["2018-10-03T00:00:00Z", "2018-10-01T00:00:00Z",
+                  "not a date"],
+                 ["2018-10-02T00:00:00Z", "2018-10-01T00:00:00Z"],
+                 ["2018-10-01T05:00:00+06:00", "2018-10-04T00:00:00.5Z",
+                  None, "2018-10-02T00:00:00Z"]]
+
+        with Patcher() as patcher:
+            # setup pyfakefs - the fake filesystem
+            patcher.setUp()
+
+            headline_dir = c.FileStorage.get_headlines_directory(pipeline_name)
+            csv_dir = c.FileStorage.get_csv_directory(pipeline_name)
+            patcher.fs.create_dir(csv_dir)
+            paths = self.write_dated_headline_files(patcher, headline_dir,
+                                                    dates)
+
+            # Act
+            c.TransformOperations.stream_headlines_to_csv(
+                paths, "streamed.csv", pipeline_name)
+            status, msg = tf_func(paths, "sorted.csv", pipeline_name,
+                                  run_rows=run_rows, fan_in=fan_in)
+
+            streamed = pd.read_csv(os.path.join(csv_dir, "streamed.csv"),
+                                   index_col=0)
+            ordered = pd.read_csv(os.path.join(csv_dir, "sorted.csv"),
+                                  index_col=0)
+            leftover_files = sorted(os.listdir(os.path.dirname(csv_dir)))
+
+            # clean up and remove the fake filesystem
+            patcher.tearDown()
+
+        # Assert
+        assert status is True
+        assert list(ordered['news_title']) == [
+            "Title 2-0", "Title 0-1", "Title 1-1", "Title 1-0", "Title 2-3",
+            "Title 0-0", "Title 2-1", "Title 0-2", "Title 2-2"]
+        expected = streamed.reset_index().set_index('news_title').loc[
+            ordered['news_title']].reset_index()
+        pd.testing.assert_frame_equal(
+            ordered.reset_index()[list(expected.columns)], expected)
+        assert leftover_files == ["csv", "headlines"]
+
+    def test_sorted_headlines_to_csv_bad_fan_in_fails(self):
+        """runs cannot be merged fewer than two at a time."""
+
+        # Arrange
+        tf_func = c.TransformOperations.sorted_headlines_to_csv
+
+        # Assert
+        with pytest.raises(ValueError) as err:
+            tf_func(["dummy_headlines.json"], "sorted.csv",
+                    "tempus_challenge_dag", fan_in=1)
+
+        assert "not valid sort fan-in" in str(err.value)
+
+    def test_helper_execute_json_transformation_sorted_succeeds(self):
+        """the 'sorted' mode writes the pipeline's csv in publication date
+        order."""
+
+        # Arrange
+        transfm_fnc = c.TransformOperations.helper_execute_json_transformation
+        pipeline_name = "tempus_challenge_dag"
+
+        with Patcher() as patcher:
+            # setup pyfakefs - the fake filesystem
+            patcher.setUp()
+
+            headline_dir = c.FileStorage.get_headlines_directory(pipeline_name)
+            csv_dir = c.FileStorage.get_csv_directory(pipeline_name)
+            patcher.fs.create_dir(csv_dir)
+            self.write_dated_headline_files(
+                patcher, headline_dir, [["2018-10-02T00:00:00Z"],
+                                        ["2018-10-01T00:00:00Z"]])
+
+            # Act
+            status = transfm_fnc(headline_dir, "2018-10-01", mode='sorted')
+            ordered = pd.read_csv(os.path.join(
+                csv_dir, "2018-10-01_top_headlines.csv"), index_col=0)
+
+            # clean up and remove the fake filesystem
+            patcher.tearDown()
+
+        # Assert
+        assert status is True
+        assert list(ordered['news_title']) == ["Title 1-0", "Title 0-0"]
+
+    def test_transform_jsons_to_dataframe_merger_spills_succeeds(self):
+        """with a memory budget smaller than the headlines, the merger spills
+        them to disk and merges the same DataFrame as without a budget."""
+
+        # Arrange
+        pytest.importorskip('pyarrow')
+        merger_func = c.TransformOperations.transform_jsons_to_dataframe_merger
+
+        with tempfile.TemporaryDirectory() as headline_dir:
+            paths = []
+            for number in range(4):
+                articles = [{'source': {'id': "src-{}".format(number),
+                                        'name': "Source {}".format(number)},
+                             'author': None if number == 1 else "Author",
+                             'title': "Title {}-{}".format(number, index),
+                             'description': "description",
+                             'url': "https://example.com/{}".format(index),
+                             'urlToImage': None,
+                             'publishedAt': "2018-10-01T00:00:00Z",
+                             'content': "content"}
+                            for index in range(3)]
+                path = os.path.join(headline_dir,
+                                    "src-{}_headlines.json".format(number))
+                with open(path, "w") as headline_file:
+                    json.dump({'status': 'ok', 'articles': articles},
+                              headline_file)
+                paths.append(path)
+
+            # Act
+            with patch('challenge.transform.spill_store.SPILL_DIRECTORY',
+                       headline_dir):
+                in_memory = merger_func(paths, strategy='concat')
+                spilled = merger_func(paths, strategy='concat',
+                                      memory_budget=1)
+            leftover_files = sorted(os.listdir(headline_dir))
+
+        # Assert
+        assert list(spilled.index) == list(in_memory.index)
+        assert spilled.astype(str).equals(in_memory.astype(str))
+        assert spilled['news_source_id'].dtype == 'category'
+        assert leftover_files == ["src-{}_headlines.json".format(number)
+                                  for number in range(4)]
+
+    def test_merger_memory_budget_without_pyarrow_succeeds(self):
+        """without pyarrow, a memory budget is not applied and the files are
+        merged in memory."""
+
+        # Arrange
+        merger_func = c.TransformOperations.transform_jsons_to_dataframe_merger
+
+        with tempfile.TemporaryDirectory() as headline_dir:
+            paths = []
+            for number in range(2):
+                articles = [{'source': {'id': "src-{}".format(number),
+                                        'name': "Source {}".format(number)},
+                             'title': "Title {}-{}".format(number, index),
+                             'publishedAt': "2018-10-01T00:00:00Z"}
+                            for index in range(3)]
+                path = os.path.join(headline_dir,
+                                    "src-{}_headlines.json".format(number))
+                with open(path, "w") as headline_file:
+                    json.dump({'status': 'ok', 'articles': articles},
+                              headline_file)
+                paths.append(path)
+
+            # Act
+            with patch('challenge.transform.spill_store.pyarrow', None):
+                merged = merger_func(paths, strategy='concat',
+                                     memory_budget=1)
+
+        # Assert
+        assert list(merged['news_title']) == [
+            "Title {}-{}".format(number, index)
+            for number in range(2) for index in range(3)]
+
+    def test_deduplicate_headlines_across_runs_succeeds(self):
+        """a pipeline's next run leaves out the articles of an earlier run,
+        while a retry of a run keeps them."""
+
+        # Arrange
+        dedup_func = c.TransformOperations.deduplicate_headlines
+        pipeline_name = "tempus_challenge_dag"
+        first_frame = pd.DataFrame({'news_url': ["https://example.com/a",
+                                                 "https://example.com/b"]})
+        second_frame = pd.DataFrame({'news_url': ["https://example.com/b/",
+                                                  "https://example.com/c"]})
+
+        with tempfile.TemporaryDirectory() as index_dir:
+            # Act
+            with patch('challenge.dedup.dedup_index.DEDUP_MODE', 'drop'), \
+                    patch('challenge.dedup.dedup_index.DEDUP_DIRECTORY',
+                          index_dir):
+                first = dedup_func(first_frame, pipeline_name,
+                                   "2018-10-01_top_headlines.csv")
+                retried = dedup_func(first_frame, pipeline_name,
+                                     "2018-10-01_top_headlines.csv")
+                second = dedup_func(second_frame, pipeline_name,
+                                    "2018-10-02_top_headlines.csv")
+
+        # Assert
+        assert list(first['news_url']) == list(first_frame['news_url'])
+        assert list(retried['news_url']) == list(first_frame['news_url'])
+        assert list(second['news_url']) == ["https://example.com/c"]
+
+    def test_deduplicate_headlines_turned_off_succeeds(self):
+        """with deduplication turned off the headlines are returned as they
+        are, without an index."""
+
+        # Arrange
+        frame = pd.DataFrame({'news_url': ["https://example.com/a"]})
+
+        # Act
+        with patch('challenge.dedup.dedup_index.DEDUP_MODE', 'off'):
+            result = c.TransformOperations.deduplicate_headlines(
+                frame, "tempus_challenge_dag", "2018-10-01_top_headlines.csv")
+
+        # Assert
+        assert result is frame
+
+    def test_stream_mode_check_dedup_fails(self):
+        """the 'stream' and 'sorted' modes cannot deduplicate headlines."""
+
+        # Assert
+        with patch('challenge.dedup.dedup_index.DEDUP_MODE', 'flag'):
+            with pytest.raises(ValueError) as err:
+                c.TransformOperations.stream_mode_check(
+                    "tempus_challenge_dag", 'sorted')
+
+        assert "sorted mode does not deduplicate" in str(err.value)
+
+    def test_helper_execute_json_transformation_collapse_succeeds(self):
+        """with near-duplicate collapsing turned on, a story syndicated by
+        several news sources is written out once, with its cluster id."""
+
+        # Arrange
+        transfm_fnc = c.TransformOperations.helper_execute_json_transformation
+        pipeline_name = "tempus_challenge_dag"
+
+        with Patcher() as patcher:
+            # setup pyfakefs - the fake filesystem
+            patcher.setUp()
+
+            headline_dir = c.FileStorage.get_headlines_directory(pipeline_name)
+            csv_dir = c.FileStorage.get_csv_directory(pipeline_name)
+            patcher.fs.create_dir(csv_dir)
+            # every source's files hold articles of the same title, url and
+            # description
+            self.write_headline_files(patcher, headline_dir, [2, 2, 2])
+
+            # Act
+            with patch('challenge.dedup.near_duplicates.NEAR_DUPLICATE_MODE',
+                       'collapse'):
+                status = transfm_fnc(headline_dir, "2018-10-01",
+                                     mode='dataframe')
+                with pytest.raises(ValueError) as err:
+                    transfm_fnc(headline_dir, "2018-10-01", mode='stream')
+
+            collapsed = pd.read_csv(os.path.join(
+                csv_dir, "2018-10-01_top_headlines.csv"), index_col=0)
+
+            # clean up and remove the fake filesystem
+            patcher.tearDown()
+
+        # Assert
+        assert status is True
+        assert list(collapsed['news_source_id']) == ["src-0", "src-0"]
+        assert list(collapsed['news_cluster_id']) == [0, 1]
+        assert "stream mode does not deduplicate" in str(err.value)
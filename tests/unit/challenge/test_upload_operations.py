@@ -397,6 +397,85 @@ class TestUploadOperations:
         assert stat is True
         assert val == ['stuff1.csv', 'stuff2.csv', 'stuff3.csv']
 
+    def test_upload_directory_check_parquet_present_succeeds(self):
+        """Parquet headline files are uploaded along with csv files."""
+
+        # Arrange
+        csv_dir = os.path.join('tempdata', 'tempus_challenge_dag', 'csv')
+
+        with Patcher() as patcher:
+            # setup pyfakefs - the fake filesystem
+            patcher.setUp()
+
+            # create a fake filesystem directory and files to test the method
+            patcher.fs.create_dir(csv_dir)
+            patcher.fs.create_file(os.path.join(csv_dir, 'stuff1.csv'),
+                                   contents='1,dummy,txt')
+            patcher.fs.create_file(os.path.join(csv_dir, 'stuff1.parquet'),
+                                   contents='PAR1')
+            patcher.fs.create_file(os.path.join(csv_dir, 'stuff1.txt'),
+                                   contents='notes')
+
+        # Act
+            stat, msg, val = c.UploadOperations.upload_directory_check(csv_dir)
+
+            # clean up and remove the fake filesystem
+            patcher.tearDown()
+
+        # Assert
+        assert "CSV files present" in msg
+        assert stat is True
+        assert sorted(val) == ['stuff1.csv', 'stuff1.parquet']
+
+    @pytest.mark.parametrize('filename,metadata', [
+        ('stuff.csv', {'ContentType': 'text/csv'}),
+        ('stuff.csv.gz', {'ContentType': 'text/csv',
+                          'ContentEncoding': 'gzip'}),
+        ('stuff.csv.zst', {'ContentType': 'text/csv',
+                           'ContentEncoding': 'zstd'}),
+        ('stuff.parquet', {'ContentType': 'application/vnd.apache.parquet'})])
+    def test_upload_csv_to_s3_content_metadata_succeeds(self,
+                                                        airflow_context,
+                                                        filename,
+                                                        metadata):
+        """each headline file is uploaded under its own name, with the
+        content type and encoding of its format."""
+
+        # Arrange
+        bucket_name = 'tempus-challenge-csv-headlines'
+        csv_dir = c.FileStorage.get_csv_directory('tempus_challenge_dag')
+
+        upload_client = MagicMock()
+        resource_client = MagicMock()
+        bucket = MagicMock()
+        bucket.name = bucket_name
+        resource_client.buckets.all.return_value = [bucket]
+
+        with Patcher() as patcher:
+            # setup pyfakefs - the fake filesystem
+            patcher.setUp()
+
+            patcher.fs.create_dir(
+                c.FileStorage.get_news_directory('tempus_challenge_dag'))
+            patcher.fs.create_file(os.path.join(csv_dir, filename),
+                                   contents='1,dummy,txt')
+
+        # Act
+            stat, msg = c.UploadOperations.upload_csv_to_s3(csv_dir,
+                                                            bucket_name,
+                                                            upload_client,
+                                                            resource_client,
+                                                            **airflow_context)
+
+            # clean up and remove the fake filesystem
+            patcher.tearDown()
+
+        # Assert
+        assert stat is True
+        upload_client.upload_file.assert_called_once_with(
+            os.path.join(csv_dir, filename), bucket_name, filename,
+            ExtraArgs=metadata)
+
     def test_upload_directory_check_empty_dir_fails(self, airflow_context):
         """returns appropiate status message on detecting empty directory."""
 